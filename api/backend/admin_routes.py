@@ -1,5 +1,13 @@
-from flask import Blueprint, jsonify, request
+import json
+from datetime import date
+from flask import Blueprint, current_app, jsonify, request
 from backend.db_connection import db
+from backend import events, routing, search, subscriptions
+from backend.cache import cache, cached
+from backend.conditional import bump, conditional
+from backend.migrations.explain_check import route_list, route_query
+from backend.pagination import ListQuery, PageError, page, page_response
+from backend.streaming import stream_query
 from mysql.connector import Error
 
 # Blueprint for admin-facing routes
@@ -20,6 +28,7 @@ def delete_customer(customer_id):
             return jsonify({"error": "Customer not found"}), 404
 
         cursor.execute("DELETE FROM Customer WHERE customerID = %s", (customer_id,))
+        bump(cursor, "Customer")
         db.get_db().commit()
         cursor.close()
 
@@ -28,24 +37,23 @@ def delete_customer(customer_id):
     except Error as e:
         return jsonify({"error": str(e)}), 500
     
-# message history retur between admin and customer 
+# message history retur between admin and customer (paginated, oldest first)
+CUSTOMER_MESSAGE_LIST = route_list("GET /a/customer/<id>/customermessages?after=", ListQuery(
+    "CustomerMessage",
+    {c: c for c in ["messageID", "content", "timestamp", "customerID"]},
+    keys=["timestamp", "messageID"],
+    where="customerID = %s",
+), after=["2025-03-01 00:00:00", 10], params=(1,))
+
 @admin_routes.route("/customer/<int:customerID>/customermessages", methods=["GET"])
+@conditional("CustomerMessage")
 def get_customer_message_history(customerID):
     try:
         cursor = db.get_db().cursor()
-
-        cursor.execute(
-            """
-            SELECT messageID, content, timestamp, customerID
-            FROM CustomerMessages 
-            WHERE customerID = %s
-            """,
-            (customerID,),
-            )
-        order_list = cursor.fetchall()
+        result = page(CUSTOMER_MESSAGE_LIST, cursor, (customerID,))
         cursor.close()
 
-        return jsonify(order_list), 200
+        return result
     
     except Error as e:
         return jsonify({"error": str(e)}), 500
@@ -64,7 +72,7 @@ def send_message(customerID):
         cursor = db.get_db().cursor()
 
         query = """
-            INSERT INTO CustomerMessages (messageID, content, timestamp, customerID)
+            INSERT INTO CustomerMessage (messageID, content, timestamp, customerID)
             VALUES (%s, %s, %s, %s)
         """
 
@@ -78,9 +86,16 @@ def send_message(customerID):
             ),
             )
         
+        bump(cursor, "CustomerMessage")
         db.get_db().commit()
         cursor.close()
 
+        events.publish(
+            [f"customer:{customerID}", "admin"],
+            "customer_message",
+            {"messageID": data["messageID"], "content": data["content"], "timestamp": data["timestamp"], "customerID": customerID},
+        )
+
         return jsonify({"message": "Message sent succesfully"}), 201
 
     except Error as e:
@@ -118,8 +133,11 @@ def create_recipe():
             ),
             )
         
+        bump(cursor, "Recipe")
         db.get_db().commit()
+        search.refresh(cursor, "Recipe", [data["recipeID"]])
         cursor.close()
+        cache.invalidate("Recipe")
 
         return jsonify({"message": "Recipe created succesfully"}), 201
 
@@ -141,62 +159,75 @@ def delete_recipe(recipeID):
             return jsonify({"error": "Recipe not found"}), 404
 
         cursor.execute("DELETE FROM Recipe WHERE recipeID = %s", (recipeID,))
+        bump(cursor, "Recipe", "Recipe_WeeklyMenu", "RecipeProduce")
         db.get_db().commit()
+        search.refresh(cursor, "Recipe", [recipeID])
         cursor.close()
+        cache.invalidate("Recipe", "Recipe_WeeklyMenu")
 
         return jsonify({"message": "Recipe deleted successfully"}), 200
 
     except Error as e:
         return jsonify({"error": str(e)}), 500
 
-# Get all recipes
+# Get all recipes, by name (paginated)
+RECIPE_LIST = route_list("GET /a/recipes?after=", ListQuery(
+    "Recipe",
+    {
+        "recipeID": "recipeID",
+        "name": "name",
+        "description": "description",
+        "nutritionInfo": "nutritionInfo",
+        "popularityScore": "popularityScore",
+        "isActive": "isActive",
+        "suitableFor": "suitibleFor",
+        "cuisineType": "cuisineType",
+    },
+    keys=["name", "recipeID"],
+), after=["m", 10])
+
 @admin_routes.route("/recipes", methods=["GET"])
+@conditional("Recipe")
+@cached("Recipe")
 def get_all_recipes():
     try:
         cursor = db.get_db().cursor()
-        cursor.execute(
-            """
-            SELECT recipeID, name, description, nutritionInfo, popularityScore, isActive, suitibleFor, cuisineType
-            FROM Recipe
-            ORDER BY name
-            """
-        )
-        rows = cursor.fetchall()
-        cursor.close()
+        try:
+            rows, next_cursor = RECIPE_LIST.run(cursor, request.args)
+        except PageError as e:
+            return jsonify({"error": str(e)}), 400
+        finally:
+            cursor.close()
 
-        result = []
         for row in rows:
-            result.append({
-                'recipeID': row['recipeID'],
-                'name': row['name'],
-                'description': row['description'],
-                'nutritionInfo': row['nutritionInfo'],
-                'popularityScore': row['popularityScore'],
-                'isActive': bool(row['isActive']),
-                'suitableFor': row['suitibleFor'],
-                'cuisineType': row['cuisineType']
-            })
+            if 'isActive' in row:
+                row['isActive'] = bool(row['isActive'])
 
-        return jsonify(result), 200
+        return page_response(rows, next_cursor), 200
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+MENU_RECIPES_SQL = route_query(
+    "GET /a/weeklymenu/<id>/recipes",
+    """
+    SELECT r.recipeID, r.name, r.description, r.cuisineType, r.popularityScore, r.isActive
+    FROM Recipe r
+    JOIN Recipe_WeeklyMenu rwm ON r.recipeID = rwm.recipeID
+    WHERE rwm.menuID = %s
+    ORDER BY r.name
+    """,
+    (1,),
+)
+
 # Get recipes for a specific weekly menu
 @admin_routes.route("/weeklymenu/<int:menuID>/recipes", methods=["GET"])
+@conditional("Recipe", "Recipe_WeeklyMenu")
+@cached("Recipe", "Recipe_WeeklyMenu")
 def get_menu_recipes(menuID):
     try:
         cursor = db.get_db().cursor()
-        cursor.execute(
-            """
-            SELECT r.recipeID, r.name, r.description, r.cuisineType, r.popularityScore, r.isActive
-            FROM Recipe r
-            JOIN Recipe_WeeklyMenu rwm ON r.recipeID = rwm.recipeID
-            WHERE rwm.menuID = %s
-            ORDER BY r.name
-            """,
-            (menuID,)
-        )
+        cursor.execute(MENU_RECIPES_SQL, (menuID,))
         rows = cursor.fetchall()
         cursor.close()
 
@@ -216,6 +247,12 @@ def get_menu_recipes(menuID):
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+MENU_RECIPE_SQL = route_query(
+    "POST /a/weeklymenu/<id>/recipe/<recipeID>",
+    "SELECT * FROM Recipe_WeeklyMenu WHERE menuID = %s AND recipeID = %s",
+    (1, 1),
+)
+
 # Add recipe to weekly menu
 @admin_routes.route("/weeklymenu/<int:menuID>/recipe/<int:recipeID>", methods=["POST"])
 def add_recipe_to_menu(menuID, recipeID):
@@ -235,10 +272,7 @@ def add_recipe_to_menu(menuID, recipeID):
             return jsonify({"error": "Recipe not found"}), 404
 
         # Check if already in menu
-        cursor.execute(
-            "SELECT * FROM Recipe_WeeklyMenu WHERE menuID = %s AND recipeID = %s",
-            (menuID, recipeID)
-        )
+        cursor.execute(MENU_RECIPE_SQL, (menuID, recipeID))
         if cursor.fetchone():
             cursor.close()
             return jsonify({"error": "Recipe already in this menu"}), 409
@@ -248,8 +282,10 @@ def add_recipe_to_menu(menuID, recipeID):
             "INSERT INTO Recipe_WeeklyMenu (menuID, recipeID) VALUES (%s, %s)",
             (menuID, recipeID)
         )
+        bump(cursor, "Recipe_WeeklyMenu")
         db.get_db().commit()
         cursor.close()
+        cache.invalidate("Recipe_WeeklyMenu")
 
         return jsonify({"message": "Recipe added to menu successfully"}), 201
 
@@ -262,10 +298,7 @@ def remove_recipe_from_menu(menuID, recipeID):
     try:
         cursor = db.get_db().cursor()
 
-        cursor.execute(
-            "SELECT * FROM Recipe_WeeklyMenu WHERE menuID = %s AND recipeID = %s",
-            (menuID, recipeID)
-        )
+        cursor.execute(MENU_RECIPE_SQL, (menuID, recipeID))
         if not cursor.fetchone():
             cursor.close()
             return jsonify({"error": "Recipe not in this menu"}), 404
@@ -274,30 +307,32 @@ def remove_recipe_from_menu(menuID, recipeID):
             "DELETE FROM Recipe_WeeklyMenu WHERE menuID = %s AND recipeID = %s",
             (menuID, recipeID)
         )
+        bump(cursor, "Recipe_WeeklyMenu")
         db.get_db().commit()
         cursor.close()
+        cache.invalidate("Recipe_WeeklyMenu")
 
         return jsonify({"message": "Recipe removed from menu successfully"}), 200
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-# return list of farmers
+# return list of farmers (paginated)
+FARMER_LIST = route_list("GET /a/farmers?after=", ListQuery(
+    "Farmer",
+    {c: c for c in ["farmerID", "name", "status", "email", "contactInfo"]},
+    keys=["farmerID"],
+), after=[10])
+
 @admin_routes.route("/farmers", methods=["GET"])
+@conditional("Farmer")
 def get_farmers():
     try:
         cursor = db.get_db().cursor()
-
-        cursor.execute(
-            """
-            SELECT farmerID, name, status, email, contactInfo
-            FROM Farmer 
-            """,
-            )
-        order_list = cursor.fetchall()
+        result = page(FARMER_LIST, cursor)
         cursor.close()
 
-        return jsonify(order_list), 200
+        return result
     
     except Error as e:
         return jsonify({"error": str(e)}), 500
@@ -338,6 +373,7 @@ def update_farmer(farmerID):
         params.append(farmerID)
         query = f"UPDATE Farmer SET {', '.join(update_fields)} WHERE farmerID = %s"
         cursor.execute(query, params)
+        bump(cursor, "Farmer")
         db.get_db().commit()
         cursor.close()
 
@@ -349,18 +385,17 @@ def update_farmer(farmerID):
     except Error as e:
         return jsonify({"error": str(e)}), 500
     
+WEEKLY_MENU_SQL = route_query("GET /a/weekly_menu/", "SELECT * FROM weeklyMenu", scan_ok=("weeklyMenu",))
+
 # return weekly menu 
 @admin_routes.route("/weekly_menu/", methods=["GET"])
+@conditional("weeklyMenu")
+@cached("weeklyMenu")
 def get_weekly_menu():
     try:
         cursor = db.get_db().cursor()
 
-        cursor.execute(
-            """
-            SELECT *
-            FROM weeklyMenu; 
-            """,
-            )
+        cursor.execute(WEEKLY_MENU_SQL)
         order_list = cursor.fetchall()
         cursor.close()
 
@@ -395,8 +430,10 @@ def create_weekly_menu():
             ),
             )
         
+        bump(cursor, "weeklyMenu")
         db.get_db().commit()
         cursor.close()
+        cache.invalidate("weeklyMenu")
 
         return jsonify({"message": "Weekly Menu set up succesfully"}), 201
 
@@ -439,8 +476,10 @@ def update_weekly_menu(menuID):
         params.append(menuID)
         query = f"UPDATE WeeklyMenu SET {', '.join(update_fields)} WHERE menuID = %s"
         cursor.execute(query, params)
+        bump(cursor, "weeklyMenu", "Recipe_WeeklyMenu")
         db.get_db().commit()
         cursor.close()
+        cache.invalidate("weeklyMenu", "Recipe_WeeklyMenu")
 
         return jsonify({"message": "week menu updated successfully"}), 200
 
@@ -450,21 +489,244 @@ def update_weekly_menu(menuID):
     except Error as e:
         return jsonify({"error": str(e)}), 500
 
-# Get list of all customers
+# Get list of all customers (paginated)
+CUSTOMER_LIST = route_list("GET /a/admin/customers?after=", ListQuery(
+    "Customer",
+    {c: c for c in ["customerID", "firstName", "lastName", "email", "dietaryPref", "nutritionGoals"]},
+    keys=["customerID"],
+    default_fields=["customerID", "firstName", "lastName", "email"],
+), after=[10])
+
 @admin_routes.route("/admin/customers", methods=["GET"])
+@conditional("Customer")
 def get_all_customers():
+    try:
+        cursor = db.get_db().cursor()
+        result = page(CUSTOMER_LIST, cursor)
+        cursor.close()
+
+        return result
+
+    except Error as e:
+        return jsonify({"error": str(e)}), 500
+
+# Every order, optionally filtered on these columns (each "= %s")
+def orders_export_sql(filters=()):
+    query = """
+        SELECT orderID, orderDate, scheduledTime, deliveryAddress, status,
+               quantityOrdered, produceID, ingredientID, DriverID, customerID
+        FROM Orders
+    """
+    if filters:
+        query += " WHERE " + " AND ".join(f"{column} = %s" for column in filters)
+    return query + " ORDER BY orderID"
+
+
+route_query("GET /a/orders/export", orders_export_sql(), scan_ok=("Orders",))
+
+# Export the full order history, streamed from a server-side cursor.
+# Filters: ?customerID=, ?driverID=, ?status=; ?format=ndjson gives one
+# order per line.
+@admin_routes.route("/orders/export", methods=["GET"])
+def export_orders():
+    try:
+        filters = []
+        params = []
+        for arg, column in (("customerID", "customerID"), ("driverID", "DriverID")):
+            value = request.args.get(arg, type=int)
+            if value is not None:
+                filters.append(column)
+                params.append(value)
+        if request.args.get("status"):
+            filters.append("status")
+            params.append(request.args["status"])
+
+        return stream_query(orders_export_sql(filters), params), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# Assign a day's pending/confirmed orders across the available drivers
+# Example: POST /a/dispatch {"date": "2025-03-01", "dryRun": true}
+@admin_routes.route("/dispatch", methods=["POST"])
+def dispatch_orders():
+    try:
+        data = request.get_json() or {}
+
+        if "date" not in data:
+            return jsonify({"error": "Missing required field: date"}), 400
+
+        plan = routing.dispatch_day(
+            db.get_db(),
+            data["date"],
+            routing.geocoder,
+            dry_run=bool(data.get("dryRun", False)),
+            base_speed_kmh=current_app.config.get("ETA_BASE_SPEED_KMH", 30.0),
+            service_minutes=current_app.config.get("ETA_SERVICE_MINUTES", 5.0),
+            vehicle_capacity=current_app.config.get("DISPATCH_VEHICLE_CAPACITY"),
+        )
+
+        return jsonify(plan), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+DRIVER_THREADS_SQL = route_query(
+    "GET /a/driver-messages",
+    """
+    SELECT d.DriverID, d.name,
+           COUNT(*) AS messageCount,
+           MAX(m.messageID) AS lastMessageID,
+           MAX(m.timestamp) AS lastTimestamp
+    FROM DeliveryMessage m
+    JOIN Driver d ON d.DriverID = m.DriverID
+    GROUP BY d.DriverID, d.name
+    ORDER BY lastMessageID DESC
+    """,
+    scan_ok=("m", "d"),
+)
+
+# Driver conversations for the admin inbox, newest activity first
+@admin_routes.route("/driver-messages", methods=["GET"])
+@conditional("DeliveryMessage")
+def get_driver_threads():
     try:
         cursor = db.get_db().cursor()
 
-        cursor.execute("""
-            SELECT customerID, firstName, lastName, email
-            FROM Customer
-        """)
-        
-        customers = cursor.fetchall()
+        cursor.execute(DRIVER_THREADS_SQL)
+        threads = cursor.fetchall()
         cursor.close()
 
-        return jsonify(customers), 200
+        for thread in threads:
+            thread["lastTimestamp"] = str(thread["lastTimestamp"]) if thread["lastTimestamp"] else None
+
+        return jsonify(threads), 200
 
     except Error as e:
         return jsonify({"error": str(e)}), 500
+
+# Site-wide counts: the whole-table scans here are intended
+SUMMARY_SQL = route_query(
+    "GET /a/summary",
+    """
+    WITH by_status AS (
+        SELECT status, CAST(SUM(orders) AS SIGNED) AS n
+        FROM DailyOrderStatus
+        GROUP BY status
+    ),
+    today AS (
+        SELECT COUNT(*) AS scheduled,
+               COUNT(CASE WHEN status = 'delivered' THEN 1 END) AS delivered
+        FROM Orders
+        WHERE scheduledTime = CURDATE()
+    )
+    SELECT
+        (SELECT JSON_OBJECTAGG(status, n) FROM by_status) AS ordersByStatus,
+        today.scheduled AS deliveriesToday,
+        today.delivered AS deliveredToday,
+        (SELECT COUNT(*) FROM Orders
+          WHERE DriverID IS NULL
+            AND status IN ('pending', 'confirmed', 'preparing')) AS unassignedOrders,
+        (SELECT COUNT(*) FROM Produce WHERE quantityAvailable < %s) AS lowStockCount,
+        (SELECT COUNT(*) FROM Recipe WHERE isActive) AS activeRecipes,
+        (SELECT COUNT(*) FROM Customer) AS customers,
+        (SELECT COUNT(*) FROM Driver) AS drivers,
+        (SELECT COUNT(*) FROM CustomerMessage
+          WHERE `timestamp` >= CURDATE() - INTERVAL %s DAY) AS recentCustomerMessages,
+        (SELECT COUNT(*) FROM DeliveryMessage
+          WHERE `timestamp` >= CURDATE() - INTERVAL %s DAY) AS recentDriverMessages,
+        (SELECT COUNT(*) FROM DeliveryIssue
+          WHERE `timestamp` >= CURDATE() - INTERVAL %s DAY) AS recentDeliveryIssues
+    FROM today
+    """,
+    (50, 7, 7, 7),
+    scan_ok=("DailyOrderStatus", "Orders", "Produce", "Recipe", "CustomerMessage", "DeliveryMessage", "DeliveryIssue"),
+)
+
+# Everything the admin home page shows, in one query.  Order totals by
+# status come from the DailyOrderStatus rollup; today's deliveries and
+# unassigned orders are read live.
+# Example: /a/summary?lowStock=50&days=7
+@admin_routes.route("/summary", methods=["GET"])
+@cached("Orders", "DailyOrderStatus", "Produce", "Recipe", "Customer", "Driver", "CustomerMessage", "DeliveryMessage", "DeliveryIssue", ttl="SUMMARY_CACHE_TTL")
+def get_summary():
+    try:
+        low_stock = request.args.get("lowStock", 50, type=int)
+        days = request.args.get("days", 7, type=int)
+
+        cursor = db.get_db().cursor()
+        cursor.execute(SUMMARY_SQL, (low_stock, days, days, days))
+        summary = cursor.fetchone()
+        cursor.close()
+
+        summary["ordersByStatus"] = json.loads(summary["ordersByStatus"] or "{}")
+        summary["days"] = days
+
+        return jsonify(summary), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# Rollup rows, optionally from and/or to a day
+def daily_orders_sql(since=False, until=False):
+    query = "SELECT `day`, status, orders, quantity FROM DailyOrderStatus"
+    conditions = (["`day` >= %s"] if since else []) + (["`day` <= %s"] if until else [])
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    return query + " ORDER BY `day`, status"
+
+
+route_query("GET /a/reports/daily-orders", daily_orders_sql(True, True), ("2025-01-01", "2025-03-31"))
+
+# Orders per day and status, read from the DailyOrderStatus rollup
+# Example: /a/reports/daily-orders?from=2025-01-01&to=2025-03-31
+@admin_routes.route("/reports/daily-orders", methods=["GET"])
+@conditional("DailyOrderStatus")
+def get_daily_orders_report():
+    try:
+        params = []
+        for arg in ("from", "to"):
+            value = request.args.get(arg)
+            if value:
+                try:
+                    params.append(date.fromisoformat(value))
+                except ValueError:
+                    return jsonify({"error": f"{arg} must be an ISO date"}), 400
+
+        cursor = db.get_db().cursor()
+        cursor.execute(daily_orders_sql(bool(request.args.get("from")), bool(request.args.get("to"))), params)
+        rows = cursor.fetchall()
+        cursor.close()
+
+        return jsonify(rows), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# Create a week's subscription orders from every active meal plan
+# Body (optional): {"weekStart": "2025-03-03", "dryRun": true}
+@admin_routes.route("/subscriptions/run", methods=["POST"])
+def run_subscriptions():
+    try:
+        data = request.get_json(silent=True) or {}
+        try:
+            start = date.fromisoformat(data["weekStart"]) if data.get("weekStart") else None
+        except (TypeError, ValueError):
+            return jsonify({"error": "weekStart must be an ISO date"}), 400
+
+        try:
+            summary = subscriptions.run(
+                db.get_db(),
+                start,
+                current_app.config.get("SUBSCRIPTION_CHUNK_SIZE", subscriptions.CHUNK_SIZE),
+                current_app.config.get("SUBSCRIPTION_DELIVERY_DAYS", subscriptions.DELIVERY_WEEKDAYS),
+                dry_run=bool(data.get("dryRun")),
+            )
+        finally:
+            # Chunks committed before a failure still changed stock
+            cache.invalidate("Produce")
+
+        return jsonify(summary), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
@@ -0,0 +1,364 @@
+#------------------------------------------------------------
+# Read-through response cache for catalogue endpoints
+#------------------------------------------------------------
+# The recipe, produce, ingredient and weekly menu lists are fetched on
+# almost every Streamlit page load but change rarely.  A GET route
+# decorated with @cached("Recipe", ...) stores its serialized JSON body
+# (plus ETag and headers) keyed by path and query string, tagged with the
+# tables it reads.  Later requests are answered from the cache without
+# touching MySQL; when the client's If-None-Match matches the stored
+# ETag the answer is an empty 304, so nothing is serialized or sent.
+#
+# Write routes call cache.invalidate("Recipe", ...) after committing,
+# which evicts every entry tagged with those tables and moves each
+# table's invalidation generation on.  A miss notes the generations of
+# its tables before running the view and only stores the body if none
+# moved meanwhile, so a body read before a write is never kept.
+# Entries also expire after CACHE_TTL seconds, which bounds staleness
+# from writes made outside the API (e.g. a SQL console).
+#
+# Under @conditional, the key also carries the TableVersion ETag it
+# computed (g.table_etag).  Writes bump TableVersion before they commit
+# but invalidate only afterwards, so without it a GET in between would
+# send the new ETag with the old cached body, and the client would then
+# get 304s for stale data.  With it, that GET misses and reads the
+# committed rows.
+#
+# Backends (CACHE_BACKEND):
+#   memory  (default)  per-process LRU, CACHE_MAX_ENTRIES entries
+#   sqlite             a SQLite file (CACHE_SQLITE_PATH) shared by every
+#                      worker process on the host, so an invalidation in
+#                      one worker is seen by all of them
+import functools
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+from flask import Response, current_app, g, request
+
+# Headers that are recomputed for every response rather than stored
+_SKIP_HEADERS = {"content-length", "etag", "x-cache", "date"}
+
+
+class CacheEntry:
+    __slots__ = ("etag", "body", "headers", "tags", "expires")
+
+    def __init__(self, etag, body, headers, tags, expires):
+        self.etag = etag
+        self.body = body
+        self.headers = headers
+        self.tags = tags
+        self.expires = expires
+
+
+class LRUCache:
+    """In-process LRU of CacheEntry objects with per-entry expiry."""
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._generations = defaultdict(int)   # table -> invalidations
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def generation(self, tags):
+        with self._lock:
+            return tuple(sorted((tag, self._generations[tag]) for tag in tags))
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    # Store unless a table in `generation` was invalidated since it was read
+    def set(self, key, entry, generation=None):
+        with self._lock:
+            if generation is not None and generation != tuple(
+                sorted((tag, self._generations[tag]) for tag in entry.tags)
+            ):
+                return False
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            return True
+
+    def invalidate(self, tables):
+        tables = set(tables)
+        with self._lock:
+            for table in tables:
+                self._generations[table] += 1
+            stale = [k for k, e in self._entries.items() if e.tags & tables]
+            for key in stale:
+                del self._entries[key]
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteCache:
+    """CacheEntry store in a SQLite file shared between processes."""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self.evictions = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cache_entry (
+                key TEXT PRIMARY KEY,
+                etag TEXT NOT NULL,
+                body BLOB NOT NULL,
+                headers TEXT NOT NULL,
+                expires REAL NOT NULL
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cache_tag (
+                tag TEXT NOT NULL,
+                key TEXT NOT NULL,
+                PRIMARY KEY (tag, key)
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cache_generation (
+                tag TEXT PRIMARY KEY,
+                generation INTEGER NOT NULL
+            )
+            """
+        )
+
+    # One connection per thread; autocommit, WAL so readers never block
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _generation(self, conn, tags):
+        tags = sorted(tags)
+        marks = ", ".join("?" for _ in tags)
+        stored = dict(conn.execute(
+            f"SELECT tag, generation FROM cache_generation WHERE tag IN ({marks})", tags
+        ).fetchall()) if tags else {}
+        return tuple((tag, stored.get(tag, 0)) for tag in tags)
+
+    # Generations are kept in the file, so every worker sees every
+    # worker's invalidations
+    def generation(self, tags):
+        return self._generation(self._conn(), tags)
+
+    # Wall-clock time, since expiry is compared across processes
+    def get(self, key):
+        row = self._conn().execute(
+            "SELECT etag, body, headers, expires FROM cache_entry WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or row[3] <= time.time():
+            return None
+        headers = [tuple(line.split(": ", 1)) for line in row[2].split("\n") if line]
+        return CacheEntry(row[0], bytes(row[1]), headers, frozenset(), row[3])
+
+    # Store unless a table in `generation` was invalidated since it was
+    # read; checked inside the write lock, so no invalidation slips between
+    def set(self, key, entry, generation=None):
+        conn = self._conn()
+        headers = "\n".join(f"{name}: {value}" for name, value in entry.headers)
+        expires = time.time() + (entry.expires - time.monotonic())
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if generation is not None and generation != self._generation(conn, entry.tags):
+                conn.execute("ROLLBACK")
+                return False
+            now = time.time()
+            conn.execute(
+                "DELETE FROM cache_tag WHERE key IN (SELECT key FROM cache_entry WHERE expires <= ?)",
+                (now,),
+            )
+            conn.execute("DELETE FROM cache_entry WHERE expires <= ?", (now,))
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_entry (key, etag, body, headers, expires) VALUES (?, ?, ?, ?, ?)",
+                (key, entry.etag, entry.body, headers, expires),
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO cache_tag (tag, key) VALUES (?, ?)",
+                [(tag, key) for tag in entry.tags],
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return True
+
+    def invalidate(self, tables):
+        conn = self._conn()
+        marks = ", ".join("?" for _ in tables)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            removed = conn.execute(
+                f"DELETE FROM cache_entry WHERE key IN (SELECT key FROM cache_tag WHERE tag IN ({marks}))",
+                list(tables),
+            ).rowcount
+            conn.execute(f"DELETE FROM cache_tag WHERE tag IN ({marks})", list(tables))
+            conn.executemany(
+                "INSERT INTO cache_generation (tag, generation) VALUES (?, 1) "
+                "ON CONFLICT (tag) DO UPDATE SET generation = generation + 1",
+                [(table,) for table in tables],
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return removed
+
+    def clear(self):
+        conn = self._conn()
+        conn.execute("DELETE FROM cache_entry")
+        conn.execute("DELETE FROM cache_tag")
+
+    def __len__(self):
+        return self._conn().execute("SELECT COUNT(*) FROM cache_entry").fetchone()[0]
+
+
+class ResponseCache:
+    """Front end used by routes: the decorator, invalidation and stats."""
+
+    def __init__(self, backend=None, ttl=60):
+        self.backend = backend if backend is not None else LRUCache()
+        self.ttl = ttl
+        self.enabled = True
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def configure(self, backend=None, ttl=None, enabled=None):
+        if backend is not None:
+            self.backend = backend
+        if ttl is not None:
+            self.ttl = ttl
+        if enabled is not None:
+            self.enabled = enabled
+
+    # Evict every entry that read any of these tables
+    def invalidate(self, *tables):
+        if not tables:
+            return 0
+        return self.backend.invalidate(tables)
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        return {
+            "backend": type(self.backend).__name__,
+            "entries": len(self.backend),
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "evictions": self.backend.evictions,
+        }
+
+    def _respond(self, entry, state):
+        response = Response(entry.body, status=200, headers=entry.headers)
+        response.set_etag(entry.etag)
+        response.headers["X-Cache"] = state
+        response.make_conditional(request)
+        if response.status_code == 304:
+            self.not_modified += 1
+        return response
+
+    # Seconds to keep an entry: the decorator's ttl, which may name a
+    # config key (e.g. "SUMMARY_CACHE_TTL"), else the cache-wide default
+    def _ttl(self, ttl):
+        if ttl is None:
+            return self.ttl
+        if isinstance(ttl, str):
+            return current_app.config.get(ttl, self.ttl)
+        return ttl
+
+    def cached(self, *tables, ttl=None):
+        tags = frozenset(tables)
+
+        def decorator(view):
+            @functools.wraps(view)
+            def wrapper(*args, **kwargs):
+                if not self.enabled or request.method != "GET":
+                    return view(*args, **kwargs)
+
+                key = request.full_path
+                table_etag = g.get("table_etag")
+                if table_etag:
+                    key += "#" + table_etag
+                entry = self.backend.get(key)
+                if entry is not None:
+                    self.hits += 1
+                    return self._respond(entry, "HIT")
+                self.misses += 1
+
+                generation = self.backend.generation(tags)
+                result = view(*args, **kwargs)
+                response, status = result if isinstance(result, tuple) else (result, 200)
+                # Only whole, successful bodies are worth keeping
+                if status != 200 or not isinstance(response, Response) or response.is_streamed:
+                    return result
+
+                body = response.get_data()
+                headers = [
+                    (name, value) for name, value in response.headers.items()
+                    if name.lower() not in _SKIP_HEADERS
+                ]
+                entry = CacheEntry(
+                    hashlib.blake2b(body, digest_size=16).hexdigest(),
+                    body,
+                    headers,
+                    tags,
+                    time.monotonic() + self._ttl(ttl),
+                )
+                # A write that landed while the view ran (in any worker)
+                # may not be in this body; serve it, but don't keep it
+                self.backend.set(key, entry, generation)
+                return self._respond(entry, "MISS")
+
+            return wrapper
+
+        return decorator
+
+
+# Shared by every request in this process
+cache = ResponseCache()
+cached = cache.cached
+
+
+def init_app(app):
+    config = app.config
+    if config.get("CACHE_BACKEND", "memory") == "sqlite":
+        backend = SQLiteCache(config["CACHE_SQLITE_PATH"])
+    else:
+        backend = LRUCache(config.get("CACHE_MAX_ENTRIES", 512))
+    cache.configure(backend, ttl=config.get("CACHE_TTL", 60), enabled=config.get("CACHE_ENABLED", True))
@@ -0,0 +1,125 @@
+#------------------------------------------------------------
+# Conditional GET from per-table change counters
+#------------------------------------------------------------
+# TableVersion (migration 0004) holds a counter and a last-change time
+# for each table.  Write routes call bump(cursor, "Orders", ...) before
+# they commit, so the counter moves in the same transaction as the data.
+#
+# A read route decorated with @conditional("Orders") first reads the
+# counters of the tables it depends on -- one primary-key lookup -- and
+# derives a weak ETag and a Last-Modified from them:
+#   If-None-Match matches the ETag         -> 304, the route never runs
+#   If-Modified-Since >= Last-Modified     -> 304 (only without an ETag)
+#   otherwise                              -> the route runs and its 200
+#                                             response carries both headers
+# The ETag covers the URL too, so /x?limit=10 and /x?limit=20 differ.
+# It is also left in g.table_etag, where a @cached view below adds it to
+# its cache key (see cache.py).
+#
+# Only tables that are written through the API are worth listing: a
+# table changed from outside (e.g. Traffic, loaded by a feed) would
+# never bump its counter.  Until the migration is applied the decorator
+# just runs the route, and bump() logs once and does nothing, so writes
+# keep working too.
+import functools
+import hashlib
+from datetime import timezone
+
+from flask import current_app, g, request
+from pymysql.constants import ER
+from pymysql.err import ProgrammingError
+
+from backend.db_connection import db
+
+_missing_table_logged = False
+_bump_disabled_logged = False
+
+
+# Record a change to these tables in the caller's open transaction.
+# Without TableVersion only this statement fails; the caller's
+# transaction and its other writes are unaffected.
+def bump(cursor, *tables):
+    global _bump_disabled_logged
+    if not tables:
+        return
+    try:
+        cursor.execute(
+            "INSERT INTO TableVersion (tableName, version, updatedAt) VALUES "
+            + ", ".join("(%s, 1, UTC_TIMESTAMP())" for _ in tables)
+            + " ON DUPLICATE KEY UPDATE version = version + 1, updatedAt = UTC_TIMESTAMP()",
+            list(tables),
+        )
+    except ProgrammingError as e:
+        if e.args[0] != ER.NO_SUCH_TABLE:
+            raise
+        if not _bump_disabled_logged:
+            _bump_disabled_logged = True
+            current_app.logger.warning(f"table versions not recorded, run db-migrate: {e}")
+
+
+# {table: (version, updatedAt)} for the given tables
+def table_versions(cursor, tables):
+    marks = ", ".join("%s" for _ in tables)
+    cursor.execute(
+        f"SELECT tableName, version, updatedAt FROM TableVersion WHERE tableName IN ({marks})",
+        list(tables),
+    )
+    return {row["tableName"]: (row["version"], row["updatedAt"]) for row in cursor.fetchall()}
+
+
+def _validators(tables):
+    global _missing_table_logged
+    cursor = db.get_db().cursor()
+    try:
+        versions = table_versions(cursor, tables)
+    except Exception as e:
+        if not _missing_table_logged:
+            _missing_table_logged = True
+            current_app.logger.warning(f"conditional GET disabled: {e}")
+        return None, None
+    finally:
+        cursor.close()
+
+    parts = [request.full_path] + [f"{t}:{versions.get(t, (0, None))[0]}" for t in tables]
+    etag = "t-" + hashlib.blake2b("|".join(parts).encode("utf-8"), digest_size=12).hexdigest()
+    times = [updated for _, updated in versions.values() if updated is not None]
+    last_modified = max(times).replace(tzinfo=timezone.utc) if times else None
+    return etag, last_modified
+
+
+def _not_modified(etag, last_modified):
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and last_modified:
+        return last_modified.replace(microsecond=0) <= request.if_modified_since
+    return False
+
+
+def conditional(*tables):
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method != "GET":
+                return view(*args, **kwargs)
+
+            etag, last_modified = _validators(tables)
+            if etag is None:
+                return view(*args, **kwargs)
+
+            if _not_modified(etag, last_modified):
+                response = current_app.response_class(status=304)
+            else:
+                g.table_etag = etag
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag, weak=True)
+            if last_modified:
+                response.last_modified = last_modified
+            response.headers["Cache-Control"] = "no-cache"
+            return response
+
+        return wrapper
+
+    return decorator
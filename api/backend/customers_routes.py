@@ -1,7 +1,17 @@
+import json
+from datetime import date
 from flask import Blueprint, jsonify, request
 from backend.db_connection import db
 from mysql.connector import Error
 from flask import current_app
+from backend.pagination import ListQuery, page
+from backend.cache import cache, cached
+from backend.conditional import bump, conditional
+from backend.migrations.explain_check import route_list, route_query
+from backend.orders import MAX_BATCH, OrderError, StockError, create_orders, validate_orders
+from backend import search
+from backend.recommender import recommender
+from backend.mealplans import PlanError, load_week, save_plan, validate_plan, week_start
 
 # Blueprint for customer-facing routes
 customer_routes = Blueprint("customer_routes", __name__)
@@ -44,8 +54,10 @@ def update_nutrition_goals(customerID):
         params.append(customerID)
         query = f"UPDATE Customer SET {', '.join(update_fields)} WHERE customerID = %s"
         cursor.execute(query, params)
+        bump(cursor, "Customer")
         db.get_db().commit()
         cursor.close()
+        recommender.invalidate(customerID)
 
         return jsonify({"message": " Updated successfully"}), 200
 
@@ -86,6 +98,7 @@ def create_customer():
             ),
         )
 
+        bump(cursor, "Customer")
         db.get_db().commit()
         cursor.close()
 
@@ -94,21 +107,25 @@ def create_customer():
     except Error as e:
         return jsonify({"error": str(e)}), 500
 
+CUSTOMER_SQL = route_query(
+    "GET /c/customers/<id>",
+    """
+    SELECT customerID, firstName, lastName,
+           dietaryPref, nutritionGoals, email
+    FROM Customer
+    WHERE customerID = %s
+    """,
+    (1,),
+)
+
 # return customer profile & nutrition goals
 @customer_routes.route("/customers/<int:customer_id>", methods=["GET"])
+@conditional("Customer")
 def get_customer(customer_id):
     try:
         cursor = db.get_db().cursor()
 
-        cursor.execute(
-            """
-            SELECT customerID, firstName, lastName,
-                   dietaryPref, nutritionGoals, email
-            FROM Customer
-            WHERE customerID = %s
-            """,
-            (customer_id,),
-        )
+        cursor.execute(CUSTOMER_SQL, (customer_id,))
         customer = cursor.fetchone()
         cursor.close()
 
@@ -120,41 +137,48 @@ def get_customer(customer_id):
     except Error as e:
         return jsonify({"error": str(e)}), 500
 
-# Return delivery and new-menu notifications for a customer
+# Return delivery and new-menu notifications for a customer, newest
+# first (paginated)
+NOTIFICATION_LIST = route_list("GET /c/customers/<id>/notifications?after=", ListQuery(
+    "Notification",
+    {c: c for c in ["notificationID", "timestamp", "message", "farmerID", "customerID"]},
+    keys=["timestamp", "notificationID"],
+    where="customerID = %s",
+    descending=True,
+), after=["2025-03-01 00:00:00", 10], params=(1,))
+
 @customer_routes.route("/customers/<int:customer_id>/notifications", methods=["GET"])
 def get_menu_notifications(customer_id):
     try:
         cursor = db.get_db().cursor()
-
-        query = """
-            SELECT notificationID, timestamp, message, farmerID, customerID
-            FROM Notification
-            WHERE customerID = %s
-            ORDER BY timestamp DESC
-        """
-        cursor.execute(query, (customer_id,))
-        notifications = cursor.fetchall()
+        result = page(NOTIFICATION_LIST, cursor, (customer_id,))
         cursor.close()
 
-        return jsonify(notifications), 200
+        return result
 
     except Error as e:
         return jsonify({"error": str(e)}), 500
     
+RECIPE_DETAIL_SQL = route_query(
+    "GET /c/recipie/<id>",
+    """
+    SELECT r.recipeID, r.name, r.description, r.nutritionInfo, r.cuisineType,
+           rp.produceID, rp.amountNeeded
+    FROM Recipe r
+    LEFT JOIN RecipeProduce rp ON r.recipeID = rp.recipeID
+    WHERE r.recipeID = %s
+    """,
+    (1,),
+)
+
 # Return detailed recipe information and portioning
 @customer_routes.route("/recipie/<int:recipe_id>", methods=["GET"])
+@conditional("Recipe", "RecipeProduce")
 def get_detailed_repice(recipeID):
     try:
         cursor = db.get_db().cursor()
 
-        query = """
-            SELECT r.recipeID, r.name, r.description, r.nutritionInfo, r.cuisineType,
-                   rp.produceID, rp.amountNeeded
-            FROM Recipe r
-            LEFT JOIN RecipeProduce rp ON r.recipeID = rp.recipeID
-            WHERE r.recipeID = %s
-        """
-        cursor.execute(query, (recipeID,))
+        cursor.execute(RECIPE_DETAIL_SQL, (recipeID,))
         recipe = cursor.fetchall()
         cursor.close()
 
@@ -163,62 +187,178 @@ def get_detailed_repice(recipeID):
     except Error as e:
         return jsonify({"error": str(e)}), 500
     
-# Create a new order with selected pre-portioned ingredients/recipes
+# Create one order, or a batch ({"orders": [...]}), with its produce,
+# ingredient and recipe lines; stock is reserved in the same transaction
+# and nothing is written unless every order in the batch is valid
 @customer_routes.route("/orders", methods=["POST"])
 def create_order():
     try:
-        data = request.get_json()
+        orders = validate_orders(
+            request.get_json(silent=True),
+            current_app.config.get("ORDER_BATCH_MAX", MAX_BATCH),
+        )
+    except OrderError as e:
+        return jsonify({"error": str(e), "errors": e.errors}), 400
 
-        required_fields = ["customerID", "deliveryAddress", "scheduledTime"]
-        for field in required_fields:
-            if field not in data:
-                return jsonify({"error": f"Missing required field: {field}"}), 400
+    conn = db.get_db()
+    cursor = conn.cursor()
+    try:
+        order_ids = create_orders(cursor, orders)
+        bump(cursor, "Orders", "OrderProduce", "OrderIngredient", "OrderRecipe", "Produce", "Ingredient")
+        conn.commit()
+        # Only stock levels changed; nothing the search index holds
+        search.refresh(cursor, "Produce")
+        search.refresh(cursor, "Ingredient")
+    except StockError as e:
+        conn.rollback()
+        return jsonify({"error": str(e), "errors": e.errors}), 409
+    except OrderError as e:
+        conn.rollback()
+        return jsonify({"error": str(e), "errors": e.errors}), 400
+    except Exception as e:
+        conn.rollback()
+        return jsonify({"error": str(e)}), 500
+    finally:
+        cursor.close()
+    cache.invalidate("Produce", "Ingredient")
 
-        recipes = data.get("recipes", [])
-        produce_items = data.get("produce", [])
+    if len(order_ids) == 1:
+        return jsonify({
+            "message": "Order created successfully",
+            "orderID": order_ids[0],
+            "recipesAdded": orders[0]["recipes"],
+            "produceAdded": [{"produceID": p, "quantityOrdered": q} for p, q in orders[0]["produce"].items()],
+            "ingredientsAdded": [{"ingredientID": i, "quantityOrdered": q} for i, q in orders[0]["ingredients"].items()],
+        }), 201
+    return jsonify({"message": f"{len(order_ids)} orders created successfully", "orderIDs": order_ids}), 201
+
+# Every part is per customer and must use the customerID indexes
+SUMMARY_SQL = route_query(
+    "GET /c/summary",
+    """
+    WITH mine AS (
+        SELECT status, scheduledTime FROM Orders WHERE customerID = %s
+    ),
+    by_status AS (
+        SELECT status, COUNT(*) AS n FROM mine GROUP BY status
+    ),
+    plans AS (
+        SELECT mealPlanID FROM mealPlan
+        WHERE customerID = %s
+          AND startDate <= CURDATE()
+          AND (endDate IS NULL OR endDate >= CURDATE())
+    )
+    SELECT
+        (SELECT JSON_OBJECTAGG(status, n) FROM by_status) AS ordersByStatus,
+        (SELECT MIN(scheduledTime) FROM mine
+          WHERE scheduledTime >= CURDATE()
+            AND status IN ('pending', 'confirmed', 'preparing', 'out_for_delivery')) AS nextDelivery,
+        (SELECT COUNT(*) FROM plans) AS activeMealPlans,
+        (SELECT COUNT(*) FROM mealPlanRecipe mpr
+          JOIN plans ON plans.mealPlanID = mpr.mealPlanID) AS plannedMeals,
+        (SELECT COUNT(*) FROM Notification
+          WHERE customerID = %s AND `timestamp` >= CURDATE() - INTERVAL %s DAY) AS recentNotifications,
+        (SELECT COUNT(*) FROM CustomerMessage
+          WHERE customerID = %s AND `timestamp` >= CURDATE() - INTERVAL %s DAY) AS recentMessages
+    """,
+    (5, 5, 5, 7, 5, 7),
+)
+
+# Everything the customer home page shows, in one query
+# Example: /c/summary?customerID=5&days=7
+@customer_routes.route("/summary", methods=["GET"])
+@cached("Orders", "mealPlan", "mealPlanRecipe", "Notification", "CustomerMessage", ttl="SUMMARY_CACHE_TTL")
+def get_summary():
+    try:
+        customerID = request.args.get("customerID", type=int)
+        if customerID is None:
+            return jsonify({"error": "customerID query parameter required"}), 400
+        days = request.args.get("days", 7, type=int)
 
         cursor = db.get_db().cursor()
+        cursor.execute(SUMMARY_SQL, (customerID, customerID, customerID, days, customerID, days))
+        summary = cursor.fetchone()
+        cursor.close()
 
-        create_order_query = """
-            INSERT INTO `Order` (customerID, deliveryAddress, scheduledTime, status)
-            VALUES (%s, %s, %s, 'Pending')
-        """
-        cursor.execute(
-            create_order_query,
-            (data["customerID"], data["deliveryAddress"], data["scheduledTime"])
-        )
+        summary["ordersByStatus"] = json.loads(summary["ordersByStatus"] or "{}")
+        summary["days"] = days
 
-        orderID = cursor.lastrowid
+        return jsonify(summary), 200
 
-        if recipes:
-            recipe_query = """
-                INSERT INTO OrderRecipe (orderID, recipeID)
-                VALUES (%s, %s)
-            """
-            for recipeID in recipes:
-                cursor.execute(recipe_query, (orderID, recipeID))
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
-        if produce_items:
-            produce_query = """
-                INSERT INTO OrderProduce (orderID, produceID, quantityOrdered)
-                VALUES (%s, %s, %s)
-            """
-            for item in produce_items:
-                if "produceID" not in item or "quantityOrdered" not in item:
-                    return jsonify({"error": "Each produce item must include produceID and quantityOrdered"}), 400
-                cursor.execute(produce_query, (orderID, item["produceID"], item["quantityOrdered"]))
+# Return the customer's meal plan for a week as a day x meal grid
+# Example: /c/customers/5/mealplan?week=2025-03-03 (any date in the week)
+@customer_routes.route("/customers/<int:customer_id>/mealplan", methods=["GET"])
+@conditional("mealPlan", "mealPlanRecipe", "Recipe")
+def get_meal_plan(customer_id):
+    try:
+        week = request.args.get("week")
+        try:
+            start = week_start(date.fromisoformat(week) if week else None)
+        except ValueError:
+            return jsonify({"error": "week must be an ISO date"}), 400
 
-        db.get_db().commit()
+        cursor = db.get_db().cursor()
+        plan = load_week(cursor, customer_id, start)
         cursor.close()
 
-        return jsonify({
-            "message": "Order created successfully",
-            "orderID": orderID,
-            "recipesAdded": recipes,
-            "produceAdded": produce_items
-        }), 201
+        return jsonify(plan), 200
 
-    except Error as e:
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# Save a whole week of the meal plan in one transaction; only slots that
+# differ from the stored plan are written
+@customer_routes.route("/customers/<int:customer_id>/mealplan", methods=["PUT"])
+def save_meal_plan(customer_id):
+    try:
+        start, slots = validate_plan(request.get_json(silent=True))
+    except PlanError as e:
+        return jsonify({"error": str(e)}), 400
+
+    conn = db.get_db()
+    cursor = conn.cursor()
+    try:
+        result = save_plan(cursor, customer_id, start, slots)
+        if not result["changed"]:
+            conn.rollback()
+            return jsonify(result), 200
+        bump(cursor, "mealPlan", "mealPlanRecipe")
+        conn.commit()
+    except LookupError as e:
+        conn.rollback()
+        return jsonify({"error": str(e)}), 404
+    except PlanError as e:
+        conn.rollback()
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        conn.rollback()
+        return jsonify({"error": str(e)}), 500
+    finally:
+        cursor.close()
+    cache.invalidate("mealPlan", "mealPlanRecipe")
+
+    return jsonify(result), 200
+
+# Recipes that best match the customer's dietary preferences and
+# nutrition goals, best first
+# Example: /c/customers/5/recommendations?limit=5
+@customer_routes.route("/customers/<int:customer_id>/recommendations", methods=["GET"])
+def get_recommendations(customer_id):
+    try:
+        limit = max(1, min(request.args.get("limit", 10, type=int), recommender.k))
+
+        cursor = db.get_db().cursor()
+        recipes = recommender.recommend(cursor, customer_id, limit)
+        cursor.close()
+
+        if recipes is None:
+            return jsonify({"error": "Customer not found"}), 404
+        return jsonify({"customerID": customer_id, "recipes": recipes}), 200
+
+    except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 """
@@ -1,10 +1,225 @@
 #------------------------------------------------------------
 # This file creates a shared DB connection resource
 #------------------------------------------------------------
-from flaskext.mysql import MySQL
+# Every blueprint does `db.get_db().cursor()`.  Instead of opening a
+# new MySQL connection (TCP + auth handshake) for every request
+# context, `db` hands out connections from a bounded, thread-safe
+# pool and gives them back when the app context is torn down.
+import threading
+import time
+
+import pymysql
+from flask import g
 from pymysql import cursors
 
 
-# the parameter instructs the connection to return data 
-# as a dictionary object. 
-db = MySQL(cursorclass=cursors.DictCursor)
\ No newline at end of file
+class PoolTimeout(Exception):
+    """Raised when no connection frees up before the checkout timeout."""
+
+
+class ConnectionPool:
+    """
+    A bounded pool of PyMySQL connections.
+
+    Connections are created lazily up to `max_size`.  A checkout waits at
+    most `timeout` seconds for a free connection.  Connections older than
+    `recycle` seconds are replaced, and connections idle for longer than
+    `ping_interval` seconds are pinged before being handed out.
+    """
+
+    def __init__(self, connect_kwargs, max_size=10, timeout=5.0,
+                 recycle=3600, ping_interval=30):
+        self._connect_kwargs = connect_kwargs
+        self.max_size = max_size
+        self.timeout = timeout
+        self.recycle = recycle
+        self.ping_interval = ping_interval
+
+        self._cond = threading.Condition()
+        self._idle = []          # stack of (conn, created_at, last_used)
+        self._created_at = {}    # id(conn) -> creation time, for checked out conns
+        self._size = 0           # open connections, idle + in use (+ being created)
+        self._in_use = 0
+        self._waiting = 0
+
+        self._created = 0
+        self._recycled = 0
+        self._timeouts = 0
+
+    def _open(self):
+        conn = pymysql.connect(**self._connect_kwargs)
+        with self._cond:
+            self._created += 1
+        return conn
+
+    def _close_quietly(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _is_healthy(self, conn, created_at, last_used, now):
+        if self.recycle and now - created_at > self.recycle:
+            return False
+        if now - last_used > self.ping_interval:
+            try:
+                conn.ping(reconnect=False)
+            except Exception:
+                return False
+        return True
+
+    # Check a connection out of the pool, waiting up to `timeout` seconds
+    def acquire(self, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+
+        while True:
+            with self._cond:
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeout(
+                            f"no database connection available after {timeout}s "
+                            f"(pool size {self.max_size})"
+                        )
+                    self._waiting += 1
+                    try:
+                        self._cond.wait(remaining)
+                    finally:
+                        self._waiting -= 1
+
+                if self._idle:
+                    conn, created_at, last_used = self._idle.pop()
+                else:
+                    # Reserve a slot, then connect outside the lock
+                    self._size += 1
+                    conn = None
+                self._in_use += 1
+
+            if conn is None:
+                try:
+                    conn = self._open()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._in_use -= 1
+                        self._cond.notify()
+                    raise
+                created_at = time.monotonic()
+            elif not self._is_healthy(conn, created_at, last_used, time.monotonic()):
+                self._close_quietly(conn)
+                with self._cond:
+                    self._recycled += 1
+                    self._size -= 1
+                    self._in_use -= 1
+                    self._cond.notify()
+                continue
+
+            with self._cond:
+                self._created_at[id(conn)] = created_at
+            return conn
+
+    # Return a connection to the pool; broken connections are dropped
+    def release(self, conn, discard=False):
+        if not discard:
+            try:
+                # Never leak an open transaction to the next borrower
+                conn.rollback()
+            except Exception:
+                discard = True
+
+        with self._cond:
+            created_at = self._created_at.pop(id(conn), time.monotonic())
+            self._in_use -= 1
+            if discard:
+                self._size -= 1
+                self._recycled += 1
+            else:
+                self._idle.append((conn, created_at, time.monotonic()))
+            self._cond.notify()
+
+        if discard:
+            self._close_quietly(conn)
+
+    def close_all(self):
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+        for conn, _, _ in idle:
+            self._close_quietly(conn)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "max_size": self.max_size,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "waiting": self._waiting,
+                "created": self._created,
+                "recycled": self._recycled,
+                "timeouts": self._timeouts,
+            }
+
+
+class PooledMySQL:
+    """
+    Drop-in replacement for flaskext.mysql.MySQL backed by ConnectionPool.
+
+    `get_db()` returns the connection bound to the current app context,
+    checking one out of the pool on first use.  It goes back to the pool
+    when the app context ends.
+    """
+
+    def __init__(self, cursorclass=cursors.DictCursor):
+        self.cursorclass = cursorclass
+        self.pool = None
+
+    def init_app(self, app):
+        config = app.config
+        connect_kwargs = {
+            "host": config.get("MYSQL_DATABASE_HOST", "localhost"),
+            "port": config.get("MYSQL_DATABASE_PORT", 3306),
+            "user": config.get("MYSQL_DATABASE_USER"),
+            "password": config.get("MYSQL_DATABASE_PASSWORD"),
+            "database": config.get("MYSQL_DATABASE_DB"),
+            "charset": config.get("MYSQL_DATABASE_CHARSET", "utf8mb4"),
+            "cursorclass": self.cursorclass,
+            "autocommit": False,
+        }
+        self.pool = ConnectionPool(
+            connect_kwargs,
+            max_size=config.get("MYSQL_POOL_SIZE", 10),
+            timeout=config.get("MYSQL_POOL_TIMEOUT", 5.0),
+            recycle=config.get("MYSQL_POOL_RECYCLE", 3600),
+            ping_interval=config.get("MYSQL_POOL_PING_INTERVAL", 30),
+        )
+        app.teardown_appcontext(self.teardown)
+        app.extensions["pooled_mysql"] = self
+
+    # Connection for the current request / app context
+    def get_db(self):
+        if "db_conn" not in g:
+            g.db_conn = self.pool.acquire()
+        return g.db_conn
+
+    # Raw checkout for work outside a request; pair with release()
+    def connect(self):
+        return self.pool.acquire()
+
+    def release(self, conn, discard=False):
+        self.pool.release(conn, discard=discard)
+
+    def teardown(self, exception):
+        conn = g.pop("db_conn", None)
+        if conn is not None:
+            self.pool.release(conn, discard=not conn.open)
+
+    def pool_stats(self):
+        return self.pool.stats() if self.pool else {}
+
+
+# the parameter instructs the connection to return data
+# as a dictionary object.
+db = PooledMySQL(cursorclass=cursors.DictCursor)
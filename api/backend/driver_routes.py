@@ -1,51 +1,101 @@
-from flask import Blueprint, jsonify, request
+import json
+from datetime import datetime
+from flask import Blueprint, current_app, jsonify, request
 from backend.db_connection import db
+from backend import events, rollups, routing
+from backend.cache import cached
+from backend.conditional import bump, conditional
+from backend.migrations.explain_check import route_query
 
 # Blueprint for driver-facing routes
 driver_routes = Blueprint("driver_routes", __name__)
 
+ORDERS_SQL = route_query(
+    "GET /d/driver/<id>/order",
+    """
+    SELECT orderID, orderDate, scheduledTime, deliveryAddress, status, quantityOrdered, DriverID, customerID
+    FROM Orders
+    WHERE DriverID = %s
+    ORDER BY CASE status
+        WHEN 'out_for_delivery' THEN 1
+        WHEN 'confirmed' THEN 2
+        WHEN 'preparing' THEN 3
+        WHEN 'pending' THEN 4
+        ELSE 5
+    END, scheduledTime
+    """,
+    (1,),
+)
+
 # Return all scheduled deliveries for driver
 @driver_routes.route("/driver/<int:driverID>/order", methods=["GET"])
+@conditional("Orders")
 def get_all_deliveries(driverID):
     try:
         cursor = db.get_db().cursor()
-        cursor.execute(
-            """
-            SELECT orderID, orderDate, scheduledTime, deliveryAddress, status, quantityOrdered, DriverID, customerID
-            FROM Orders 
-            WHERE DriverID = %s
-            ORDER BY CASE status
-                WHEN 'out_for_delivery' THEN 1
-                WHEN 'confirmed' THEN 2
-                WHEN 'preparing' THEN 3
-                WHEN 'pending' THEN 4
-                ELSE 5
-            END, scheduledTime
-            """,
-            (driverID,),
-        )
+        cursor.execute(ORDERS_SQL, (driverID,))
         rows = cursor.fetchall()
         cursor.close()
 
-        # Convert dict rows to JSON-serializable format (dates need string conversion)
-        result = []
-        for row in rows:
-            result.append({
-                'orderID': row['orderID'],
-                'orderDate': str(row['orderDate']) if row['orderDate'] else None,
-                'scheduledTime': str(row['scheduledTime']) if row['scheduledTime'] else None,
-                'deliveryAddress': row['deliveryAddress'],
-                'status': row['status'],
-                'quantityOrdered': row['quantityOrdered'],
-                'DriverID': row['DriverID'],
-                'customerID': row['customerID']
-            })
-
-        return jsonify(result), 200
+        return jsonify(rows), 200
     
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+OPEN_ORDERS_SQL = route_query(
+    "GET /d/driver/<id>/route",
+    """
+    SELECT orderID, orderDate, scheduledTime, deliveryAddress, status, quantityOrdered, DriverID, customerID
+    FROM Orders
+    WHERE DriverID = %s
+      AND status IN ('out_for_delivery', 'confirmed', 'preparing', 'pending')
+    """,
+    (1,),
+)
+
+# Optimized stop order for the driver's open deliveries, with traffic-aware ETAs
+# Example: /d/driver/6/route?departure=2025-03-01T08:00:00
+@driver_routes.route("/driver/<int:driverID>/route", methods=["GET"])
+def get_optimized_route(driverID):
+    try:
+        departure = request.args.get("departure")
+        try:
+            departure = datetime.fromisoformat(departure) if departure else datetime.now()
+        except ValueError:
+            return jsonify({"error": "departure must be an ISO date-time"}), 400
+
+        cursor = db.get_db().cursor()
+        cursor.execute(OPEN_ORDERS_SQL, (driverID,))
+        rows = cursor.fetchall()
+        cursor.close()
+
+        # scheduledTime is the stop's delivery day and doubles as its time window
+        plan = routing.plan_route(rows, routing.geocoder)
+
+        # Only Traffic rows newer than the last refresh are read here
+        routing.traffic.refresh_if_stale(db.get_db())
+        routing.attach_etas(
+            plan["stops"], routing.traffic, driverID, departure,
+            base_speed_kmh=current_app.config.get("ETA_BASE_SPEED_KMH", 30.0),
+            service_minutes=current_app.config.get("ETA_SERVICE_MINUTES", 5.0),
+        )
+        for stop in plan["stops"]:
+            stop["orderDate"] = str(stop["orderDate"]) if stop["orderDate"] else None
+            stop["scheduledTime"] = str(stop["scheduledTime"]) if stop["scheduledTime"] else None
+
+        plan["driverID"] = driverID
+        plan["departure"] = departure.strftime("%Y-%m-%d %H:%M:%S")
+        return jsonify(plan), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+DRIVER_ORDER_SQL = route_query(
+    "PUT /d/driver/<id>/order/<orderID>",
+    "SELECT orderID, customerID FROM Orders WHERE DriverID = %s AND orderID = %s",
+    (1, 1),
+)
+
 #Update driver order status 
 @driver_routes.route("/driver/<int:driverID>/order/<int:orderID>", methods=["PUT"])
 def update_order_status(driverID, orderID):
@@ -68,11 +118,9 @@ def update_order_status(driverID, orderID):
         cursor = db.get_db().cursor()
 
         # Make sure the order exists for this driver
-        cursor.execute(
-            "SELECT orderID FROM Orders WHERE DriverID = %s AND orderID = %s",
-            (driverID, orderID,),
-        )
-        if not cursor.fetchone():
+        cursor.execute(DRIVER_ORDER_SQL, (driverID, orderID))
+        order = cursor.fetchone()
+        if not order:
             cursor.close()
             return jsonify({"error": "Order not found for this driver"}), 404
 
@@ -81,9 +129,17 @@ def update_order_status(driverID, orderID):
         params.append(orderID)
         query = f"UPDATE Orders SET {', '.join(update_fields)} WHERE DriverID = %s AND orderID = %s"
         cursor.execute(query, params)
+        rollups.mark_orders_dirty(cursor, [orderID])
+        bump(cursor, "Orders")
         db.get_db().commit()
         cursor.close()
 
+        events.publish(
+            [f"driver:{driverID}", f"customer:{order['customerID']}", "admin"],
+            "order_status",
+            {"orderID": orderID, "DriverID": driverID, "customerID": order["customerID"], "status": data["status"]},
+        )
+
         return jsonify({"message": "Order status updated successfully"}), 200
 
     except Exception as e:
@@ -117,6 +173,7 @@ def create_issue_report(orderID):
             ),
             )
         
+        bump(cursor, "DeliveryIssue")
         db.get_db().commit()
         cursor.close()
 
@@ -125,103 +182,161 @@ def create_issue_report(orderID):
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-# Conversation history between driver and admin 
+# A driver's messages, optionally only those after a messageID and/or time
+def messages_sql(since_id=False, since=False):
+    query = """
+        SELECT messageID, timestamp, content, sender, DriverID
+        FROM DeliveryMessage
+        WHERE DriverID = %s
+    """
+    if since_id:
+        query += " AND messageID > %s"
+    if since:
+        query += " AND timestamp > %s"
+    return query + " ORDER BY messageID ASC"
+
+
+route_query("GET /d/driver/<id>/deliverymessage?since_id=", messages_sql(since_id=True), (1, 0))
+
+# Conversation history between driver and admin.
+# Pollers pass the last messageID they have (?since_id=) or a timestamp
+# (?since=YYYY-MM-DD HH:MM:SS) and only get rows newer than that.
+# X-First-Message-ID / X-Last-Message-ID describe the whole thread, so a
+# poller can tell when messages it already holds have been cleared.
 @driver_routes.route("/driver/<int:driverID>/deliverymessage", methods=["GET"])
+@conditional("DeliveryMessage")
 def get_message(driverID):
     try:
-        cursor = db.get_db().cursor()
+        params = [driverID]
+
+        since_id = request.args.get("since_id")
+        if since_id is not None:
+            try:
+                params.append(int(since_id))
+            except ValueError:
+                return jsonify({"error": "since_id must be an integer"}), 400
+
+        since = request.args.get("since")
+        if since is not None:
+            try:
+                params.append(datetime.fromisoformat(since))
+            except ValueError:
+                return jsonify({"error": "since must be an ISO date/time"}), 400
 
+        cursor = db.get_db().cursor()
+        cursor.execute(messages_sql(since_id is not None, since is not None), params)
+        rows = cursor.fetchall()
         cursor.execute(
             """
-            SELECT messageID, timestamp, content, DriverID
+            SELECT MIN(messageID) AS firstID, MAX(messageID) AS lastID
             FROM DeliveryMessage
             WHERE DriverID = %s
-            ORDER BY timestamp ASC
             """,
             (driverID,),
         )
-        rows = cursor.fetchall()
+        bounds = cursor.fetchone()
         cursor.close()
 
-        # Convert to JSON-serializable format
-        result = []
-        for row in rows:
-            result.append({
-                'messageID': row['messageID'],
-                'timestamp': str(row['timestamp']) if row['timestamp'] else None,
-                'content': row['content'],
-                'DriverID': row['DriverID']
-            })
-
-        return jsonify(result), 200
+        response = jsonify(rows)
+        response.headers["X-First-Message-ID"] = str(bounds["firstID"] or 0)
+        response.headers["X-Last-Message-ID"] = str(bounds["lastID"] or 0)
+        return response, 200
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     
-#Send message to admin  
+# Send a message in the driver's thread.  sender is 'driver' (default)
+# or 'admin'; messageID and timestamp are assigned by the database.
 @driver_routes.route("/driver/<int:driverID>/deliverymessage", methods=["POST"])
 def send_message(driverID):
     try:
         data = request.get_json()
 
-        required_fields = ["messageID", "timestamp", "content"]
-        for field in required_fields:
-            if field not in data:
-                return jsonify({"error": f"Missing required field: {field}"}), 400
+        if "content" not in data or not str(data["content"]).strip():
+            return jsonify({"error": "Missing required field: content"}), 400
+
+        sender = data.get("sender", "driver")
+        if sender not in ("driver", "admin"):
+            return jsonify({"error": "sender must be 'driver' or 'admin'"}), 400
 
         cursor = db.get_db().cursor()
 
         query = """
-            INSERT INTO DeliveryMessage (messageID, timestamp, content, driverID)
+            INSERT INTO DeliveryMessage (timestamp, content, sender, driverID)
             VALUES (%s, %s, %s, %s)
         """
 
         cursor.execute(
             query,
             (
-                data["messageID"],
-                data['timestamp'],
+                data.get("timestamp") or datetime.now(),
                 data['content'], 
+                sender,
                 driverID,
             ),
             )
-        
+        message_id = cursor.lastrowid
+
+        bump(cursor, "DeliveryMessage")
+        db.get_db().commit()
+        cursor.close()
+
+        events.publish(
+            [f"driver:{driverID}", "admin"],
+            "delivery_message",
+            {"messageID": message_id, "content": data["content"], "sender": sender, "DriverID": driverID},
+        )
+
+        return jsonify({"message": "Message sent succesfully", "messageID": message_id}), 201
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# Clear (resolve) a driver's conversation
+@driver_routes.route("/driver/<int:driverID>/deliverymessage", methods=["DELETE"])
+def clear_messages(driverID):
+    try:
+        cursor = db.get_db().cursor()
+        cursor.execute("DELETE FROM DeliveryMessage WHERE DriverID = %s", (driverID,))
+        deleted = cursor.rowcount
+        bump(cursor, "DeliveryMessage")
         db.get_db().commit()
         cursor.close()
 
-        return jsonify({"message": "Message sent succesfully"}), 201
+        events.publish([f"driver:{driverID}", "admin"], "delivery_message_cleared", {"DriverID": driverID})
+
+        return jsonify({"message": "Conversation cleared", "deleted": deleted}), 200
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
-    
+
+AVAILABILITY_SQL = route_query(
+    "GET /d/driver/<id>/driveravailability",
+    """
+    SELECT availibilityID, availStartTime, availEndTime, date, isAvailable, DriverID
+    FROM DriverAvailability
+    WHERE DriverID = %s
+    """,
+    (1,),
+)
+
 # Driver availability
 @driver_routes.route("/driver/<int:driverID>/driveravailability", methods=["GET"])
+@conditional("DriverAvailability")
 def get_availability(driverID):
     try:
         cursor = db.get_db().cursor()
 
-        cursor.execute(
-            """SELECT availibilityID, availStartTime, availEndTime, date, isAvailable, DriverID
-            FROM DriverAvailability
-            WHERE DriverID = %s""",
-            (driverID,),
-            )
+        cursor.execute(AVAILABILITY_SQL, (driverID,))
         rows = cursor.fetchall()
         cursor.close()
 
-        # Convert timedelta and date objects to strings for JSON serialization
-        result = []
+        # MySQL has no boolean type; dates and TIME values are left to
+        # the app's JSON provider
         for row in rows:
-            result.append({
-                'availibilityID': row['availibilityID'],
-                'availStartTime': str(row['availStartTime']) if row['availStartTime'] else None,
-                'availEndTime': str(row['availEndTime']) if row['availEndTime'] else None,
-                'date': str(row['date']) if row['date'] else None,
-                'isAvailable': bool(row['isAvailable']),
-                'DriverID': row['DriverID']
-            })
-
-        return jsonify(result), 200
+            row["isAvailable"] = bool(row["isAvailable"])
+
+        return jsonify(rows), 200
     
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -261,6 +376,7 @@ def update_driver_availability(driverID, availabilityID):
         params.append(driverID)
         query = f"UPDATE DriverAvailability SET {', '.join(update_fields)} WHERE availibilityID = %s AND DriverID = %s"
         cursor.execute(query, params)
+        bump(cursor, "DriverAvailability")
         db.get_db().commit()
         cursor.close()
 
@@ -269,20 +385,23 @@ def update_driver_availability(driverID, availabilityID):
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     
+TRAFFIC_SQL = route_query(
+    "GET /d/driver/<id>/traffic",
+    """
+    SELECT locationID, timestamp, trafficLevels, notification, driverID
+    FROM Traffic
+    WHERE driverID = %s
+    """,
+    (1,),
+)
+
 # Trafic for driver 
 @driver_routes.route("/driver/<int:driverID>/traffic", methods=["GET"])
 def get_driver_route(driverID):
     try:
         cursor = db.get_db().cursor()
 
-        cursor.execute(
-            """
-            SELECT locationID, timestamp, trafficLevels, notification, driverID
-            FROM Traffic
-            WHERE driverID = %s
-            """,
-            (driverID,),
-        )
+        cursor.execute(TRAFFIC_SQL, (driverID,))
         traffic = cursor.fetchall()
         cursor.close()
 
@@ -294,6 +413,12 @@ def get_driver_route(driverID):
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     
+AVAILABILITY_ON_DATE_SQL = route_query(
+    "POST /d/driver/<id>/driveravailability",
+    "SELECT availibilityID FROM DriverAvailability WHERE `date` = %s AND DriverID = %s",
+    ("2025-01-01", 1),
+)
+
 # Post for adding availability to the database
 @driver_routes.route("/driver/<int:driverID>/driveravailability", methods=["POST"])
 def create_driver_availability(driverID):
@@ -307,10 +432,7 @@ def create_driver_availability(driverID):
 
         cursor = db.get_db().cursor()
 
-        cursor.execute(
-            "SELECT availibilityID FROM DriverAvailability WHERE `date` = %s AND DriverID = %s",
-            (data["date"], driverID),
-        )
+        cursor.execute(AVAILABILITY_ON_DATE_SQL, (data["date"], driverID))
         if cursor.fetchone():
             cursor.close()
             return jsonify({"error": "Availability already exists for this date. Use PUT to update."}), 409
@@ -329,13 +451,73 @@ def create_driver_availability(driverID):
                 driverID,
             ),
         )
-        
-        db.get_db().commit()
         new_id = cursor.lastrowid
+
+        bump(cursor, "DriverAvailability")
+        db.get_db().commit()
         cursor.close()
 
         return jsonify({"message": "Availability created successfully", "availabilityID": new_id}), 201
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
-    
\ No newline at end of file
+    
+# The per-driver parts must use the DriverID indexes
+SUMMARY_SQL = route_query(
+    "GET /d/summary",
+    """
+    WITH mine AS (
+        SELECT status, scheduledTime FROM Orders WHERE DriverID = %s
+    ),
+    by_status AS (
+        SELECT status, COUNT(*) AS n FROM mine GROUP BY status
+    ),
+    messages AS (
+        SELECT COUNT(*) AS n, MAX(`timestamp`) AS latest
+        FROM DeliveryMessage
+        WHERE DriverID = %s AND `timestamp` >= CURDATE() - INTERVAL %s DAY
+    ),
+    shifts AS (
+        SELECT COUNT(*) AS n, MIN(`date`) AS nextShift
+        FROM DriverAvailability
+        WHERE DriverID = %s AND `date` >= CURDATE() AND isAvailable
+    )
+    SELECT
+        (SELECT JSON_OBJECTAGG(status, n) FROM by_status) AS ordersByStatus,
+        (SELECT COUNT(*) FROM mine WHERE scheduledTime = CURDATE()) AS deliveriesToday,
+        (SELECT COUNT(*) FROM mine
+          WHERE scheduledTime = CURDATE() AND status = 'delivered') AS deliveredToday,
+        (SELECT COUNT(*) FROM mine
+          WHERE status IN ('pending', 'confirmed', 'preparing', 'out_for_delivery')) AS openOrders,
+        messages.n AS recentMessages,
+        messages.latest AS lastMessageDate,
+        shifts.n AS upcomingShifts,
+        shifts.nextShift
+    FROM messages CROSS JOIN shifts
+    """,
+    (6, 6, 7, 6),
+)
+
+# Everything the driver home page shows, in one query
+# Example: /d/summary?driverID=6&days=7
+@driver_routes.route("/summary", methods=["GET"])
+@cached("Orders", "DeliveryMessage", "DriverAvailability", ttl="SUMMARY_CACHE_TTL")
+def get_summary():
+    try:
+        driverID = request.args.get("driverID", type=int)
+        if driverID is None:
+            return jsonify({"error": "driverID query parameter required"}), 400
+        days = request.args.get("days", 7, type=int)
+
+        cursor = db.get_db().cursor()
+        cursor.execute(SUMMARY_SQL, (driverID, driverID, days, driverID))
+        summary = cursor.fetchone()
+        cursor.close()
+
+        summary["ordersByStatus"] = json.loads(summary["ordersByStatus"] or "{}")
+        summary["days"] = days
+
+        return jsonify(summary), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
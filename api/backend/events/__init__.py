@@ -0,0 +1,21 @@
+#------------------------------------------------------------
+# Push updates to clients over Server-Sent Events
+#------------------------------------------------------------
+# Route handlers call publish() after they commit a change; clients
+# subscribed to the matching /events stream receive it as a delta.
+from backend.events.bus import Event, EventBus, Subscription
+from backend.events.event_routes import bus, event_routes
+
+__all__ = ["Event", "EventBus", "Subscription", "bus", "event_routes", "init_app", "publish"]
+
+
+# Publish one event to several topics, e.g. ["driver:6", "admin"]
+def publish(topics, type, data):
+    return bus.publish_many(topics, type, data)
+
+
+def init_app(app):
+    bus.configure(
+        replay_size=app.config.get("EVENTS_REPLAY_SIZE"),
+        queue_size=app.config.get("EVENTS_QUEUE_SIZE"),
+    )
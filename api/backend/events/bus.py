@@ -0,0 +1,161 @@
+#------------------------------------------------------------
+# In-process publish/subscribe bus
+#------------------------------------------------------------
+# Route handlers publish small events ("order 12 is now delivered") to
+# topics such as "driver:6", "customer:3" or "admin".  Each SSE client
+# holds a Subscription with its own bounded queue.
+#
+# Every topic also keeps a ring buffer of its most recent events, so a
+# client that reconnects with Last-Event-ID gets what it missed.  Event
+# ids are "<epoch>:<seq>".  The epoch changes when the API restarts; an
+# id from another epoch, or one older than the ring buffer, cannot be
+# replayed and the client is told to reset (refetch its full list).
+import itertools
+import queue
+import threading
+import uuid
+from collections import deque
+
+
+class Event:
+    __slots__ = ("seq", "id", "topic", "type", "data")
+
+    def __init__(self, seq, epoch, topic, type, data):
+        self.seq = seq
+        self.id = f"{epoch}:{seq}"
+        self.topic = topic
+        self.type = type
+        self.data = data
+
+
+class Subscription:
+    """One client's view of the bus: a bounded queue of events."""
+
+    def __init__(self, bus, topics, queue_size):
+        self.bus = bus
+        self.topics = tuple(topics)
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.overflowed = False
+        self.closed = False
+
+    def _offer(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            # A stalled client; it gets a reset instead of a gap
+            self.overflowed = True
+
+    # Next event, or None after `timeout` seconds
+    def get(self, timeout=None):
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    # Called by the stream's generator and again when the response
+    # closes; only the first call unsubscribes
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.bus._unsubscribe(self)
+
+
+class EventBus:
+    def __init__(self, replay_size=256, queue_size=1000):
+        self.replay_size = replay_size
+        self.queue_size = queue_size
+        self.epoch = uuid.uuid4().hex[:8]
+        self._seq = itertools.count(1)
+        self._last_seq = 0
+        self._lock = threading.Lock()
+        self._subscribers = {}      # topic -> set of Subscription
+        self._history = {}          # topic -> deque of recent Events
+        self._evicted_upto = {}     # topic -> seq of the newest evicted Event
+        self.published = 0
+
+    def configure(self, replay_size=None, queue_size=None):
+        with self._lock:
+            if replay_size:
+                self.replay_size = replay_size
+                self._history = {
+                    topic: deque(events, maxlen=replay_size)
+                    for topic, events in self._history.items()
+                }
+            if queue_size:
+                self.queue_size = queue_size
+
+    @property
+    def last_id(self):
+        return f"{self.epoch}:{self._last_seq}"
+
+    def publish(self, topic, type, data):
+        with self._lock:
+            seq = next(self._seq)
+            event = Event(seq, self.epoch, topic, type, data)
+            history = self._history.setdefault(topic, deque(maxlen=self.replay_size))
+            if len(history) == history.maxlen:
+                self._evicted_upto[topic] = history[0].seq
+            history.append(event)
+            self._last_seq = seq
+            self.published += 1
+            for subscription in self._subscribers.get(topic, ()):
+                subscription._offer(event)
+        return event
+
+    # Same event on several topics (e.g. the driver's and the admin's)
+    def publish_many(self, topics, type, data):
+        return [self.publish(topic, type, data) for topic in topics]
+
+    def _parse(self, last_event_id):
+        epoch, _, seq = (last_event_id or "").partition(":")
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+        return int(seq)
+
+    # Register a subscriber and collect what it missed since last_event_id.
+    # Returns (subscription, missed events, complete, cursor).  complete
+    # is False when the missed events cannot all be replayed; cursor is
+    # the id of the last event published before the subscription, i.e.
+    # everything after it arrives on the queue.  Registration and replay
+    # happen under one lock, so nothing is missed or duplicated.
+    def subscribe(self, topics, last_event_id=None):
+        subscription = Subscription(self, topics, self.queue_size)
+        with self._lock:
+            for topic in subscription.topics:
+                self._subscribers.setdefault(topic, set()).add(subscription)
+
+            cursor = self.last_id
+            if last_event_id is None:
+                return subscription, [], True, cursor
+
+            since = self._parse(last_event_id)
+            if since is None:
+                return subscription, [], False, cursor
+
+            missed = []
+            complete = True
+            for topic in subscription.topics:
+                if self._evicted_upto.get(topic, 0) > since:
+                    complete = False
+                missed.extend(e for e in self._history.get(topic, ()) if e.seq > since)
+            missed.sort(key=lambda e: e.seq)
+            return subscription, missed, complete, cursor
+
+    def _unsubscribe(self, subscription):
+        with self._lock:
+            for topic in subscription.topics:
+                subscribers = self._subscribers.get(topic)
+                if subscribers:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[topic]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "epoch": self.epoch,
+                "published": self.published,
+                "topics": len(self._history),
+                "subscribers": sum(len(s) for s in self._subscribers.values()),
+            }
@@ -0,0 +1,103 @@
+#------------------------------------------------------------
+# Server-Sent Events streams
+#------------------------------------------------------------
+# GET /events/driver/<id>     order status changes and chat for a driver
+# GET /events/customer/<id>   order status changes and chat for a customer
+# GET /events/admin           everything the admin inbox cares about
+#
+# Standard SSE: send Last-Event-ID (header or ?last_event_id=) to resume.
+# ?timeout=<seconds> ends the stream after that long; clients that cannot
+# hold a connection open (e.g. a Streamlit rerun) use ?timeout=0 to get
+# just the events they missed.
+#
+# Event types: ready (stream started, carries the current event id),
+# reset (missed events are gone: refetch the full list), order_status,
+# delivery_message, customer_message.
+import time
+
+from flask import Blueprint, Response, current_app, jsonify, request
+
+from backend.events.bus import EventBus
+from backend.json_provider import dumps_bytes
+
+event_routes = Blueprint("event_routes", __name__)
+
+bus = EventBus()
+
+
+def _format(event_id, event_type, data):
+    lines = []
+    if event_id:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event_type}")
+    lines.append(f"data: {dumps_bytes(data).decode('utf-8')}")
+    return "\n".join(lines) + "\n\n"
+
+
+def _stream(topics):
+    last_event_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    try:
+        timeout = float(request.args["timeout"]) if "timeout" in request.args else None
+    except ValueError:
+        return jsonify({"error": "timeout must be a number of seconds"}), 400
+    heartbeat = current_app.config.get("EVENTS_HEARTBEAT_SECONDS", 15)
+
+    subscription, missed, complete, cursor = bus.subscribe(topics, last_event_id)
+
+    def generate():
+        try:
+            yield "retry: 3000\n\n"
+            if not complete:
+                yield _format(cursor, "reset", {"topics": list(topics)})
+            else:
+                for event in missed:
+                    yield _format(event.id, event.type, event.data)
+                yield _format(cursor, "ready", {"topics": list(topics)})
+
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while deadline is None or time.monotonic() < deadline:
+                wait = heartbeat if deadline is None else min(heartbeat, deadline - time.monotonic())
+                event = subscription.get(timeout=max(wait, 0))
+                if subscription.overflowed:
+                    yield _format(bus.last_id, "reset", {"topics": list(topics)})
+                    return
+                if event is None:
+                    yield ": keepalive\n\n"
+                else:
+                    yield _format(event.id, event.type, event.data)
+        finally:
+            subscription.close()
+
+    response = Response(
+        generate(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    # Covers a body that is never iterated at all (e.g. HEAD, or a client
+    # gone before the first chunk)
+    response.call_on_close(subscription.close)
+    return response
+
+
+# Push channel for one driver
+@event_routes.route("/driver/<int:driverID>", methods=["GET"])
+def driver_stream(driverID):
+    return _stream([f"driver:{driverID}"])
+
+
+# Push channel for one customer
+@event_routes.route("/customer/<int:customerID>", methods=["GET"])
+def customer_stream(customerID):
+    return _stream([f"customer:{customerID}"])
+
+
+# Push channel for the admin inbox
+@event_routes.route("/admin", methods=["GET"])
+def admin_stream():
+    return _stream(["admin"])
+
+
+# Bus counters, for checking the push channel is alive
+@event_routes.route("/stats", methods=["GET"])
+def event_stats():
+    return jsonify(bus.stats()), 200
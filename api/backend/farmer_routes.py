@@ -1,5 +1,12 @@
+import json
 from flask import Blueprint, jsonify, request
 from backend.db_connection import db
+from backend import ml_models, rollups, search
+from backend.cache import cache, cached
+from backend.conditional import bump, conditional
+from backend.migrations.explain_check import route_list, route_query
+from backend.pagination import ListQuery, PageError, page, page_response
+from backend.streaming import stream_query
 from mysql.connector import Error
 
 # Blueprint for customer-facing routes
@@ -34,8 +41,11 @@ def create_produce():
             ),
             )
         
+        bump(cursor, "Produce")
         db.get_db().commit()
+        search.refresh(cursor, "Produce", [data["produceID"]])
         cursor.close()
+        cache.invalidate("Produce")
 
         return jsonify({"message": "Produce created succesfully"}), 201
 
@@ -43,56 +53,66 @@ def create_produce():
         return jsonify({"error": str(e)}), 500
 
 
-# List all available produce
+# List all available produce (paginated: limit, after, fields, order)
+PRODUCE_LIST = route_list("GET /f/produce?after=", ListQuery(
+    "Produce",
+    {c: c for c in ["produceID", "name", "expectedHarvestDate", "quantityAvailable", "unit"]},
+    keys=["produceID"],
+), after=[10])
+
 @farmer_routes.route("/produce", methods=["GET"])
+@conditional("Produce")
+@cached("Produce")
 def get_all_produce():
     try:
         cursor = db.get_db().cursor()
-
-        cursor.execute(
-            "SELECT produceID, name, expectedHarvestDate, quantityAvailable, unit " \
-            "FROM Produce"
-            )
-        produce_list = cursor.fetchall()
+        result = page(PRODUCE_LIST, cursor)
         cursor.close()
 
-        return jsonify(produce_list), 200
+        return result
     
     except Error as e:
         return jsonify({"error": str(e)}), 500
 
-# Return all available ingredients
+# Return all available ingredients (paginated)
+INGREDIENT_LIST = route_list("GET /f/ingredient?after=", ListQuery(
+    "Ingredient",
+    {c: c for c in ["ingredientID", "name", "portionSize", "amountNeeded", "quantityAvailable", "recipeID"]},
+    keys=["ingredientID"],
+), after=[10])
+
 @farmer_routes.route("/ingredient", methods=["GET"])
+@conditional("Ingredient")
+@cached("Ingredient")
 def get_all_ingredient():
     try:
         cursor = db.get_db().cursor()
-
-        cursor.execute(
-            "SELECT * " \
-            "FROM Ingredient"
-            )
-        ingredient_list = cursor.fetchall()
+        result = page(INGREDIENT_LIST, cursor)
         cursor.close()
 
-        return jsonify(ingredient_list), 200
+        return result
     
     except Error as e:
         return jsonify({"error": str(e)}), 500
     
+PRODUCE_SQL = route_query(
+    "GET /f/produce/<id>",
+    """
+    SELECT produceID, name, expectedHarvestDate, quantityAvailable, unit
+    FROM Produce
+    WHERE produceID = %s
+    """,
+    (1,),
+)
+
 # Return produce details
 @farmer_routes.route("/produce/<int:produceID>", methods=["GET"])
+@conditional("Produce")
 def get_produce(produceID):
     try:
         cursor = db.get_db().cursor()
 
-        cursor.execute(
-            """
-            SELECT produceID, name, expectedHarvestDate, quantityAvailable, unit
-            FROM Produce
-            WHERE produceID = %s
-            """,
-            (produceID,),
-        )
+        cursor.execute(PRODUCE_SQL, (produceID,))
         produce = cursor.fetchone()
         cursor.close()
 
@@ -139,52 +159,64 @@ def update_produce(produceID):
         query = f"UPDATE Produce SET {', '.join(update_fields)} WHERE produceID = %s"
         cursor.execute(query, params)
 
+        bump(cursor, "Produce")
         db.get_db().commit()
+        search.refresh(cursor, "Produce", [produceID])
         cursor.close()
+        cache.invalidate("Produce")
 
         return jsonify({"message": "Produce updated successfully"}), 200
 
     except Error as e:
         return jsonify({"error": str(e)}), 500
 
-# Return all recipes with filtering by popularity
+# Return all recipes, most popular first (paginated)
+RECIPE_LIST = route_list("GET /f/recipe?after=", ListQuery(
+    "Recipe",
+    {c: c for c in ["recipeID", "name", "description", "popularityScore"]},
+    keys=["popularityScore", "recipeID"],
+    descending=True,
+), after=[50, 10])
+
 @farmer_routes.route("/recipe", methods=["GET"])
+@conditional("Recipe")
+@cached("Recipe")
 def get_recipes():
     try:
         cursor = db.get_db().cursor()
+        try:
+            recipes, next_cursor = RECIPE_LIST.run(cursor, request.args)
+        except PageError as e:
+            return jsonify({"error": str(e)}), 400
+        finally:
+            cursor.close()
 
-        query = """
-                SELECT recipeID, name, description, popularityScore
-                FROM Recipe
-                ORDER BY popularityScore DESC
-            """
-        cursor.execute(query)
-
-        recipes = cursor.fetchall()
-        cursor.close()
-
-        if not recipes:
+        if not recipes and not request.args.get("after"):
             return jsonify({"error": "No recipes found"}), 404
 
-        return jsonify(recipes), 200
+        return page_response(recipes, next_cursor), 200
 
     except Error as e:
         return jsonify({"error": str(e)}), 500
 
+FARMER_INVENTORY_SQL = route_query(
+    "GET /f/farmers/<id>/inventory",
+    """
+    SELECT inventoryID, farmerID, produceID, dateUpdate, quantity
+    FROM InventoryEntry
+    WHERE farmerID = %s
+    """,
+    (1,),
+)
+
 # Inventory list for farmer
 @farmer_routes.route("/farmers/<int:farmerID>/inventory", methods=["GET"])
+@conditional("InventoryEntry")
 def get_farmer_inventory(farmerID):
     try:
         cursor = db.get_db().cursor()
 
-        cursor.execute(
-            """
-            SELECT inventoryID, farmerID, produceID, dateUpdate, quantity
-            FROM InventoryEntry
-            WHERE farmerID = %s
-            """,
-            (farmerID,),
-        )
+        cursor.execute(FARMER_INVENTORY_SQL, (farmerID,))
         recipe = cursor.fetchall()
         cursor.close()
 
@@ -224,6 +256,7 @@ def add_new_inventory_entry(farmerID):
             )
             )
         
+        bump(cursor, "InventoryEntry")
         db.get_db().commit()
         cursor.close()
 
@@ -232,6 +265,12 @@ def add_new_inventory_entry(farmerID):
     except Error as e:
         return jsonify({"error": str(e)}), 500
 
+INVENTORY_ENTRY_SQL = route_query(
+    "PUT /f/farmers/<id>/Inventory/<inventoryID>",
+    "SELECT inventoryID, dateUpdate FROM InventoryEntry WHERE farmerID = %s AND inventoryID = %s",
+    (1, 1),
+)
+
 # Update inventory entry
 @farmer_routes.route("/farmers/<int:farmerID>/Inventory/<int:inventoryID>", methods=["PUT"])
 def update_farmer_inventory(farmerID, inventoryID):
@@ -244,13 +283,9 @@ def update_farmer_inventory(farmerID, inventoryID):
         cursor = db.get_db().cursor()
 
         # Make sure the produce exists
-        cursor.execute(
-            "SELECT inventoryID " \
-            "FROM InventoryEntry " \
-            "WHERE farmerID = %s AND inventoryID = %s",
-            (farmerID,inventoryID,),
-        )
-        if not cursor.fetchone():
+        cursor.execute(INVENTORY_ENTRY_SQL, (farmerID, inventoryID))
+        entry = cursor.fetchone()
+        if not entry:
             cursor.close()
             return jsonify({"error": "Produce entry not found"}), 404
         
@@ -262,6 +297,9 @@ def update_farmer_inventory(farmerID, inventoryID):
             """,
             (data["quantity"], farmerID, inventoryID)
         )
+        # The entry moves to today; its old day's rollup must drop it
+        rollups.mark_dirty(cursor, "inventory", entry["dateUpdate"])
+        bump(cursor, "InventoryEntry")
         db.get_db().commit()
         cursor.close()
 
@@ -270,20 +308,35 @@ def update_farmer_inventory(farmerID, inventoryID):
     except Error as e:
         return jsonify({"error": str(e)}), 500
 
-# Demand prediction
+DEMAND_SQL = route_query(
+    "GET /f/demand/produce/<id>",
+    """
+    SELECT produceID, forcastID, predictedDemand
+    FROM Demand
+    WHERE produceID = %s
+    """,
+    (1,),
+)
+
+# Demand prediction, served from the in-memory forecast model when one
+# has been published; otherwise from the Demand table
 @farmer_routes.route("/demand/produce/<int:produceID>", methods=["GET"])
 def get_demand(produceID):
     try:
+        version, model = ml_models.models.get(ml_models.MODEL_NAME)
+        if model is not None:
+            predicted = model.predict_one(produceID)
+            if predicted is not None:
+                return jsonify({
+                    "produceID": produceID,
+                    "forcastID": produceID,
+                    "predictedDemand": round(predicted, 2),
+                    "modelVersion": version,
+                }), 200
+
         cursor = db.get_db().cursor()
 
-        cursor.execute(
-            """
-            SELECT produceID, forcastID, predictedDemand
-            FROM Demand
-            WHERE produceID = %s
-            """,
-            (produceID,),
-        )
+        cursor.execute(DEMAND_SQL, (produceID,))
         recipe = cursor.fetchone()
         cursor.close()
 
@@ -295,8 +348,64 @@ def get_demand(produceID):
     except Error as e:
         return jsonify({"error": str(e)}), 500
 
+# Demand joined with stock for `count` produce IDs, or for all produce
+def bulk_demand_sql(count=None):
+    query = """
+        SELECT p.produceID, p.name, p.quantityAvailable, p.unit,
+               d.forcastID, d.predictedDemand
+        FROM Produce p
+        LEFT JOIN Demand d ON d.produceID = p.produceID
+    """
+    if count is not None:
+        query += f" WHERE p.produceID IN ({', '.join(['%s'] * count)})"
+    return query + " ORDER BY p.produceID, d.forcastID"
+
+
+route_query("GET /f/demand/produce?ids=", bulk_demand_sql(3), (1, 2, 3))
+route_query("GET /f/demand/produce", bulk_demand_sql(), scan_ok=("p",))
+
+# Bulk demand prediction joined with current stock, in one query
+# Example: /f/demand/produce?ids=1,2,3  (omit ids for all produce)
+@farmer_routes.route("/demand/produce", methods=["GET"])
+def get_bulk_demand():
+    try:
+        ids = request.args.get("ids")
+        params = []
+
+        if ids:
+            try:
+                produce_ids = [int(i) for i in ids.split(",") if i.strip()]
+            except ValueError:
+                return jsonify({"error": "ids must be a comma-separated list of integers"}), 400
+            if not produce_ids:
+                return jsonify({"error": "ids must not be empty"}), 400
+            params.extend(produce_ids)
+
+        cursor = db.get_db().cursor()
+        cursor.execute(bulk_demand_sql(len(params) if ids else None), params)
+        rows = cursor.fetchall()
+        cursor.close()
+
+        return jsonify(rows), 200
+
+    except Error as e:
+        return jsonify({"error": str(e)}), 500
+
+FARMER_ORDERS_SQL = route_query(
+    "GET /f/order?farmerID=",
+    """
+    SELECT DISTINCT o.orderID, o.status, o.customerID, o.DriverID
+    FROM Orders o
+    JOIN OrderProduce op ON o.orderID = op.orderID
+    JOIN InventoryEntry i ON op.produceID = i.produceID
+    WHERE i.farmerID = %s
+    """,
+    (1,),
+)
+
 # List all orders containing this farmer's produce
 @farmer_routes.route("/order", methods=["GET"])
+@conditional("Orders", "OrderProduce", "InventoryEntry")
 def get_inventory():
     try:
         farmerID = request.args.get("farmerID")
@@ -306,17 +415,7 @@ def get_inventory():
 
         cursor = db.get_db().cursor()
 
-        cursor.execute(
-            """
-            SELECT o.orderID, o.status, o.customerID, o.driverID
-            FROM `Order` o
-            JOIN OrderProduce op ON o.orderID = op.orderID
-            JOIN InventoryEntry i ON op.produceID = i.produceID
-            WHERE i.farmerID = %s
-
-            """,
-            (farmerID,),
-        )
+        cursor.execute(FARMER_ORDERS_SQL, (farmerID,))
         recipe = cursor.fetchall()
         cursor.close()
 
@@ -328,16 +427,138 @@ def get_inventory():
     except Error as e:
         return jsonify({"error": str(e)}), 500
 
-# Return live inventory for the farmers
+# Return live inventory for the farmers (paginated)
+INVENTORY_LIST = route_list("GET /f/inventory?after=", ListQuery(
+    "InventoryEntry",
+    {c: c for c in ["inventoryID", "farmerID", "produceID", "dateUpdate", "quantity"]},
+    keys=["inventoryID"],
+), after=[10])
+
 @farmer_routes.route("/inventory", methods=["GET"])
+@conditional("InventoryEntry")
 def get_all_inventory():
     try:
         cursor = db.get_db().cursor()
-        cursor.execute("SELECT * FROM InventoryEntry;")
-        rows = cursor.fetchall()
+        result = page(INVENTORY_LIST, cursor)
         cursor.close()
 
-        return jsonify(rows), 200
+        return result
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# Every inventory entry with its produce, or only one farmer's
+def inventory_export_sql(one_farmer=False):
+    query = """
+        SELECT i.inventoryID, i.farmerID, i.produceID, p.name AS produceName,
+               i.dateUpdate, i.quantity, p.unit
+        FROM InventoryEntry i
+        LEFT JOIN Produce p ON p.produceID = i.produceID
+    """
+    if one_farmer:
+        query += " WHERE i.farmerID = %s"
+    return query + " ORDER BY i.inventoryID"
+
+
+route_query("GET /f/inventory/export", inventory_export_sql(), scan_ok=("i",))
+
+# Export every inventory entry (optionally one farmer's), streamed from a
+# server-side cursor so memory stays flat however large the table is.
+# ?format=ndjson gives one entry per line.
+@farmer_routes.route("/inventory/export", methods=["GET"])
+def export_inventory():
+    try:
+        params = []
+        farmer_id = request.args.get("farmerID", type=int)
+        if farmer_id is not None:
+            params.append(farmer_id)
+
+        return stream_query(inventory_export_sql(farmer_id is not None), params), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# The per-farmer parts must use the farmerID indexes; the low-stock list
+# reads all of Produce
+SUMMARY_SQL = route_query(
+    "GET /f/summary",
+    """
+    WITH mine AS (
+        SELECT produceID,
+               SUM(entries) AS entries,
+               SUM(quantity) AS quantity,
+               MAX(`day`) AS lastUpdate
+        FROM DailyFarmerInventory
+        WHERE farmerID = %s
+        GROUP BY produceID
+    ),
+    inventory AS (
+        SELECT CAST(COALESCE(SUM(entries), 0) AS SIGNED) AS entries,
+               CAST(COALESCE(SUM(quantity), 0) AS SIGNED) AS quantity,
+               MAX(lastUpdate) AS lastUpdate
+        FROM mine
+    ),
+    low AS (
+        SELECT produceID, name, quantityAvailable
+        FROM Produce
+        WHERE quantityAvailable < %s
+        ORDER BY quantityAvailable, produceID
+        LIMIT 5
+    ),
+    by_status AS (
+        SELECT dpo.status, CAST(SUM(dpo.orders) AS SIGNED) AS n
+        FROM DailyProduceOrders dpo
+        JOIN mine ON mine.produceID = dpo.produceID
+        GROUP BY dpo.status
+    ),
+    forecast AS (
+        SELECT CAST(COALESCE(SUM(d.predictedDemand), 0) AS DOUBLE) AS predicted
+        FROM Demand d
+        JOIN mine ON mine.produceID = d.produceID
+    )
+    SELECT
+        inventory.entries AS inventoryEntries,
+        inventory.quantity AS inventoryQuantity,
+        inventory.lastUpdate AS lastInventoryUpdate,
+        (SELECT COUNT(*) FROM Produce WHERE quantityAvailable < %s) AS lowStockCount,
+        (SELECT JSON_ARRAYAGG(JSON_OBJECT(
+            'produceID', produceID, 'name', name, 'quantityAvailable', quantityAvailable))
+         FROM low) AS lowStock,
+        (SELECT JSON_OBJECTAGG(status, n) FROM by_status) AS ordersByStatus,
+        (SELECT COUNT(*) FROM Notification
+          WHERE FarmerID = %s AND `timestamp` >= CURDATE() - INTERVAL %s DAY) AS recentNotifications,
+        forecast.predicted AS predictedDemand
+    FROM inventory CROSS JOIN forecast
+    """,
+    (1, 50, 50, 1, 7),
+    scan_ok=("Produce",),
+)
+
+# Everything the farmer home page shows, in one query.  Inventory and
+# order counts come from the daily rollups (backend/rollups), so they
+# lag by at most one rollup refresh; "orders" counts order lines for the
+# produce this farmer stocks.
+# Example: /f/summary?farmerID=1&lowStock=50&days=7
+@farmer_routes.route("/summary", methods=["GET"])
+@cached("Produce", "DailyFarmerInventory", "DailyProduceOrders", "Notification", "Demand", ttl="SUMMARY_CACHE_TTL")
+def get_summary():
+    try:
+        farmerID = request.args.get("farmerID", type=int)
+        if farmerID is None:
+            return jsonify({"error": "farmerID query parameter required"}), 400
+        low_stock = request.args.get("lowStock", 50, type=int)
+        days = request.args.get("days", 7, type=int)
+
+        cursor = db.get_db().cursor()
+        cursor.execute(SUMMARY_SQL, (farmerID, low_stock, low_stock, farmerID, days))
+        summary = cursor.fetchone()
+        cursor.close()
+
+        summary["lowStock"] = json.loads(summary["lowStock"] or "[]")
+        summary["ordersByStatus"] = json.loads(summary["ordersByStatus"] or "{}")
+        summary["days"] = days
+
+        return jsonify(summary), 200
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
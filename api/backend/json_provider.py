@@ -0,0 +1,144 @@
+#------------------------------------------------------------
+# App-wide JSON provider for database rows
+#------------------------------------------------------------
+# Rows from PyMySQL carry date, datetime, timedelta (TIME columns),
+# Decimal and bytes values.  Flask's default encoder turns dates into
+# "Wed, 01 Jan 2025 00:00:00 GMT" and rejects the rest, so routes used
+# to copy every row into a new dict with str()'d fields before calling
+# jsonify().  With RowJSONProvider installed, routes jsonify() the rows
+# straight from fetchall():
+#   date / datetime / time  -> ISO 8601, e.g. "2025-01-01",
+#                              "2025-01-01T08:30:00", "08:30:00"
+#   timedelta (TIME column) -> str(value), e.g. "9:00:00"
+#   Decimal                             -> number
+#   bytes                               -> UTF-8 text
+#   numpy scalar / array                -> number, bool or list
+#                                          (e.g. a pandas or scipy result)
+#
+# orjson is used when it is installed; otherwise the stdlib json module
+# produces the same output, only slower.  Keys are left in the order the
+# query selected them (Flask's default sorts them).
+import datetime
+import decimal
+import json
+
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib fallback below is used instead
+    orjson = None
+
+try:
+    import numpy as np
+except ImportError:  # only needed to encode numpy values
+    np = None
+
+
+def _decode_bytes(value):
+    return value.decode("utf-8", errors="replace")
+
+
+def _isoformat(value):
+    return value.isoformat()
+
+
+def _item(value):
+    return value.item()
+
+
+def _tolist(value):
+    return value.tolist()
+
+
+# Looked up by exact type first: encode_value runs once per value, so
+# it must not walk an isinstance() chain for every TIME column
+_ENCODERS = {
+    datetime.timedelta: str,
+    decimal.Decimal: float,
+    datetime.date: _isoformat,
+    datetime.datetime: _isoformat,
+    datetime.time: _isoformat,
+    bytes: _decode_bytes,
+    bytearray: _decode_bytes,
+}
+if np is not None:
+    _ENCODERS.update({
+        np.float64: _item,
+        np.float32: _item,
+        np.int64: _item,
+        np.int32: _item,
+        np.bool_: _item,
+        np.generic: _item,
+        np.ndarray: _tolist,
+    })
+
+
+def encode_value(value):
+    encoder = _ENCODERS.get(type(value))
+    if encoder is None:
+        for cls, candidate in _ENCODERS.items():
+            if isinstance(value, cls):
+                encoder = candidate
+                break
+        else:
+            raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+    return encoder(value)
+
+
+def dumps_stdlib(obj, indent=False, sort_keys=False):
+    return json.dumps(
+        obj,
+        default=encode_value,
+        ensure_ascii=False,
+        indent=2 if indent else None,
+        separators=None if indent else (",", ":"),
+        sort_keys=sort_keys,
+    ).encode("utf-8")
+
+
+if orjson is not None:
+    # orjson writes date/datetime/time and numpy values natively, in the
+    # same format as encode_value; the other types fall back to encode_value
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def dumps_orjson(obj, indent=False, sort_keys=False):
+        option = _ORJSON_OPTIONS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=encode_value, option=option)
+
+    dumps_bytes = dumps_orjson
+    _loads = orjson.loads
+else:
+    dumps_bytes = dumps_stdlib
+    _loads = json.loads
+
+
+class RowJSONProvider(JSONProvider):
+    """JSON provider that encodes database row values without per-row copies."""
+
+    backend = "orjson" if orjson is not None else "json"
+    sort_keys = False
+    compact = None
+    mimetype = "application/json"
+
+    def dumps(self, obj, **kwargs):
+        indent = bool(kwargs.get("indent"))
+        return dumps_bytes(obj, indent, kwargs.get("sort_keys", self.sort_keys)).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        return _loads(s)
+
+    # Same as Flask's: pretty-printed in debug mode unless compact is set
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        body = dumps_bytes(obj, indent, self.sort_keys) + b"\n"
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def init_app(app):
+    app.json = RowJSONProvider(app)
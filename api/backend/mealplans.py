@@ -0,0 +1,260 @@
+#------------------------------------------------------------
+# Weekly meal plans: read and save a customer's whole week at once
+#------------------------------------------------------------
+# A plan (mealPlan) is a week grid that repeats from startDate to
+# endDate; mealPlanRecipe holds one recipe per (day, mealType) slot
+# (migration 0008).  The Meal Plan page loads a week with
+#   GET /c/customers/<id>/mealplan?week=2025-03-03
+# and saves every slot in one request:
+#   PUT /c/customers/<id>/mealplan
+#   {"weekStart": "2025-03-03",
+#    "slots": [{"day": "Monday", "mealType": "Breakfast", "recipeID": 3}, ...]}
+# A PUT replaces the week: slots it leaves out (or sends with a null
+# recipeID) are cleared.  save_plan() diffs the request against the
+# stored slots, so unchanged slots cost no writes and a PUT that changes
+# nothing writes nothing.
+#
+# Saving a week changes that week and the ones after it, never earlier
+# ones: when the plan covering the week started before it, the plan is
+# closed the day before weekStart and a new plan carries on from
+# weekStart, so past weeks (and the forecast history built from them)
+# keep the grid they had.
+from datetime import date, timedelta
+
+from backend.migrations.explain_check import route_query
+
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+MEAL_TYPES = ["Breakfast", "Lunch", "Dinner"]
+
+
+class PlanError(ValueError):
+    """The plan payload is invalid."""
+
+
+def week_start(day=None):
+    day = day or date.today()
+    return day - timedelta(days=day.weekday())
+
+
+def _as_date(value):
+    return value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
+
+
+def _positive_int(value):
+    return isinstance(value, int) and not isinstance(value, bool) and value > 0
+
+
+# Normalize a PUT body into (week start, {(day, mealType): recipeID})
+def validate_plan(payload):
+    if not isinstance(payload, dict):
+        raise PlanError("body must be a JSON object")
+    try:
+        start = week_start(date.fromisoformat(str(payload["weekStart"])[:10])) \
+            if payload.get("weekStart") else week_start()
+    except ValueError:
+        raise PlanError("weekStart must be an ISO date")
+
+    slots = payload.get("slots")
+    if not isinstance(slots, list):
+        raise PlanError("slots must be a list")
+    if len(slots) > len(WEEKDAYS) * len(MEAL_TYPES):
+        raise PlanError(f"at most {len(WEEKDAYS) * len(MEAL_TYPES)} slots per week")
+
+    days = {d.lower(): d for d in WEEKDAYS}
+    meals = {m.lower(): m for m in MEAL_TYPES}
+    wanted = {}
+    for slot in slots:
+        if not isinstance(slot, dict):
+            raise PlanError("each slot must be an object")
+        day = days.get(str(slot.get("day", "")).lower())
+        meal = meals.get(str(slot.get("mealType", "")).lower())
+        if day is None or meal is None:
+            raise PlanError(f"unknown slot {slot.get('day')!r} / {slot.get('mealType')!r}")
+        if (day, meal) in wanted:
+            raise PlanError(f"slot {day} / {meal} given twice")
+        recipe_id = slot.get("recipeID")
+        if recipe_id is not None and not _positive_int(recipe_id):
+            raise PlanError("recipeID must be a positive integer or null")
+        wanted[(day, meal)] = recipe_id
+    return start, {key: rid for key, rid in wanted.items() if rid is not None}
+
+
+PLAN_SQL = route_query(
+    "PUT /c/customers/<id>/mealplan",
+    """
+    SELECT mealPlanId AS mealPlanID, startDate, endDate
+    FROM mealPlan
+    WHERE customerID = %s
+      AND startDate <= %s
+      AND (endDate IS NULL OR endDate >= %s)
+    ORDER BY startDate DESC, mealPlanId DESC
+    LIMIT 1
+    """,
+    (5, "2025-03-09", "2025-03-03"),
+)
+
+WEEK_SQL = route_query(
+    "GET /c/customers/<id>/mealplan",
+    f"""
+    SELECT mp.mealPlanID, mp.startDate, mp.endDate,
+           mpr.day, mpr.mealType, mpr.recipeID, r.name
+    FROM ({PLAN_SQL}) mp
+    LEFT JOIN mealPlanRecipe mpr ON mpr.mealPlanID = mp.mealPlanID
+    LEFT JOIN Recipe r ON r.recipeID = mpr.recipeID
+    """,
+    (5, "2025-03-09", "2025-03-03"),
+)
+
+PLAN_SLOTS_SQL = route_query(
+    "PUT /c/customers/<id>/mealplan",
+    "SELECT day, mealType, recipeID FROM mealPlanRecipe WHERE mealPlanID = %s FOR UPDATE",
+    (3,),
+)
+
+NEXT_PLAN_SQL = route_query(
+    "PUT /c/customers/<id>/mealplan",
+    "SELECT COALESCE(MAX(mealPlanId), 0) AS top FROM mealPlan FOR UPDATE",
+)
+
+
+# The customer's plan covering the week, newest first
+def find_plan(cursor, customer_id, start, lock=False):
+    cursor.execute(
+        PLAN_SQL + (" FOR UPDATE" if lock else ""),
+        (customer_id, start + timedelta(days=6), start),
+    )
+    return cursor.fetchone()
+
+
+# Week grid for GET: the plan and its slots with recipe names, one query
+def load_week(cursor, customer_id, start):
+    cursor.execute(WEEK_SQL, (customer_id, start + timedelta(days=6), start))
+    rows = cursor.fetchall()
+    plan = rows[0] if rows else {}
+    slots = []
+    for row in rows:
+        day = (row["day"] or "").capitalize()
+        if row["recipeID"] is None or day not in WEEKDAYS:
+            continue
+        slots.append({
+            "day": day,
+            "mealType": row["mealType"].capitalize(),
+            "date": str(start + timedelta(days=WEEKDAYS.index(day))),
+            "recipeID": row["recipeID"],
+            "name": row["name"],
+        })
+    slot_order = {meal: i for i, meal in enumerate(MEAL_TYPES)}
+    slots.sort(key=lambda s: (WEEKDAYS.index(s["day"]), slot_order.get(s["mealType"], len(MEAL_TYPES))))
+    return {
+        "customerID": customer_id,
+        "weekStart": str(start),
+        "mealPlanID": plan.get("mealPlanID"),
+        "startDate": str(plan["startDate"]) if plan.get("startDate") else None,
+        "endDate": str(plan["endDate"]) if plan.get("endDate") else None,
+        "slots": slots,
+    }
+
+
+# (inserts, updates, deletes) that turn `current` into `wanted`
+def diff_slots(current, wanted):
+    inserts = [(key, rid) for key, rid in wanted.items() if key not in current]
+    updates = [(key, rid) for key, rid in wanted.items() if key in current and current[key] != rid]
+    deletes = [key for key in current if key not in wanted]
+    return inserts, updates, deletes
+
+
+# Start of the customer's next plan after `start`, if one exists
+def next_plan_start(cursor, customer_id, start):
+    cursor.execute(
+        "SELECT MIN(startDate) AS nextStart FROM mealPlan WHERE customerID = %s AND startDate > %s",
+        (customer_id, start),
+    )
+    row = cursor.fetchone()
+    return row["nextStart"] if row else None
+
+
+# Insert a plan running from `start` to `end` (None = open-ended)
+def create_plan(cursor, customer_id, start, end):
+    # mealPlanId is not AUTO_INCREMENT; the lock makes concurrent
+    # creates take turns
+    cursor.execute(NEXT_PLAN_SQL)
+    plan_id = cursor.fetchone()["top"] + 1
+    cursor.execute(
+        "INSERT INTO mealPlan (mealPlanId, startDate, endDate, customerID) VALUES (%s, %s, %s, %s)",
+        (plan_id, start, end, customer_id),
+    )
+    return plan_id
+
+
+# Save the week in the caller's transaction; returns what changed.  The
+# caller commits only when result["changed"] is true.
+def save_plan(cursor, customer_id, start, wanted):
+    cursor.execute("SELECT customerID FROM Customer WHERE customerID = %s", (customer_id,))
+    if not cursor.fetchone():
+        raise LookupError("Customer not found")
+
+    plan = find_plan(cursor, customer_id, start, lock=True)
+    current = {}
+    if plan:
+        cursor.execute(PLAN_SLOTS_SQL, (plan["mealPlanID"],))
+        current = {
+            (row["day"].capitalize(), row["mealType"].capitalize()): row["recipeID"]
+            for row in cursor.fetchall()
+        }
+    inserts, updates, deletes = diff_slots(current, wanted)
+    result = {
+        "customerID": customer_id,
+        "weekStart": str(start),
+        "mealPlanID": plan["mealPlanID"] if plan else None,
+        "inserted": len(inserts),
+        "updated": len(updates),
+        "deleted": len(deletes),
+        "unchanged": len(wanted) - len(inserts) - len(updates),
+        "changed": bool(inserts or updates or deletes),
+        "splitFrom": None,
+    }
+    if not result["changed"]:
+        return result
+
+    recipes = sorted({rid for _, rid in inserts + updates})
+    if recipes:
+        marks = ", ".join("%s" for _ in recipes)
+        cursor.execute(f"SELECT recipeID FROM Recipe WHERE recipeID IN ({marks})", recipes)
+        missing = set(recipes) - {row["recipeID"] for row in cursor.fetchall()}
+        if missing:
+            raise PlanError(f"unknown recipeID {', '.join(str(r) for r in sorted(missing))}")
+
+    if not plan:
+        # Stop where a later plan takes over, so weeks never have two plans
+        following = next_plan_start(cursor, customer_id, start)
+        end = _as_date(following) - timedelta(days=1) if following else None
+        result["mealPlanID"] = create_plan(cursor, customer_id, start, end)
+    elif _as_date(plan["startDate"]) < start:
+        # Keep the earlier weeks as they were: close the plan before this
+        # week and continue from it with a copy of its grid, then edit that
+        cursor.execute(
+            "UPDATE mealPlan SET endDate = %s WHERE mealPlanId = %s",
+            (start - timedelta(days=1), plan["mealPlanID"]),
+        )
+        result["mealPlanID"] = create_plan(cursor, customer_id, start, plan["endDate"])
+        result["splitFrom"] = plan["mealPlanID"]
+        inserts = list(wanted.items())
+        updates = deletes = []
+
+    plan_id = result["mealPlanID"]
+    if deletes:
+        cursor.executemany(
+            "DELETE FROM mealPlanRecipe WHERE mealPlanID = %s AND day = %s AND mealType = %s",
+            [(plan_id, day, meal) for day, meal in deletes],
+        )
+    if updates:
+        cursor.executemany(
+            "UPDATE mealPlanRecipe SET recipeID = %s WHERE mealPlanID = %s AND day = %s AND mealType = %s",
+            [(rid, plan_id, day, meal) for (day, meal), rid in updates],
+        )
+    if inserts:
+        cursor.executemany(
+            "INSERT INTO mealPlanRecipe (mealPlanID, recipeID, day, mealType) VALUES (%s, %s, %s, %s)",
+            [(plan_id, rid, day, meal) for (day, meal), rid in inserts],
+        )
+    return result
@@ -0,0 +1,126 @@
+#------------------------------------------------------------
+# Versioned schema migrations
+#------------------------------------------------------------
+# The SQL in database-files/ only runs when the db container is first
+# created.  Changes to an existing database go here instead, as numbered
+# files in versions/ (e.g. 0001_secondary_indexes.sql).  Each file is
+# applied once, in order, and recorded in the schema_migrations table.
+#
+# Run them with:
+#   flask --app backend_app db-migrate
+# and check that no route query scans a whole table with:
+#   flask --app backend_app db-check-indexes
+import os
+import re
+
+import click
+
+VERSIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "versions")
+_FILENAME = re.compile(r"^(\d+)_([\w-]+)\.sql$")
+
+
+# Return [(version, name, path)] for every migration file, oldest first
+def discover():
+    migrations = []
+    for filename in os.listdir(VERSIONS_DIR):
+        match = _FILENAME.match(filename)
+        if match:
+            migrations.append(
+                (int(match.group(1)), match.group(2), os.path.join(VERSIONS_DIR, filename))
+            )
+    return sorted(migrations)
+
+
+# Split a migration file into statements, dropping `--` comments
+def split_statements(sql):
+    lines = [line for line in sql.splitlines() if not line.strip().startswith("--")]
+    return [stmt.strip() for stmt in "\n".join(lines).split(";") if stmt.strip()]
+
+
+def ensure_version_table(cursor):
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY,
+            name VARCHAR(200) NOT NULL,
+            appliedAt DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+
+
+def applied_versions(cursor):
+    ensure_version_table(cursor)
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {row["version"] for row in cursor.fetchall()}
+
+
+def pending(conn):
+    cursor = conn.cursor()
+    done = applied_versions(cursor)
+    cursor.close()
+    return [m for m in discover() if m[0] not in done]
+
+
+# Apply every pending migration; returns the list of versions applied
+def upgrade(conn, log=print):
+    applied = []
+    for version, name, path in pending(conn):
+        with open(path) as f:
+            statements = split_statements(f.read())
+
+        cursor = conn.cursor()
+        try:
+            # MySQL commits DDL implicitly, so a failed migration stops
+            # here and is not recorded; fix it and re-run.
+            for statement in statements:
+                cursor.execute(statement)
+            cursor.execute(
+                "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                (version, name),
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+        log(f"applied migration {version:04d}_{name}")
+        applied.append(version)
+    return applied
+
+
+# Register the CLI commands (and optionally migrate on startup)
+def init_app(app):
+    from backend.db_connection import db
+    from backend.migrations import explain_check
+
+    @app.cli.command("db-migrate")
+    def migrate_command():
+        """Apply pending schema migrations."""
+        conn = db.connect()
+        try:
+            applied = upgrade(conn, log=click.echo)
+        finally:
+            db.release(conn)
+        if not applied:
+            click.echo("database is up to date")
+
+    @app.cli.command("db-check-indexes")
+    def check_indexes_command():
+        """EXPLAIN every route query and fail on full table scans."""
+        conn = db.connect()
+        try:
+            failures = explain_check.run(conn, log=click.echo)
+        finally:
+            db.release(conn)
+        if failures:
+            raise SystemExit(1)
+
+    if app.config.get("DB_AUTO_MIGRATE"):
+        conn = db.connect()
+        try:
+            upgrade(conn, log=app.logger.info)
+        finally:
+            db.release(conn)
@@ -0,0 +1,68 @@
+#------------------------------------------------------------
+# EXPLAIN every route query and flag full table scans
+#------------------------------------------------------------
+# Modules register the SQL their routes run where it is defined, with
+# representative parameters, so the check always sees the real query:
+#   ORDERS_SQL = route_query("GET /d/driver/<id>/order", """SELECT ...""", (1,))
+#   PRODUCE_LIST = route_list("GET /f/produce?after=", ListQuery(...), after=[10])
+# A ListQuery is checked as a later page (after=<cursor>), which must
+# seek rather than scan.  A query fails the check if MySQL plans a full
+# scan (access type ALL) on any table that is not listed in `scan_ok`;
+# endpoints that intentionally read a whole table say so there.
+# Every route module is imported by the app before the CLI runs.
+from backend.pagination import encode_cursor
+
+ROUTE_QUERIES = []
+
+
+# Register a route's SQL and return it unchanged
+def route_query(route, sql, params=(), scan_ok=()):
+    ROUTE_QUERIES.append({"route": route, "sql": sql, "params": tuple(params), "scan_ok": tuple(scan_ok)})
+    return sql
+
+
+# Register a list route's ListQuery, checked as the page after `after`
+def route_list(route, query, after, params=()):
+    ROUTE_QUERIES.append({"route": route, "query": query, "after": list(after), "params": tuple(params)})
+    return query
+
+
+# (sql, params) for an entry; ListQuery SQL needs an app context
+def _statement(entry):
+    if "query" in entry:
+        sql, params, _, _ = entry["query"].build({"after": encode_cursor(entry["after"])}, entry["params"])
+        return sql, params
+    return entry["sql"], entry["params"]
+
+
+# Returns the list of full-scan rows for one query
+def full_scans(cursor, entry):
+    sql, params = _statement(entry)
+    cursor.execute("EXPLAIN " + sql, params)
+    scan_ok = set(entry.get("scan_ok", ()))
+    # <derivedN> rows are materialized CTEs; their base tables have rows of their own
+    return [
+        row for row in cursor.fetchall()
+        if row.get("type") == "ALL" and row.get("table") not in scan_ok
+        and not str(row.get("table")).startswith("<")
+    ]
+
+
+# EXPLAIN every route query; returns the routes that failed
+def run(conn, queries=ROUTE_QUERIES, log=print):
+    failures = []
+    cursor = conn.cursor()
+    try:
+        for entry in queries:
+            scans = full_scans(cursor, entry)
+            if scans:
+                tables = ", ".join(row["table"] for row in scans)
+                log(f"FAIL  {entry['route']}: full table scan on {tables}")
+                failures.append(entry["route"])
+            else:
+                log(f"ok    {entry['route']}")
+    finally:
+        cursor.close()
+
+    log(f"{len(queries) - len(failures)}/{len(queries)} route queries use an index")
+    return failures
@@ -0,0 +1,34 @@
+-- Secondary indexes for every foreign-key lookup path used by the API.
+-- Each index is matched to the WHERE / ORDER BY of the route that uses it.
+
+-- driver_routes.get_all_deliveries / update_order_status:
+--   WHERE DriverID = ? ORDER BY CASE status ..., scheduledTime
+CREATE INDEX idx_orders_driver_status_time ON Orders (DriverID, `status`, scheduledTime);
+
+-- customer order history lookups
+CREATE INDEX idx_orders_customer_date ON Orders (customerID, orderDate);
+
+-- farmer_routes.get_farmer_inventory: WHERE farmerID = ?
+--   covering (inventoryID rides along as the clustered key)
+CREATE INDEX idx_inventory_farmer ON InventoryEntry (farmerID, produceID, dateUpdate, quantity);
+
+-- farmer_routes.get_inventory: JOIN InventoryEntry ON produceID WHERE farmerID = ?
+CREATE INDEX idx_inventory_produce_farmer ON InventoryEntry (produceID, farmerID);
+
+-- customers_routes.get_menu_notifications: WHERE customerID = ? ORDER BY timestamp
+CREATE INDEX idx_notification_customer_time ON Notification (customerID, `timestamp`);
+
+-- driver_routes.get_message: WHERE DriverID = ? ORDER BY timestamp
+CREATE INDEX idx_deliverymessage_driver_time ON DeliveryMessage (DriverID, `timestamp`);
+
+-- admin_routes.get_customer_message_history: WHERE customerID = ?
+CREATE INDEX idx_customermessage_customer_time ON CustomerMessage (customerID, `timestamp`);
+
+-- driver_routes.get_driver_route: WHERE driverID = ?
+CREATE INDEX idx_traffic_driver_time ON Traffic (driverID, `timestamp`);
+
+-- driver_routes.get_availability / create_driver_availability: WHERE DriverID = ? [AND date = ?]
+CREATE INDEX idx_availability_driver_date ON DriverAvailability (DriverID, `date`);
+
+-- farmer_routes.get_demand / get_bulk_demand: WHERE produceID = ? (covering)
+CREATE INDEX idx_demand_produce ON Demand (produceID, forcastID, predictedDemand);
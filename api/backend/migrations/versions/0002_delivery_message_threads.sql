@@ -0,0 +1,11 @@
+-- Driver <-> admin chat moves onto DeliveryMessage (was driver_messages.json).
+--   messageID   becomes AUTO_INCREMENT, so it doubles as the polling cursor
+--   timestamp   DATE -> DATETIME, so messages on the same day keep their order
+--   sender      who wrote the row: 'driver' or 'admin'
+ALTER TABLE DeliveryMessage
+    MODIFY messageID INT NOT NULL AUTO_INCREMENT,
+    MODIFY `timestamp` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    ADD COLUMN sender VARCHAR(20) NOT NULL DEFAULT 'driver';
+
+-- driver_routes.get_message: WHERE DriverID = ? AND messageID > ? ORDER BY messageID
+CREATE INDEX idx_deliverymessage_driver_id ON DeliveryMessage (DriverID, messageID);
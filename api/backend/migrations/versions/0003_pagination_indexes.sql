@@ -0,0 +1,9 @@
+-- Sort keys for the keyset-paginated recipe lists (backend/pagination.py).
+-- InnoDB appends the primary key, so these cover (name, recipeID) and
+-- (popularityScore, recipeID).
+
+-- admin_routes.get_all_recipes: ORDER BY name, recipeID
+CREATE INDEX idx_recipe_name ON Recipe (name);
+
+-- farmer_routes.get_recipes: ORDER BY popularityScore DESC, recipeID DESC
+CREATE INDEX idx_recipe_popularity ON Recipe (popularityScore);
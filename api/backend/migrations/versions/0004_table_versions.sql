@@ -0,0 +1,16 @@
+-- Per-table change counters for conditional GET (backend/conditional.py).
+-- Write routes bump a table's row in the same transaction as their
+-- change; read routes turn the versions into an ETag / Last-Modified
+-- and answer If-None-Match with 304 before running their SELECT.
+CREATE TABLE IF NOT EXISTS TableVersion (
+    tableName VARCHAR(64) PRIMARY KEY,
+    version BIGINT UNSIGNED NOT NULL DEFAULT 0,
+    updatedAt DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT IGNORE INTO TableVersion (tableName) VALUES
+    ('Customer'), ('CustomerMessage'), ('DeliveryIssue'), ('DeliveryMessage'),
+    ('Demand'), ('Driver'), ('DriverAvailability'), ('Farmer'), ('Ingredient'),
+    ('InventoryEntry'), ('Notification'), ('OrderIngredient'), ('OrderProduce'),
+    ('Orders'), ('Produce'), ('Recipe'), ('RecipeProduce'), ('Recipe_WeeklyMenu'),
+    ('Traffic'), ('mealPlan'), ('mealPlanRecipe'), ('weeklyMenu'), ('WorldNGOs');
@@ -0,0 +1,51 @@
+-- Daily aggregate tables maintained by backend/rollups.  Dashboards and
+-- demand features read these instead of scanning Orders, OrderProduce
+-- and InventoryEntry.  RollupWatermark records, per rollup, the latest
+-- source day already folded in (highWater) and the earliest day a write
+-- has changed since the last refresh (dirtyFrom); a refresh rebuilds
+-- only the days from there on.
+CREATE TABLE IF NOT EXISTS DailyOrderStatus (
+    `day` DATE NOT NULL,
+    `status` VARCHAR(20) NOT NULL,
+    orders INT NOT NULL,
+    quantity INT NOT NULL,
+    PRIMARY KEY (`day`, `status`)
+);
+
+CREATE TABLE IF NOT EXISTS DailyProduceOrders (
+    `day` DATE NOT NULL,
+    produceID INT NOT NULL,
+    `status` VARCHAR(20) NOT NULL,
+    orders INT NOT NULL,
+    quantity INT NOT NULL,
+    PRIMARY KEY (`day`, produceID, `status`),
+    INDEX idx_daily_produce_orders_produce (produceID, `day`)
+);
+
+CREATE TABLE IF NOT EXISTS DailyFarmerInventory (
+    `day` DATE NOT NULL,
+    farmerID INT NOT NULL,
+    produceID INT NOT NULL,
+    entries INT NOT NULL,
+    quantity INT NOT NULL,
+    PRIMARY KEY (`day`, farmerID, produceID),
+    INDEX idx_daily_farmer_inventory_farmer (farmerID, `day`)
+);
+
+CREATE TABLE IF NOT EXISTS RollupWatermark (
+    rollupName VARCHAR(64) PRIMARY KEY,
+    highWater DATE,
+    dirtyFrom DATE,
+    refreshedAt DATETIME,
+    rowsWritten INT NOT NULL DEFAULT 0
+);
+
+-- rollups.refresh: WHERE orderDate >= ? / WHERE dateUpdate >= ?, so an
+-- incremental refresh reads only its window of the source tables
+CREATE INDEX idx_orders_order_date ON Orders (orderDate, `status`, quantityOrdered);
+CREATE INDEX idx_inventory_date ON InventoryEntry (dateUpdate, farmerID, produceID, quantity);
+
+INSERT IGNORE INTO RollupWatermark (rollupName) VALUES ('orders'), ('inventory');
+
+INSERT IGNORE INTO TableVersion (tableName) VALUES
+    ('DailyOrderStatus'), ('DailyProduceOrders'), ('DailyFarmerInventory');
@@ -0,0 +1,32 @@
+-- Multi-line orders for backend/orders.py.  An order's lines live in
+-- OrderProduce / OrderIngredient / OrderRecipe, so the single-line
+-- columns on Orders become optional, and each line carries its quantity.
+
+-- Orders created through POST /c/orders keep the first line here for
+-- older readers; orders without produce or ingredients leave them NULL
+ALTER TABLE Orders
+    MODIFY produceID INT NULL,
+    MODIFY ingredientID INT NULL;
+
+ALTER TABLE OrderProduce ADD COLUMN quantityOrdered INT NOT NULL DEFAULT 1;
+ALTER TABLE OrderIngredient ADD COLUMN quantityOrdered INT NOT NULL DEFAULT 1;
+
+-- Existing lines had only the order-level quantity; carry it over
+UPDATE OrderProduce op JOIN Orders o ON o.orderID = op.orderID
+SET op.quantityOrdered = o.quantityOrdered;
+UPDATE OrderIngredient oi JOIN Orders o ON o.orderID = oi.orderID
+SET oi.quantityOrdered = o.quantityOrdered;
+
+-- DailyProduceOrders now sums line quantities: rebuild it in full on the
+-- next rollups refresh
+UPDATE RollupWatermark SET highWater = NULL WHERE rollupName = 'orders';
+
+CREATE TABLE IF NOT EXISTS OrderRecipe (
+    orderID INT NOT NULL,
+    recipeID INT NOT NULL,
+    PRIMARY KEY (orderID, recipeID),
+    FOREIGN KEY (orderID) REFERENCES Orders(orderID) ON DELETE CASCADE,
+    FOREIGN KEY (recipeID) REFERENCES Recipe(recipeID)
+);
+
+INSERT IGNORE INTO TableVersion (tableName) VALUES ('OrderRecipe');
@@ -0,0 +1,19 @@
+-- Weekly subscription orders (backend/subscriptions.py).  RecipeProduce
+-- gains how much of each produce one serving of the recipe uses, and
+-- SubscriptionOrder records which (customer, delivery date) a run has
+-- already ordered, so re-running a week only fills in what is missing.
+ALTER TABLE RecipeProduce ADD COLUMN amountNeeded INT NOT NULL DEFAULT 1;
+
+CREATE TABLE IF NOT EXISTS SubscriptionOrder (
+    customerID INT NOT NULL,
+    deliveryDate DATE NOT NULL,
+    orderID INT NOT NULL,
+    createdAt DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (customerID, deliveryDate),
+    FOREIGN KEY (orderID) REFERENCES Orders(orderID) ON DELETE CASCADE
+);
+
+-- subscriptions.active_customers: plans overlapping the week, by customer
+CREATE INDEX idx_mealplan_customer_dates ON mealPlan (customerID, startDate, endDate);
+
+INSERT IGNORE INTO TableVersion (tableName) VALUES ('SubscriptionOrder');
@@ -0,0 +1,40 @@
+-- Meal plans saved from the Meal Plan page (PUT /c/customers/<id>/mealplan).
+-- A plan is a week grid: one recipe per (day, mealType) slot, so that
+-- becomes mealPlanRecipe's key and a slot can be updated in place.
+
+-- Older rows may have no meal type; file them under Dinner
+UPDATE mealPlanRecipe SET mealType = 'Dinner' WHERE mealType IS NULL;
+
+-- Where a slot now holds several recipes, keep the lowest recipeID.
+-- The others are copied to mealPlanRecipeDropped first, so they can be
+-- looked up or re-added to another slot by hand.
+CREATE TABLE IF NOT EXISTS mealPlanRecipeDropped (
+    mealPlanID INT NOT NULL,
+    recipeID INT NOT NULL,
+    day VARCHAR(20) NOT NULL,
+    mealType VARCHAR(20) NOT NULL,
+    droppedAt DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (mealPlanID, recipeID, day)
+);
+
+INSERT IGNORE INTO mealPlanRecipeDropped (mealPlanID, recipeID, day, mealType)
+SELECT DISTINCT a.mealPlanID, a.recipeID, a.day, a.mealType
+FROM mealPlanRecipe a
+JOIN mealPlanRecipe b
+  ON b.mealPlanID = a.mealPlanID
+ AND b.day = a.day
+ AND b.mealType = a.mealType
+ AND b.recipeID < a.recipeID;
+
+DELETE a FROM mealPlanRecipe a
+JOIN mealPlanRecipe b
+  ON b.mealPlanID = a.mealPlanID
+ AND b.day = a.day
+ AND b.mealType = a.mealType
+ AND b.recipeID < a.recipeID;
+
+ALTER TABLE mealPlanRecipe
+    MODIFY mealType VARCHAR(20) NOT NULL,
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (mealPlanID, day, mealType);
+
@@ -0,0 +1,9 @@
+-- Lookup paths for the fleet-wide dispatch (backend/routing/dispatch.py).
+-- Both of its reads filter on the day alone, which the existing
+-- per-driver indexes (DriverID first) cannot serve.
+
+-- dispatch_day: WHERE scheduledTime = ? AND status IN (...) ORDER BY orderID
+CREATE INDEX idx_orders_scheduled_status ON Orders (scheduledTime, `status`);
+
+-- dispatch_day: WHERE `date` = ? AND isAvailable ORDER BY DriverID
+CREATE INDEX idx_availability_date ON DriverAvailability (`date`, isAvailable, DriverID);
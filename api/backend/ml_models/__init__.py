@@ -0,0 +1,111 @@
+#------------------------------------------------------------
+# Demand forecasting jobs and the in-memory model cache
+#------------------------------------------------------------
+# Retrains the produce demand model and rewrites the Demand table.
+# Run it as a batch job (e.g. from cron):
+#   flask --app backend_app forecast-demand
+# or set FORECAST_REFRESH_HOURS to have the API refresh it on a timer.
+#
+# Trained models are published to a versioned registry (registry.py).
+# create_app() loads the current version once; routes read it with
+# models.get(MODEL_NAME), and newly published versions are swapped in
+# without restarting the API.
+import threading
+
+import click
+
+from backend.ml_models.forecasting import (
+    MODEL_NAME,
+    DemandForecaster,
+    refresh_demand,
+    train_from_db,
+)
+from backend.ml_models.registry import ChecksumError, ModelCache, ModelRegistry
+
+__all__ = [
+    "MODEL_NAME",
+    "ChecksumError",
+    "DemandForecaster",
+    "ModelCache",
+    "ModelRegistry",
+    "init_app",
+    "models",
+    "refresh_demand",
+    "train_from_db",
+]
+
+# Shared by every request in this process
+models = ModelCache()
+
+_scheduler = None
+
+
+# Bring the order rollups up to date, train, publish the model and
+# refresh Demand on a pooled connection, then swap the new version into
+# this process straight away
+def run_refresh(app):
+    from backend import rollups
+    from backend.db_connection import db
+
+    conn = db.connect()
+    try:
+        rollups.refresh(conn, "orders", app.config.get("ROLLUP_LOOKBACK_DAYS", 7))
+        model, written = refresh_demand(conn, models.registry)
+    except Exception:
+        db.release(conn, discard=True)
+        raise
+    db.release(conn)
+    models.refresh()
+    return model, written
+
+
+# Daemon thread that refreshes Demand every `hours`
+def _start_scheduler(app, hours):
+    global _scheduler
+    if _scheduler is not None:
+        return
+    stop = threading.Event()
+
+    def loop():
+        while not stop.wait(hours * 3600):
+            try:
+                _, written = run_refresh(app)
+                app.logger.info(f"forecast: refreshed {written} Demand rows")
+            except Exception as e:
+                app.logger.error(f"forecast: refresh failed: {e}")
+
+    _scheduler = threading.Thread(target=loop, name="demand-forecast", daemon=True)
+    _scheduler.stop = stop
+    _scheduler.start()
+
+
+def init_app(app):
+    models.configure(
+        ModelRegistry(app.config["MODEL_REGISTRY_DIR"]),
+        {MODEL_NAME: DemandForecaster.from_artifact},
+    )
+
+    # Warm load; a missing or corrupt artifact must not stop the API
+    try:
+        loaded = models.refresh()
+        if loaded:
+            app.logger.info(f"models: loaded {loaded} in {models.load_ms}ms")
+    except Exception as e:
+        app.logger.error(f"models: warm load failed: {e}")
+    models.watch(app.config.get("MODEL_WATCH_SECONDS") or 0, log=app.logger.info)
+
+    @app.cli.command("forecast-demand")
+    def forecast_command():
+        """Retrain the demand model and rewrite the Demand table."""
+        model, written = run_refresh(app)
+        version = models.registry.current_version(MODEL_NAME)
+        click.echo(
+            f"trained on {len(model.produce_ids)} produce items, "
+            f"published {MODEL_NAME} v{version}, wrote {written} Demand rows"
+        )
+
+    # The refresh replaces Demand in one transaction, so a second
+    # scheduler (e.g. the debug reloader's watcher process) is harmless.
+    hours = app.config.get("FORECAST_REFRESH_HOURS") or 0
+    if hours > 0:
+        _start_scheduler(app, hours)
@@ -0,0 +1,255 @@
+#------------------------------------------------------------
+# Produce demand forecasting
+#------------------------------------------------------------
+# Demand per produce item is derived from order and meal-planning
+# history rather than the hand-seeded Demand rows:
+#   - orders:     OrderProduce x Orders (orderDate, quantityOrdered), read
+#                 per day from the DailyProduceOrders rollup
+#   - meal plans: mealPlanRecipe x RecipeProduce, once a week from
+#                 mealPlan.startDate to endDate (or today, if open-ended)
+#   - menus:      Recipe_WeeklyMenu x RecipeProduce by weekNumber, used
+#                 as a seasonal signal
+#
+# The model is a per-produce seasonal baseline:
+#   weekly demand ~ level[p] * seasonal[p, month]
+# `level` is an exponentially weighted mean of the weekly history.
+# `seasonal` holds monthly indices, shrunk toward 1 where history is
+# thin and nudged by how often menus feature the produce that month.
+# Training and inference are plain numpy array operations across all
+# produce at once.
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from backend.conditional import bump
+
+HORIZON_WEEKS = 13          # "Predicted (3 months)" on the farmer page
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+
+class DemandForecaster:
+    """Per-produce level and monthly seasonal indices."""
+
+    def __init__(self, produce_ids, level, seasonal, trained_on=None, horizon_weeks=HORIZON_WEEKS):
+        self.produce_ids = np.asarray(produce_ids, dtype=np.int64)
+        self.level = np.asarray(level, dtype=np.float64)
+        self.seasonal = np.asarray(seasonal, dtype=np.float64)   # (P, 12)
+        self.trained_on = trained_on or date.today().isoformat()
+        self.horizon_weeks = horizon_weeks
+
+    # Total demand over the next `horizon_weeks` for every produce item
+    def predict(self, start=None, horizon_weeks=None):
+        start = start or date.today()
+        weeks = horizon_weeks or self.horizon_weeks
+        months = np.array([(start + timedelta(weeks=w)).month - 1 for w in range(weeks)])
+        return (self.level[:, None] * self.seasonal[:, months]).sum(axis=1)
+
+    # Predicted demand for one produce item, from a per-day cache of the
+    # all-produce prediction.  Returns None for unknown produce.
+    def predict_one(self, produceID, start=None):
+        start = start or date.today()
+        cached = getattr(self, "_prediction", None)
+        if cached is None or cached[0] != start:
+            index = {int(pid): i for i, pid in enumerate(self.produce_ids)}
+            cached = self._prediction = (start, self.predict(start), index)
+        i = cached[2].get(int(produceID))
+        return None if i is None else float(cached[1][i])
+
+    # Registry artifact: arrays plus JSON metadata
+    def to_artifact(self):
+        arrays = {"produce_ids": self.produce_ids, "level": self.level, "seasonal": self.seasonal}
+        meta = {"trained_on": self.trained_on, "horizon_weeks": self.horizon_weeks}
+        return arrays, meta
+
+    @classmethod
+    def from_artifact(cls, manifest, arrays):
+        return cls(arrays["produce_ids"], arrays["level"], arrays["seasonal"], **manifest["meta"])
+
+
+#------------------------------------------------------------
+# Feature extraction
+#------------------------------------------------------------
+def _fetch(cursor, sql):
+    cursor.execute(sql)
+    return pd.DataFrame(cursor.fetchall())
+
+
+# Pull the raw demand signals out of MySQL as DataFrames
+def load_history(conn):
+    cursor = conn.cursor()
+    produce = _fetch(cursor, "SELECT produceID FROM Produce ORDER BY produceID")
+    orders = _fetch(
+        cursor,
+        """
+        SELECT `day`, produceID, SUM(quantity) AS qty
+        FROM DailyProduceOrders
+        WHERE status <> 'cancelled'
+        GROUP BY `day`, produceID
+        """,
+    )
+    plans = _fetch(
+        cursor,
+        """
+        SELECT mp.startDate, mp.endDate, mpr.day AS weekday, rp.produceID, COUNT(*) AS qty
+        FROM mealPlanRecipe mpr
+        JOIN mealPlan mp ON mp.mealPlanId = mpr.mealPlanID
+        JOIN RecipeProduce rp ON rp.recipeID = mpr.recipeID
+        GROUP BY mp.startDate, mp.endDate, mpr.day, rp.produceID
+        """,
+    )
+    menus = _fetch(
+        cursor,
+        """
+        SELECT wm.weekNumber, rp.produceID, COUNT(*) AS recipes
+        FROM Recipe_WeeklyMenu rwm
+        JOIN weeklyMenu wm ON wm.menuID = rwm.menuID
+        JOIN RecipeProduce rp ON rp.recipeID = rwm.recipeID
+        GROUP BY wm.weekNumber, rp.produceID
+        """,
+    )
+    cursor.close()
+    produce_ids = produce["produceID"].to_numpy() if not produce.empty else np.array([], dtype=np.int64)
+    return produce_ids, orders, plans, menus
+
+
+# Meal-plan slots are stored by weekday name and repeat every week the
+# plan runs.  Date each one on every matching weekday from the plan's
+# start date to its end date; open-ended plans (and history) stop at
+# `until`, today by default.
+def _date_plan_slots(plans, until=None):
+    if plans.empty:
+        return pd.DataFrame(columns=["day", "produceID", "qty"])
+    until = pd.Timestamp(until or date.today())
+    start = pd.to_datetime(plans["startDate"])
+    target = plans["weekday"].str.lower().map({d: i for i, d in enumerate(WEEKDAYS)})
+    offset = (target - start.dt.weekday) % 7
+    first = start + pd.to_timedelta(offset.fillna(0), unit="D")
+    end = pd.to_datetime(plans["endDate"]).fillna(until).clip(upper=until)
+
+    # One row per slot per week: repeat each slot, then step it a week at a time
+    weeks = ((end - first).dt.days // 7 + 1).clip(lower=0).to_numpy(dtype=np.int64)
+    rows = np.repeat(np.arange(len(plans)), weeks)
+    nth = np.arange(len(rows)) - np.repeat(np.cumsum(weeks) - weeks, weeks)
+    day = first.to_numpy()[rows] + pd.to_timedelta(nth * 7, unit="D").to_numpy()
+    return pd.DataFrame({
+        "day": day,
+        "produceID": plans["produceID"].to_numpy()[rows],
+        "qty": plans["qty"].to_numpy()[rows],
+    })
+
+
+# Produce x week matrix of demand (weeks start on Monday)
+def weekly_demand(produce_ids, orders, plans):
+    frames = [_date_plan_slots(plans)]
+    if not orders.empty:
+        frames.append(orders[["day", "produceID", "qty"]])
+    events = pd.concat(frames, ignore_index=True)
+    if events.empty:
+        return pd.DataFrame(index=pd.Index(produce_ids, name="produceID"))
+
+    day = pd.to_datetime(events["day"])
+    events = events.assign(week=(day - pd.to_timedelta(day.dt.weekday, unit="D")).dt.normalize(),
+                           qty=events["qty"].astype(float))
+    matrix = events.pivot_table(index="produceID", columns="week", values="qty",
+                                aggfunc="sum", fill_value=0.0)
+
+    # Every produce row, and every week between the first and last
+    weeks = pd.date_range(matrix.columns.min(), matrix.columns.max(), freq="7D")
+    return matrix.reindex(index=produce_ids, columns=weeks, fill_value=0.0)
+
+
+# Produce x month matrix of how many menu recipes use each produce
+def menu_by_month(produce_ids, menus, year=None):
+    counts = np.zeros((len(produce_ids), 12))
+    if menus.empty:
+        return counts
+    year = year or date.today().year
+    week = menus["weekNumber"].clip(1, 52).astype(int)
+    month = week.map(lambda w: date.fromisocalendar(year, w, 1).month - 1)
+    row = pd.Index(produce_ids).get_indexer(menus["produceID"])
+    keep = row >= 0
+    np.add.at(counts, (row[keep], month[keep].to_numpy()), menus["recipes"].to_numpy()[keep])
+    return counts
+
+
+#------------------------------------------------------------
+# Training
+#------------------------------------------------------------
+def train(produce_ids, weekly, menu_counts, alpha=0.3, shrinkage=4.0, menu_weight=0.25):
+    produce_ids = np.asarray(produce_ids)
+    n = len(produce_ids)
+    if weekly.shape[1] == 0:
+        return DemandForecaster(produce_ids, np.zeros(n), np.ones((n, 12)))
+
+    Y = weekly.to_numpy(dtype=np.float64)                       # (P, W)
+    months = weekly.columns.month.to_numpy() - 1                # (W,)
+
+    # Level: exponentially weighted mean, most recent week weighted highest
+    decay = (1 - alpha) ** np.arange(Y.shape[1] - 1, -1, -1)
+    level = Y @ decay / decay.sum()
+
+    # Seasonal: mean demand per calendar month relative to the overall mean
+    onehot = np.eye(12)[months]                                 # (W, 12)
+    weeks_per_month = onehot.sum(axis=0)                        # (12,)
+    month_mean = (Y @ onehot) / np.maximum(weeks_per_month, 1)
+    overall = Y.mean(axis=1, keepdims=True)
+    raw = np.divide(month_mean, overall, out=np.ones_like(month_mean), where=overall > 0)
+    seasonal = (weeks_per_month * raw + shrinkage) / (weeks_per_month + shrinkage)
+
+    # Menus: months where a produce is featured more than usual get a lift
+    menu_mean = menu_counts.mean(axis=1, keepdims=True)
+    menu_ratio = np.divide(menu_counts, menu_mean, out=np.ones_like(menu_counts), where=menu_mean > 0)
+    seasonal *= 1 + menu_weight * (menu_ratio - 1)
+    seasonal /= np.maximum(seasonal.mean(axis=1, keepdims=True), 1e-9)
+
+    # A produce item with no recent demand falls back to its own mean over
+    # the whole history
+    level = np.where(level > 0, level, overall[:, 0])
+    return DemandForecaster(produce_ids, level, seasonal)
+
+
+def train_from_db(conn, **options):
+    produce_ids, orders, plans, menus = load_history(conn)
+    weekly = weekly_demand(produce_ids, orders, plans)
+    return train(produce_ids, weekly, menu_by_month(produce_ids, menus), **options)
+
+
+#------------------------------------------------------------
+# Batch refresh of the Demand table
+#------------------------------------------------------------
+# Replace Demand with one forecast row per produce (forcastID = produceID)
+def write_demand(conn, model, start=None):
+    predicted = model.predict(start)
+    rows = [
+        (int(pid), int(pid), round(float(value), 2))
+        for pid, value in zip(model.produce_ids, predicted)
+    ]
+    cursor = conn.cursor()
+    try:
+        cursor.execute("DELETE FROM Demand")
+        if rows:
+            cursor.executemany(
+                "INSERT INTO Demand (produceID, forcastID, predictedDemand) VALUES (%s, %s, %s)",
+                rows,
+            )
+        bump(cursor, "Demand")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    return len(rows)
+
+
+MODEL_NAME = "demand_forecast"
+
+
+# Train, publish the artifact to the registry, and rewrite Demand
+def refresh_demand(conn, registry=None):
+    model = train_from_db(conn)
+    if registry is not None:
+        arrays, meta = model.to_artifact()
+        registry.publish(MODEL_NAME, arrays, meta)
+    return model, write_demand(conn, model)
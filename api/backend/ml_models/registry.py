@@ -0,0 +1,188 @@
+#------------------------------------------------------------
+# Versioned model artifacts with warm, hot-swappable loading
+#------------------------------------------------------------
+# Layout under the registry root:
+#   <name>/v0001/manifest.json     version, metadata, sha256 per array
+#   <name>/v0001/<array>.npy       one file per weight array
+#   <name>/CURRENT                 the published version number
+#
+# publish() writes a new version directory and then flips CURRENT with
+# os.replace, so readers never see a half-written model.  Arrays are
+# opened with np.load(mmap_mode="r"): large weights are paged in by the
+# OS on first touch instead of being read into memory up front.
+#
+# ModelCache keeps the loaded models in memory for the life of the
+# process.  create_app() warms it once; a watcher thread polls CURRENT
+# and swaps in newly published versions under a lock.
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+POINTER = "CURRENT"
+MANIFEST = "manifest.json"
+
+
+class ChecksumError(Exception):
+    pass
+
+
+def _sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _write_atomic(path, text):
+    tmp = f"{path}.tmp.{os.getpid()}"
+    with open(tmp, "w") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class ModelRegistry:
+    """Reads and writes versioned artifacts under one directory."""
+
+    def __init__(self, root):
+        self.root = root
+
+    def _dir(self, name, version=None):
+        path = os.path.join(self.root, name)
+        return path if version is None else os.path.join(path, f"v{version:04d}")
+
+    def versions(self, name):
+        base = self._dir(name)
+        if not os.path.isdir(base):
+            return []
+        return sorted(
+            int(entry[1:]) for entry in os.listdir(base)
+            if entry.startswith("v") and entry[1:].isdigit()
+            and os.path.exists(os.path.join(base, entry, MANIFEST))
+        )
+
+    def current_version(self, name):
+        try:
+            with open(os.path.join(self._dir(name), POINTER)) as f:
+                return int(f.read().strip())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    # Save `arrays` ({name: ndarray}) and `meta` as the next version.
+    # The manifest is written last, so a crash leaves no loadable version.
+    def publish(self, name, arrays, meta=None, make_current=True):
+        os.makedirs(self._dir(name), exist_ok=True)
+        existing = self.versions(name)
+        version = (existing[-1] if existing else 0) + 1
+        target = self._dir(name, version)
+        os.makedirs(target)
+
+        entries = {}
+        for key, value in arrays.items():
+            value = np.ascontiguousarray(value)
+            path = os.path.join(target, f"{key}.npy")
+            np.save(path, value, allow_pickle=False)
+            entries[key] = {
+                "file": f"{key}.npy",
+                "sha256": _sha256(path),
+                "shape": list(value.shape),
+                "dtype": str(value.dtype),
+            }
+
+        manifest = {
+            "name": name,
+            "version": version,
+            "createdAt": datetime.now().isoformat(timespec="seconds"),
+            "meta": meta or {},
+            "arrays": entries,
+        }
+        _write_atomic(os.path.join(target, MANIFEST), json.dumps(manifest, indent=2))
+        if make_current:
+            self.set_current(name, version)
+        return version
+
+    def set_current(self, name, version):
+        _write_atomic(os.path.join(self._dir(name), POINTER), str(version))
+
+    # Returns (manifest, {array name: read-only memory-mapped ndarray})
+    def load(self, name, version=None, verify=True):
+        version = version or self.current_version(name)
+        if version is None:
+            raise FileNotFoundError(f"no published version of model '{name}'")
+        target = self._dir(name, version)
+        with open(os.path.join(target, MANIFEST)) as f:
+            manifest = json.load(f)
+
+        arrays = {}
+        for key, entry in manifest["arrays"].items():
+            path = os.path.join(target, entry["file"])
+            if verify and _sha256(path) != entry["sha256"]:
+                raise ChecksumError(f"{name} v{version}: checksum mismatch for {entry['file']}")
+            arrays[key] = np.load(path, mmap_mode="r", allow_pickle=False)
+        return manifest, arrays
+
+
+class ModelCache:
+    """Process-wide loaded models, swapped atomically on publish."""
+
+    def __init__(self, registry=None, loaders=None):
+        self.registry = registry
+        self.loaders = loaders or {}        # name -> (manifest, arrays) -> model
+        self._models = {}                   # name -> (version, model)
+        self._lock = threading.Lock()
+        self._watcher = None
+        self.load_ms = {}
+
+    def configure(self, registry, loaders):
+        self.registry = registry
+        self.loaders.update(loaders)
+
+    # Load the published version of every known model that is not
+    # already in memory.  Returns {name: version} for what was swapped in.
+    def refresh(self):
+        swapped = {}
+        for name, loader in self.loaders.items():
+            version = self.registry.current_version(name)
+            with self._lock:
+                loaded = self._models.get(name)
+            if version is None or (loaded and loaded[0] == version):
+                continue
+            started = time.perf_counter()
+            manifest, arrays = self.registry.load(name, version)
+            model = loader(manifest, arrays)
+            with self._lock:
+                self._models[name] = (version, model)
+                self.load_ms[name] = round((time.perf_counter() - started) * 1000, 2)
+            swapped[name] = version
+        return swapped
+
+    # (version, model) or (None, None) when nothing is published yet
+    def get(self, name):
+        with self._lock:
+            return self._models.get(name, (None, None))
+
+    def watch(self, interval, log=None):
+        if self._watcher is not None or interval <= 0:
+            return
+        stop = threading.Event()
+
+        def loop():
+            while not stop.wait(interval):
+                try:
+                    swapped = self.refresh()
+                    if swapped and log:
+                        log(f"models: loaded {swapped}")
+                except Exception as e:
+                    if log:
+                        log(f"models: reload failed: {e}")
+
+        self._watcher = threading.Thread(target=loop, name="model-watcher", daemon=True)
+        self._watcher.stop = stop
+        self._watcher.start()
@@ -2,6 +2,8 @@ from flask import Blueprint, jsonify, request
 from backend.db_connection import db
 from mysql.connector import Error
 from flask import current_app
+from backend.pagination import ListQuery, page
+from backend.conditional import bump, conditional
 
 # Create a Blueprint for NGO routes
 ngos = Blueprint("ngos", __name__)
@@ -9,7 +11,11 @@ ngos = Blueprint("ngos", __name__)
 
 # Get all NGOs with optional filtering by country, focus area, and founding year
 # Example: /ngo/ngos?country=United%20States&focus_area=Environmental%20Conservation
+# Paginated: limit, after, fields, order (see backend/pagination.py)
+NGO_COLUMNS = {c: c for c in ["NGO_ID", "Name", "Country", "Founding_Year", "Focus_Area", "Website"]}
+
 @ngos.route("/ngos", methods=["GET"])
+@conditional("WorldNGOs")
 def get_all_ngos():
     try:
         current_app.logger.info('Starting get_all_ngos request')
@@ -28,27 +34,27 @@ def get_all_ngos():
         current_app.logger.debug(f'Query parameters - country: {country}, focus_area: {focus_area}, founding_year: {founding_year}')
 
         # Prepare the Base query
-        query = "SELECT * FROM WorldNGOs WHERE 1=1"
+        where = "1=1"
         params = []
 
         # Add filters if provided
         if country:
-            query += " AND Country = %s"
+            where += " AND Country = %s"
             params.append(country)
         if focus_area:
-            query += " AND Focus_Area = %s"
+            where += " AND Focus_Area = %s"
             params.append(focus_area)
         if founding_year:
-            query += " AND Founding_Year = %s"
+            where += " AND Founding_Year = %s"
             params.append(founding_year)
 
-        current_app.logger.debug(f'Executing query: {query} with params: {params}')
-        cursor.execute(query, params)
-        ngos = cursor.fetchall()
+        query = ListQuery("WorldNGOs", NGO_COLUMNS, keys=["NGO_ID"], where=where)
+        current_app.logger.debug(f'Executing query with filters: {where} params: {params}')
+        result = page(query, cursor, params)
         cursor.close()
 
-        current_app.logger.info(f'Successfully retrieved {len(ngos)} NGOs')
-        return jsonify(ngos), 200
+        current_app.logger.info('Successfully retrieved a page of NGOs')
+        return result
     except Error as e:
         current_app.logger.error(f'Database error in get_all_ngos: {str(e)}')
         return jsonify({"error": str(e)}), 500
@@ -57,6 +63,7 @@ def get_all_ngos():
 # Get detailed information about a specific NGO including its projects and donors
 # Example: /ngo/ngos/1
 @ngos.route("/ngos/<int:ngo_id>", methods=["GET"])
+@conditional("WorldNGOs")
 def get_ngo(ngo_id):
     try:
         cursor = db.get_db().cursor()
@@ -117,8 +124,10 @@ def create_ngo():
             ),
         )
 
-        db.get_db().commit()
         new_ngo_id = cursor.lastrowid
+
+        bump(cursor, "WorldNGOs")
+        db.get_db().commit()
         cursor.close()
 
         return (
@@ -160,6 +169,7 @@ def update_ngo(ngo_id):
         query = f"UPDATE WorldNGOs SET {', '.join(update_fields)} WHERE NGO_ID = %s"
 
         cursor.execute(query, params)
+        bump(cursor, "WorldNGOs")
         db.get_db().commit()
         cursor.close()
 
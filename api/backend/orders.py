@@ -0,0 +1,253 @@
+#------------------------------------------------------------
+# Order ingestion: validate, reserve stock and insert in one go
+#------------------------------------------------------------
+# POST /c/orders takes one order or {"orders": [...]} (e.g. the weekly
+# subscription run).  Each order is
+#   {"customerID": 5, "deliveryAddress": "...", "scheduledTime": "2025-03-01",
+#    "produce": [{"produceID": 4, "quantityOrdered": 2}, ...],
+#    "ingredients": [{"ingredientID": 12, "quantityOrdered": 1}, ...],
+#    "recipes": [3, 7]}
+#
+# A batch is all or nothing:
+#   1. validate_orders() checks the whole payload's shape before any SQL
+#   2. create_orders(), inside the caller's transaction,
+#      - checks every customer, recipe, produce and ingredient ID exists
+#      - locks the Produce / Ingredient rows it needs (ascending ID, so
+#        concurrent batches can't deadlock) and fails with StockError if
+#        the batch as a whole would take any of them below zero
+#      - allocates a block of order IDs under a lock on the top of
+#        Orders (orderID is not AUTO_INCREMENT)
+#      - writes Orders and each line table with one executemany apiece
+#        and decrements quantityAvailable
+# The caller commits; on any exception it rolls back and nothing is
+# written or reserved.
+from collections import defaultdict
+from datetime import date
+
+from backend.migrations.explain_check import route_query
+
+MAX_BATCH = 500
+
+
+class OrderError(ValueError):
+    """The payload is invalid; `errors` lists what, per order index."""
+
+    def __init__(self, errors):
+        super().__init__("; ".join(e["error"] for e in errors))
+        self.errors = errors
+
+
+class StockError(OrderError):
+    """Not enough stock; `errors` lists each short item."""
+
+
+def _positive_int(value):
+    return isinstance(value, int) and not isinstance(value, bool) and value > 0
+
+
+# Merge repeated IDs in a line list into {id: total quantity}
+def _lines(order, key, id_field, index, errors):
+    lines = order.get(key, [])
+    if not isinstance(lines, list):
+        errors.append({"order": index, "error": f"{key} must be a list"})
+        return {}
+    merged = defaultdict(int)
+    for item in lines:
+        if not isinstance(item, dict) or not _positive_int(item.get(id_field)) \
+                or not _positive_int(item.get("quantityOrdered")):
+            errors.append({
+                "order": index,
+                "error": f"each {key} item needs a positive integer {id_field} and quantityOrdered",
+            })
+            return {}
+        merged[item[id_field]] += item["quantityOrdered"]
+    return dict(merged)
+
+
+# Normalize the request body into a list of orders, or raise OrderError
+def validate_orders(payload, max_batch=MAX_BATCH):
+    if not isinstance(payload, dict):
+        raise OrderError([{"order": None, "error": "body must be a JSON object"}])
+    batch = payload.get("orders") if "orders" in payload else [payload]
+    if not isinstance(batch, list) or not batch:
+        raise OrderError([{"order": None, "error": "orders must be a non-empty list"}])
+    if len(batch) > max_batch:
+        raise OrderError([{"order": None, "error": f"at most {max_batch} orders per request"}])
+
+    orders = []
+    errors = []
+    for index, order in enumerate(batch):
+        if not isinstance(order, dict):
+            errors.append({"order": index, "error": "each order must be an object"})
+            continue
+        missing = [f for f in ("customerID", "deliveryAddress", "scheduledTime") if f not in order]
+        if missing:
+            errors.append({"order": index, "error": f"Missing required field: {', '.join(missing)}"})
+            continue
+        if not _positive_int(order["customerID"]):
+            errors.append({"order": index, "error": "customerID must be a positive integer"})
+        try:
+            scheduled = date.fromisoformat(str(order["scheduledTime"])[:10])
+        except ValueError:
+            errors.append({"order": index, "error": "scheduledTime must be an ISO date"})
+            scheduled = None
+
+        produce = _lines(order, "produce", "produceID", index, errors)
+        ingredients = _lines(order, "ingredients", "ingredientID", index, errors)
+        recipes = order.get("recipes", [])
+        if not isinstance(recipes, list) or not all(_positive_int(r) for r in recipes):
+            errors.append({"order": index, "error": "recipes must be a list of recipe IDs"})
+            recipes = []
+        if not (produce or ingredients or recipes):
+            errors.append({"order": index, "error": "an order needs at least one produce, ingredient or recipe"})
+
+        orders.append({
+            "customerID": order["customerID"],
+            "deliveryAddress": str(order["deliveryAddress"])[:100],
+            "scheduledTime": scheduled,
+            "produce": produce,
+            "ingredients": ingredients,
+            "recipes": sorted(set(recipes)),
+        })
+
+    if errors:
+        raise OrderError(errors)
+    return orders
+
+
+def _existing(cursor, table, column, ids):
+    if not ids:
+        return set()
+    marks = ", ".join("%s" for _ in ids)
+    cursor.execute(f"SELECT {column} FROM {table} WHERE {column} IN ({marks})", sorted(ids))
+    return {row[column] for row in cursor.fetchall()}
+
+
+# Stock rows for `count` IDs, locked in key order
+def reserve_sql(table, column, count):
+    marks = ", ".join("%s" for _ in range(count))
+    return (
+        f"SELECT {column}, quantityAvailable FROM {table} WHERE {column} IN ({marks}) "
+        f"ORDER BY {column} FOR UPDATE"
+    )
+
+
+# Locks must hit the primary key, or they block unrelated stock rows
+route_query("POST /c/orders", reserve_sql("Produce", "produceID", 2), (1, 2))
+route_query("POST /c/orders", reserve_sql("Ingredient", "ingredientID", 2), (1, 2))
+
+# Gap-locks the end of the index, so concurrent batches take turns
+NEXT_ORDER_SQL = route_query("POST /c/orders", "SELECT COALESCE(MAX(orderID), 0) AS top FROM Orders FOR UPDATE")
+
+
+# Lock the stock rows a batch needs; returns (unknown, short) error lists
+def _reserve(cursor, table, column, needed):
+    if not needed:
+        return [], []
+    ids = sorted(needed)
+    cursor.execute(reserve_sql(table, column, len(ids)), ids)
+    available = {row[column]: row["quantityAvailable"] for row in cursor.fetchall()}
+    unknown = []
+    short = []
+    for item_id in ids:
+        if item_id not in available:
+            unknown.append({"order": None, "error": f"unknown {column} {item_id}"})
+        elif available[item_id] < needed[item_id]:
+            short.append({
+                "order": None,
+                "error": f"not enough stock for {column} {item_id}",
+                column: item_id,
+                "requested": needed[item_id],
+                "available": available[item_id],
+            })
+    return unknown, short
+
+
+# Insert a validated batch in the caller's transaction; returns the new orderIDs
+def create_orders(cursor, orders):
+    customers = {o["customerID"] for o in orders}
+    recipes = {r for o in orders for r in o["recipes"]}
+    produce_needed = defaultdict(int)
+    ingredient_needed = defaultdict(int)
+    for order in orders:
+        for pid, qty in order["produce"].items():
+            produce_needed[pid] += qty
+        for iid, qty in order["ingredients"].items():
+            ingredient_needed[iid] += qty
+
+    errors = []
+    for table, column, ids in (("Customer", "customerID", customers), ("Recipe", "recipeID", recipes)):
+        for missing in sorted(ids - _existing(cursor, table, column, ids)):
+            errors.append({"order": None, "error": f"unknown {column} {missing}"})
+    if errors:
+        raise OrderError(errors)
+
+    short = []
+    for table, column, needed in (("Produce", "produceID", produce_needed),
+                                  ("Ingredient", "ingredientID", ingredient_needed)):
+        unknown, lacking = _reserve(cursor, table, column, needed)
+        errors += unknown
+        short += lacking
+    if errors:
+        raise OrderError(errors)
+    if short:
+        raise StockError(short)
+
+    cursor.execute(NEXT_ORDER_SQL)
+    first_id = cursor.fetchone()["top"] + 1
+    order_ids = list(range(first_id, first_id + len(orders)))
+
+    today = date.today()
+    order_rows = []
+    produce_rows = []
+    ingredient_rows = []
+    recipe_rows = []
+    for order_id, order in zip(order_ids, orders):
+        produce = order["produce"]
+        ingredients = order["ingredients"]
+        order_rows.append((
+            order_id,
+            today,
+            order["scheduledTime"],
+            order["deliveryAddress"],
+            sum(produce.values()) + sum(ingredients.values()),
+            next(iter(produce), None),
+            next(iter(ingredients), None),
+            order["customerID"],
+        ))
+        produce_rows += [(order_id, pid, qty) for pid, qty in produce.items()]
+        ingredient_rows += [(order_id, iid, qty) for iid, qty in ingredients.items()]
+        recipe_rows += [(order_id, rid) for rid in order["recipes"]]
+
+    cursor.executemany(
+        """
+        INSERT INTO Orders (orderID, status, orderDate, scheduledTime, deliveryAddress,
+                            quantityOrdered, produceID, ingredientID, customerID)
+        VALUES (%s, 'pending', %s, %s, %s, %s, %s, %s, %s)
+        """,
+        order_rows,
+    )
+    if produce_rows:
+        cursor.executemany(
+            "INSERT INTO OrderProduce (orderID, produceID, quantityOrdered) VALUES (%s, %s, %s)",
+            produce_rows,
+        )
+        cursor.executemany(
+            "UPDATE Produce SET quantityAvailable = quantityAvailable - %s WHERE produceID = %s",
+            [(qty, pid) for pid, qty in sorted(produce_needed.items())],
+        )
+    if ingredient_rows:
+        cursor.executemany(
+            "INSERT INTO OrderIngredient (orderID, ingredientID, quantityOrdered) VALUES (%s, %s, %s)",
+            ingredient_rows,
+        )
+        cursor.executemany(
+            "UPDATE Ingredient SET quantityAvailable = quantityAvailable - %s WHERE ingredientID = %s",
+            [(qty, iid) for iid, qty in sorted(ingredient_needed.items())],
+        )
+    if recipe_rows:
+        cursor.executemany(
+            "INSERT INTO OrderRecipe (orderID, recipeID) VALUES (%s, %s)",
+            recipe_rows,
+        )
+    return order_ids
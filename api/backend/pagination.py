@@ -0,0 +1,169 @@
+#------------------------------------------------------------
+# Keyset pagination and field projection for list endpoints
+#------------------------------------------------------------
+# List routes describe their query with a ListQuery and call page().
+# Every list endpoint then takes the same query-string parameters:
+#   limit=N        rows per page (capped at PAGE_MAX_LIMIT)
+#   after=<token>  the X-Next-Cursor value from the previous page
+#   fields=a,b,c   only return these columns (validated against the
+#                  route's column list, so they are safe to put in SQL)
+#   order=asc|desc direction of the sort key
+#
+# Pages are cut with a keyset condition on the sort key (e.g.
+# WHERE (name, recipeID) > (last name, last id)) rather than OFFSET, so
+# fetching page 1000 costs the same as page 1.  The response body stays
+# a plain JSON list; the next page's cursor is in the X-Next-Cursor
+# header and a Link: rel="next" header, and is absent on the last page.
+# Without a limit a list stops at PAGE_DEFAULT_LIMIT rows, so a caller
+# that needs every row must follow the cursor (the front end's
+# api_client.get_all does).
+import base64
+import json
+from urllib.parse import urlencode
+
+from flask import current_app, jsonify, request
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 1000
+
+
+class PageError(ValueError):
+    pass
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, default=str, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token, size):
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(raw)
+    except (ValueError, UnicodeDecodeError):
+        raise PageError("after is not a valid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise PageError("after is not a valid cursor for this list")
+    return values
+
+
+class ListQuery:
+    """A paginated SELECT over one table or join.
+
+    columns maps each output field to its SQL expression; keys names the
+    output fields that make up a unique sort key (end with the primary key).
+    """
+
+    def __init__(self, source, columns, keys, where=None, default_fields=None, descending=False):
+        self.source = source
+        self.columns = columns
+        self.keys = list(keys)
+        self.where = where
+        self.default_fields = list(default_fields or columns)
+        self.descending = descending
+
+    def _fields(self, args):
+        requested = args.get("fields")
+        if not requested:
+            return self.default_fields
+        fields = [f.strip() for f in requested.split(",") if f.strip()]
+        unknown = [f for f in fields if f not in self.columns]
+        if unknown:
+            raise PageError(f"unknown fields: {', '.join(unknown)}")
+        return fields
+
+    def _limit(self, args):
+        default = current_app.config.get("PAGE_DEFAULT_LIMIT", DEFAULT_LIMIT)
+        maximum = current_app.config.get("PAGE_MAX_LIMIT", MAX_LIMIT)
+        try:
+            limit = int(args.get("limit", default))
+        except ValueError:
+            raise PageError("limit must be an integer")
+        if limit < 1:
+            raise PageError("limit must be at least 1")
+        return min(limit, maximum)
+
+    def _descending(self, args):
+        order = args.get("order")
+        if order is None:
+            return self.descending
+        if order not in ("asc", "desc"):
+            raise PageError("order must be 'asc' or 'desc'")
+        return order == "desc"
+
+    # (k1 > v1) OR (k1 = v1 AND k2 > v2) OR ...  -- the row-value
+    # comparison spelled out so MySQL can use the index range
+    def _after_clause(self, descending):
+        op = "<" if descending else ">"
+        exprs = [self.columns[k] for k in self.keys]
+        terms = []
+        for i, expr in enumerate(exprs):
+            equal = [f"{e} = %s" for e in exprs[:i]]
+            terms.append("(" + " AND ".join(equal + [f"{expr} {op} %s"]) + ")")
+        params_for = lambda values: [v for i in range(len(values)) for v in values[:i + 1]]
+        return "(" + " OR ".join(terms) + ")", params_for
+
+    def build(self, args, params=()):
+        fields = self._fields(args)
+        limit = self._limit(args)
+        descending = self._descending(args)
+
+        selected = fields + [k for k in self.keys if k not in fields]
+        select = ", ".join(
+            self.columns[f] if self.columns[f] == f else f"{self.columns[f]} AS {f}"
+            for f in selected
+        )
+
+        conditions = [self.where] if self.where else []
+        params = list(params)
+        if args.get("after"):
+            values = decode_cursor(args["after"], len(self.keys))
+            clause, params_for = self._after_clause(descending)
+            conditions.append(clause)
+            params.extend(params_for(values))
+
+        direction = "DESC" if descending else "ASC"
+        sql = f"SELECT {select} FROM {self.source}"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY " + ", ".join(f"{self.columns[k]} {direction}" for k in self.keys)
+        sql += " LIMIT %s"
+        params.append(limit + 1)
+        return sql, params, fields, limit
+
+    # Run one page; returns (rows, next cursor or None)
+    def run(self, cursor, args, params=()):
+        sql, params, fields, limit = self.build(args, params)
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor([rows[-1][k] for k in self.keys])
+
+        hidden = [k for k in self.keys if k not in fields]
+        if hidden:
+            rows = [{f: row[f] for f in fields} for row in rows]
+        return rows, next_cursor
+
+
+# JSON list response carrying the next-page cursor in headers
+def page_response(rows, next_cursor):
+    response = jsonify(rows)
+    if next_cursor:
+        args = request.args.to_dict()
+        args["after"] = next_cursor
+        response.headers["X-Next-Cursor"] = next_cursor
+        response.headers["Link"] = f'<{request.base_url}?{urlencode(args)}>; rel="next"'
+    return response
+
+
+# Run a ListQuery for the current request.  Bad paging parameters
+# become a 400; database errors are left to the route's own handler.
+def page(query, cursor, params=()):
+    try:
+        rows, next_cursor = query.run(cursor, request.args, params)
+    except PageError as e:
+        return jsonify({"error": str(e)}), 400
+    return page_response(rows, next_cursor), 200
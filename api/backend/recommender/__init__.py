@@ -0,0 +1,101 @@
+#------------------------------------------------------------
+# Recipe recommendations from dietary preferences and goals
+#------------------------------------------------------------
+# Matches Customer.dietaryPref / nutritionGoals against Recipe
+# suitibleFor, cuisineType and popularityScore (see engine.py for the
+# scoring).  Every customer's top RECOMMEND_TOP_K list is precomputed in
+# batches and kept in memory, so
+#   GET /c/customers/<id>/recommendations?limit=5
+# is a dict lookup.  A customer's list is re-scored on their next request
+# once their preferences change (every worker compares the stored
+# preferences with the customer's row); a change to Recipe rebuilds the
+# recipe matrix on the next request.
+#
+# Rebuild every list with:
+#   flask --app backend_app recommend-refresh
+# or set RECOMMEND_REFRESH_MINUTES to have the API rebuild them on a
+# timer (it also builds them once at startup).
+import threading
+
+import click
+
+from backend.recommender.engine import (
+    DIET_SATISFIED_BY,
+    GOAL_WEIGHTS,
+    RecipeMatrix,
+    Recommender,
+    tokens,
+)
+
+__all__ = [
+    "DIET_SATISFIED_BY",
+    "GOAL_WEIGHTS",
+    "RecipeMatrix",
+    "Recommender",
+    "init_app",
+    "recommender",
+    "run_refresh",
+    "tokens",
+]
+
+# Shared by every request in this process
+recommender = Recommender()
+
+_scheduler = None
+
+
+# Rebuild every customer's list on a pooled connection
+def run_refresh(app):
+    from backend.db_connection import db
+
+    conn = db.connect()
+    try:
+        result = recommender.refresh(conn)
+    except Exception:
+        db.release(conn, discard=True)
+        raise
+    db.release(conn)
+    return result
+
+
+# Daemon thread that builds the lists now and then every `minutes`
+def _start_scheduler(app, minutes):
+    global _scheduler
+    if _scheduler is not None:
+        return
+    stop = threading.Event()
+
+    def loop():
+        while True:
+            try:
+                result = run_refresh(app)
+                app.logger.info(
+                    f"recommender: scored {result['customers']} customers against "
+                    f"{result['recipes']} recipes in {result['ms']} ms"
+                )
+            except Exception as e:
+                app.logger.error(f"recommender: refresh failed: {e}")
+            if stop.wait(minutes * 60):
+                return
+
+    _scheduler = threading.Thread(target=loop, name="recommender-refresh", daemon=True)
+    _scheduler.stop = stop
+    _scheduler.start()
+
+
+def init_app(app):
+    recommender.k = app.config.get("RECOMMEND_TOP_K", recommender.k)
+    recommender.batch_size = app.config.get("RECOMMEND_BATCH_SIZE", recommender.batch_size)
+
+    @app.cli.command("recommend-refresh")
+    def refresh_command():
+        """Rebuild every customer's recipe recommendations."""
+        result = run_refresh(app)
+        click.echo(
+            f"scored {result['customers']} customers against {result['recipes']} recipes "
+            f"in {result['ms']} ms"
+        )
+
+    minutes = app.config.get("RECOMMEND_REFRESH_MINUTES") or 0
+    if minutes > 0:
+        _start_scheduler(app, minutes)
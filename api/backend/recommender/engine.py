@@ -0,0 +1,312 @@
+#------------------------------------------------------------
+# Recipe features and vectorized customer scoring
+#------------------------------------------------------------
+# Each active recipe is a sparse row over a small feature vocabulary:
+#   diet:<tag>     one per Recipe.suitibleFor tag (vegan, low_carb, ...)
+#   cuisine:<c>    Recipe.cuisineType
+# Each customer is a sparse row of weights over the same vocabulary,
+# read from Customer.dietaryPref and nutritionGoals:
+#   - a diet restriction (vegetarian, gluten_free, ...) puts DIET_WEIGHT
+#     on every recipe tag that satisfies it, so matching recipes always
+#     rank above the rest
+#   - goals and soft preferences (muscle_gain, High Protein, ...) add
+#     smaller weights from GOAL_WEIGHTS
+# score = customers @ recipes.T + POPULARITY_WEIGHT * popularity, where
+# popularity is popularityScore scaled to [0, 1] and breaks ties.
+#
+# score_top() scores a block of customers at once and keeps each one's
+# top K with argpartition, so the dense score block is only ever
+# batch_size x recipes.
+import re
+import threading
+import time
+
+import numpy as np
+from scipy import sparse
+
+DIET_WEIGHT = 10.0
+POPULARITY_WEIGHT = 1.0
+TOP_K = 20
+BATCH_SIZE = 2048
+
+# Recipe tags that satisfy each customer diet restriction
+DIET_SATISFIED_BY = {
+    "vegan": ("vegan",),
+    "vegetarian": ("vegan", "vegetarian"),
+    "pescatarian": ("vegan", "vegetarian", "pescatarian"),
+    "gluten_free": ("gluten_free",),
+}
+
+# Features favoured by goals and soft preferences
+GOAL_WEIGHTS = {
+    "muscle_gain": {"diet:high_protein": 3.0},
+    "protein": {"diet:high_protein": 3.0},
+    "high_protein": {"diet:high_protein": 3.0},
+    "weight_loss": {"diet:low_carb": 3.0, "cuisine:mediterranean": 1.0},
+    "low_carb": {"diet:low_carb": 3.0},
+    "heart_health": {"cuisine:mediterranean": 3.0, "diet:vegan": 1.0, "diet:vegetarian": 1.0},
+}
+
+_SPLIT = re.compile(r"[,;/|]")
+
+
+# "Vegetarian, Gluten Free" -> ["vegetarian", "gluten_free"]
+def tokens(text):
+    return [
+        re.sub(r"[\s-]+", "_", part.strip().lower())
+        for part in _SPLIT.split(text or "")
+        if part.strip()
+    ]
+
+
+class RecipeMatrix:
+    """Sparse recipe x feature matrix plus the recipe fields served."""
+
+    def __init__(self, recipes, version=None):
+        recipes = sorted(
+            (r for r in recipes if r.get("isActive", True)),
+            key=lambda r: r["recipeID"],
+        )
+        self.version = version
+        self.recipes = [
+            {
+                "recipeID": r["recipeID"],
+                "name": r["name"],
+                "description": r.get("description"),
+                "nutritionInfo": r.get("nutritionInfo"),
+                "cuisineType": r.get("cuisineType"),
+                "suitibleFor": r.get("suitibleFor"),
+                "popularityScore": r.get("popularityScore"),
+            }
+            for r in recipes
+        ]
+
+        self.vocab = {}
+        rows, cols = [], []
+        for i, r in enumerate(recipes):
+            features = {f"diet:{t}" for t in tokens(r.get("suitibleFor"))}
+            features |= {f"cuisine:{t}" for t in tokens(r.get("cuisineType"))}
+            for feature in features:
+                rows.append(i)
+                cols.append(self.vocab.setdefault(feature, len(self.vocab)))
+        self.features = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.float32), (rows, cols)),
+            shape=(len(recipes), max(len(self.vocab), 1)),
+        )
+        # Transposed once here so every batch is a CSR x CSC product
+        self.features_t = self.features.T.tocsc()
+
+        popularity = np.array([r.get("popularityScore") or 0 for r in recipes], dtype=np.float32)
+        top = popularity.max() if len(popularity) else 0
+        self.popularity = POPULARITY_WEIGHT * (popularity / top if top > 0 else popularity)
+
+    def __len__(self):
+        return len(self.recipes)
+
+    # {column: weight} for one customer's preferences
+    def customer_weights(self, dietary_pref, nutrition_goals):
+        weights = {}
+
+        def add(feature, weight):
+            col = self.vocab.get(feature)
+            if col is not None:
+                weights[col] = weights.get(col, 0.0) + weight
+
+        for token in set(tokens(dietary_pref)) | set(tokens(nutrition_goals)):
+            for tag in DIET_SATISFIED_BY.get(token, ()):
+                add(f"diet:{tag}", DIET_WEIGHT)
+            for feature, weight in GOAL_WEIGHTS.get(token, {}).items():
+                add(feature, weight)
+        return weights
+
+    # Sparse customers x features matrix for a list of Customer rows
+    def customer_matrix(self, customers):
+        rows, cols, data = [], [], []
+        for i, c in enumerate(customers):
+            for col, weight in self.customer_weights(c.get("dietaryPref"), c.get("nutritionGoals")).items():
+                rows.append(i)
+                cols.append(col)
+                data.append(weight)
+        return sparse.csr_matrix(
+            (np.array(data, dtype=np.float32), (rows, cols)),
+            shape=(len(customers), self.features.shape[1]),
+        )
+
+    # Top-k (recipe indexes, scores) per customer, best first.  Customers
+    # with the same preferences share a row: each distinct profile is
+    # scored once and the result fanned out.
+    def score_top(self, customers, k=TOP_K):
+        if not customers or not len(self):
+            empty = np.empty((len(customers), 0))
+            return empty.astype(np.int32), empty.astype(np.float32)
+        k = min(k, len(self))
+        profiles = {}
+        rows = np.array(
+            [
+                profiles.setdefault((c.get("dietaryPref"), c.get("nutritionGoals")), len(profiles))
+                for c in customers
+            ],
+            dtype=np.int64,
+        )
+        unique = [{"dietaryPref": d, "nutritionGoals": g} for d, g in profiles]
+
+        scores = (self.customer_matrix(unique) @ self.features_t).toarray()
+        scores += self.popularity
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top.sort(axis=1)  # ties fall back to recipeID order
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+        top = np.take_along_axis(top, order, axis=1).astype(np.int32)
+        top_scores = np.take_along_axis(top_scores, order, axis=1).astype(np.float32)
+        return top[rows], top_scores[rows]
+
+
+RECIPE_SQL = """
+    SELECT recipeID, name, description, nutritionInfo, popularityScore,
+           isActive, suitibleFor, cuisineType
+    FROM Recipe
+"""
+
+
+# The preferences a customer's list is scored from
+def _profile(customer):
+    return (customer.get("dietaryPref"), customer.get("nutritionGoals"))
+
+
+def _recipe_version(cursor):
+    cursor.execute("SELECT version FROM TableVersion WHERE tableName = 'Recipe'")
+    row = cursor.fetchone()
+    return row["version"] if row else None
+
+
+class Recommender:
+    """Per-process top-K recipe lists, precomputed for every customer.
+
+    Each list remembers the preferences it was scored for.  A request
+    re-reads the customer's row and re-scores when they differ, so a
+    change made through another worker (whose invalidate() only reached
+    its own process) is picked up on the customer's next request.
+    """
+
+    def __init__(self, k=TOP_K, batch_size=BATCH_SIZE):
+        self.k = k
+        self.batch_size = batch_size
+        self.matrix = None
+        self._top = {}               # customerID -> (profile, recipe indexes, scores)
+        self._invalidated = set()    # customers changed during a refresh
+        self._refreshing = False
+        self._lock = threading.Lock()
+        self.last_refresh = None
+
+    def _load_matrix(self, cursor):
+        version = _recipe_version(cursor)
+        cursor.execute(RECIPE_SQL)
+        return RecipeMatrix(cursor.fetchall(), version)
+
+    # Rebuild the recipe matrix and every customer's list, in batches
+    # walked by customerID; the new lists replace the old ones at once
+    def refresh(self, conn):
+        started = time.perf_counter()
+        with self._lock:
+            self._refreshing = True
+            self._invalidated = set()
+        cursor = conn.cursor()
+        try:
+            matrix = self._load_matrix(cursor)
+            top = {}
+            after = 0
+            while True:
+                cursor.execute(
+                    """
+                    SELECT customerID, dietaryPref, nutritionGoals FROM Customer
+                    WHERE customerID > %s ORDER BY customerID LIMIT %s
+                    """,
+                    (after, self.batch_size),
+                )
+                customers = cursor.fetchall()
+                if not customers:
+                    break
+                after = customers[-1]["customerID"]
+                indexes, scores = matrix.score_top(customers, self.k)
+                for c, idx, sc in zip(customers, indexes, scores):
+                    top[c["customerID"]] = (_profile(c), idx, sc)
+        except Exception:
+            with self._lock:
+                self._refreshing = False
+            raise
+        finally:
+            cursor.close()
+
+        # Cleared in the same block that swaps the lists in, so an
+        # invalidate() can't land between the two and be lost
+        with self._lock:
+            for customer_id in self._invalidated:
+                top.pop(customer_id, None)
+            self._invalidated = set()
+            self._refreshing = False
+            self.matrix = matrix
+            self._top = top
+            self.last_refresh = {
+                "recipes": len(matrix),
+                "customers": len(top),
+                "ms": round((time.perf_counter() - started) * 1000, 1),
+            }
+        return self.last_refresh
+
+    # Drop a customer's list in this process, e.g. after their
+    # preferences change; other workers notice on the next request
+    def invalidate(self, customer_id):
+        with self._lock:
+            self._top.pop(customer_id, None)
+            if self._refreshing:
+                self._invalidated.add(customer_id)
+
+    # Up to `limit` recipes for a customer, or None if no such customer.
+    # A hit is a primary-key read of the customer and a dict lookup; a
+    # miss (new or changed customer, or Recipe changed since the last
+    # build) scores that one customer.
+    def recommend(self, cursor, customer_id, limit=10):
+        version = _recipe_version(cursor)
+        cursor.execute(
+            "SELECT customerID, dietaryPref, nutritionGoals FROM Customer WHERE customerID = %s",
+            (customer_id,),
+        )
+        customer = cursor.fetchone()
+        if not customer:
+            return None
+        profile = _profile(customer)
+
+        with self._lock:
+            matrix = self.matrix
+            cached = self._top.get(customer_id) if matrix is not None and matrix.version == version else None
+        if cached is not None and cached[0] != profile:
+            cached = None
+
+        if cached is None:
+            if matrix is None or matrix.version != version:
+                matrix = self._load_matrix(cursor)
+                with self._lock:
+                    # Lists scored against the old recipes are stale
+                    if self.matrix is None or self.matrix.version != matrix.version:
+                        self.matrix = matrix
+                        self._top = {}
+            indexes, scores = matrix.score_top([customer], self.k)
+            cached = (profile, indexes[0], scores[0])
+            with self._lock:
+                if self.matrix is matrix:
+                    self._top[customer_id] = cached
+
+        _, indexes, scores = cached
+        return [
+            dict(matrix.recipes[i], score=round(float(s), 3))
+            for i, s in zip(indexes[:limit], scores[:limit])
+        ]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "recipes": len(self.matrix) if self.matrix is not None else 0,
+                "cachedCustomers": len(self._top),
+                "k": self.k,
+                "lastRefresh": self.last_refresh,
+            }
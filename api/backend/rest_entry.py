@@ -5,6 +5,16 @@ import logging
 from logging.handlers import RotatingFileHandler
 
 from backend.db_connection import db
+from backend import cache
+from backend import events
+from backend import json_provider
+from backend import migrations
+from backend import ml_models
+from backend import rollups
+from backend import recommender
+from backend import routing
+from backend import search
+from backend import subscriptions
 from backend.ngos.ngo_routes import ngos
 from backend.customers_routes import customer_routes
 from backend.farmer_routes import farmer_routes
@@ -18,6 +28,10 @@ def create_app():
     app.logger.setLevel(logging.DEBUG)
     app.logger.info('API startup')
 
+    # jsonify() database rows as-is: dates, TIME and DECIMAL values are
+    # encoded by the provider (orjson when installed)
+    json_provider.init_app(app)
+
     # Configure file logging if needed
     #   Uncomment the code in the setup_logging function
     # setup_logging(app) 
@@ -45,10 +59,96 @@ def create_app():
         "DB_NAME"
     ).strip()  # Change this to your DB name
 
+    # Connection pool sizing.  Every request context borrows one
+    # connection from the pool and returns it on teardown.
+    app.config["MYSQL_POOL_SIZE"] = int(os.getenv("DB_POOL_SIZE", "10"))
+    app.config["MYSQL_POOL_TIMEOUT"] = float(os.getenv("DB_POOL_TIMEOUT", "5"))
+    app.config["MYSQL_POOL_RECYCLE"] = int(os.getenv("DB_POOL_RECYCLE", "3600"))
+    app.config["MYSQL_POOL_PING_INTERVAL"] = int(os.getenv("DB_POOL_PING_INTERVAL", "30"))
+
     # Initialize the database object with the settings above.
     app.logger.info("current_app(): starting the database connection")
     db.init_app(app)
 
+    # Schema migrations: `flask --app backend_app db-migrate` applies them;
+    # set DB_AUTO_MIGRATE=1 to apply pending ones at startup instead.
+    app.config["DB_AUTO_MIGRATE"] = os.getenv("DB_AUTO_MIGRATE", "0") == "1"
+    migrations.init_app(app)
+
+    # Depot the route optimizer plans from (defaults to Northeastern, Boston)
+    app.config["DEPOT_LAT"] = float(os.getenv("DEPOT_LAT", "42.3398"))
+    app.config["DEPOT_LNG"] = float(os.getenv("DEPOT_LNG", "-71.0892"))
+    # ETA model: free-flow speed, minutes spent at each stop, and how
+    # often new Traffic rows are folded into the in-memory lookup
+    app.config["ETA_BASE_SPEED_KMH"] = float(os.getenv("ETA_BASE_SPEED_KMH", "30"))
+    app.config["ETA_SERVICE_MINUTES"] = float(os.getenv("ETA_SERVICE_MINUTES", "5"))
+    app.config["TRAFFIC_REFRESH_SECONDS"] = int(os.getenv("TRAFFIC_REFRESH_SECONDS", "60"))
+    # Dispatch: max total quantityOrdered per vehicle (unset = no limit)
+    capacity = os.getenv("DISPATCH_VEHICLE_CAPACITY")
+    app.config["DISPATCH_VEHICLE_CAPACITY"] = int(capacity) if capacity else None
+    routing.init_app(app)
+
+    # Daily rollups: days re-aggregated behind the high-water mark on each
+    # refresh, and how often (minutes) the API refreshes them
+    # (0 = only via `flask --app backend_app rollups-refresh`)
+    app.config["ROLLUP_LOOKBACK_DAYS"] = int(os.getenv("ROLLUP_LOOKBACK_DAYS", "7"))
+    app.config["ROLLUP_REFRESH_MINUTES"] = float(os.getenv("ROLLUP_REFRESH_MINUTES", "5"))
+    rollups.init_app(app)
+
+    # Trained models: the registry directory they are published to, how
+    # often (seconds) the API checks it for a new version, and how often
+    # (hours) the API retrains the demand model and rewrites Demand
+    # (0 = only via `flask --app backend_app forecast-demand`)
+    app.config["MODEL_REGISTRY_DIR"] = os.getenv(
+        "MODEL_REGISTRY_DIR",
+        os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models"),
+    )
+    app.config["MODEL_WATCH_SECONDS"] = float(os.getenv("MODEL_WATCH_SECONDS", "30"))
+    app.config["FORECAST_REFRESH_HOURS"] = float(os.getenv("FORECAST_REFRESH_HOURS", "0"))
+    ml_models.init_app(app)
+
+    # Recipe recommendations: list length kept per customer, customers
+    # scored per batch, and how often (minutes) the API rebuilds every
+    # list (0 = only via `flask --app backend_app recommend-refresh`)
+    app.config["RECOMMEND_TOP_K"] = int(os.getenv("RECOMMEND_TOP_K", "20"))
+    app.config["RECOMMEND_BATCH_SIZE"] = int(os.getenv("RECOMMEND_BATCH_SIZE", "2048"))
+    app.config["RECOMMEND_REFRESH_MINUTES"] = float(os.getenv("RECOMMEND_REFRESH_MINUTES", "60"))
+    recommender.init_app(app)
+
+    # Push channel: events kept per topic for reconnecting clients, the
+    # per-client queue bound, and the SSE keep-alive interval
+    app.config["EVENTS_REPLAY_SIZE"] = int(os.getenv("EVENTS_REPLAY_SIZE", "256"))
+    app.config["EVENTS_QUEUE_SIZE"] = int(os.getenv("EVENTS_QUEUE_SIZE", "1000"))
+    app.config["EVENTS_HEARTBEAT_SECONDS"] = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", "15"))
+    events.init_app(app)
+
+    # Rows fetched from the server-side cursor per chunk of a streamed export
+    app.config["STREAM_BATCH_ROWS"] = int(os.getenv("STREAM_BATCH_ROWS", "1000"))
+    # Most orders POST /c/orders accepts in one batch
+    app.config["ORDER_BATCH_MAX"] = int(os.getenv("ORDER_BATCH_MAX", "500"))
+    # Weekly subscription run: customers per transaction, and the weekdays
+    # orders are delivered on (each meal comes with the drop before it)
+    app.config["SUBSCRIPTION_CHUNK_SIZE"] = int(os.getenv("SUBSCRIPTION_CHUNK_SIZE", "1000"))
+    app.config["SUBSCRIPTION_DELIVERY_DAYS"] = tuple(
+        day.strip().lower() for day in os.getenv("SUBSCRIPTION_DELIVERY_DAYS", "monday,thursday").split(",")
+    )
+    subscriptions.init_app(app)
+
+    # Catalogue response cache: CACHE_BACKEND=memory (per process) or
+    # sqlite (shared by every worker through CACHE_SQLITE_PATH)
+    app.config["CACHE_ENABLED"] = os.getenv("CACHE_ENABLED", "1") == "1"
+    app.config["CACHE_BACKEND"] = os.getenv("CACHE_BACKEND", "memory")
+    app.config["CACHE_TTL"] = float(os.getenv("CACHE_TTL", "60"))
+    app.config["CACHE_MAX_ENTRIES"] = int(os.getenv("CACHE_MAX_ENTRIES", "512"))
+    # Home page /summary aggregates also count orders, messages and
+    # deliveries, so they are only kept briefly
+    app.config["SUMMARY_CACHE_TTL"] = float(os.getenv("SUMMARY_CACHE_TTL", "15"))
+    app.config["CACHE_SQLITE_PATH"] = os.getenv(
+        "CACHE_SQLITE_PATH",
+        os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache", "responses.sqlite3"),
+    )
+    cache.init_app(app)
+
     # Register the routes from each Blueprint with the app object
     # and give a url prefix to each
     app.logger.info("create_app(): registering blueprints with Flask app object.")
@@ -57,6 +157,8 @@ def create_app():
     app.register_blueprint(farmer_routes, url_prefix="/f")
     app.register_blueprint(driver_routes, url_prefix="/d")
     app.register_blueprint(admin_routes, url_prefix="/a")
+    app.register_blueprint(events.event_routes, url_prefix="/events")
+    app.register_blueprint(search.search_routes, url_prefix="/search")
 
     # Don't forget to return the app object
     return app
@@ -0,0 +1,93 @@
+#------------------------------------------------------------
+# Daily order and inventory rollups
+#------------------------------------------------------------
+# Keeps DailyOrderStatus, DailyProduceOrders and DailyFarmerInventory
+# (migration 0005) up to date from Orders, OrderProduce and
+# InventoryEntry, so reports read a few rows per day instead of scanning
+# the raw tables.  Refresh them as a batch job:
+#   flask --app backend_app rollups-refresh [--full]
+# or set ROLLUP_REFRESH_MINUTES to have the API refresh them on a timer.
+# See incremental.py for how the incremental window is chosen.
+import threading
+
+import click
+
+from backend.rollups.incremental import (
+    ROLLUPS,
+    mark_dirty,
+    mark_orders_dirty,
+    refresh,
+    refresh_all,
+    tables,
+)
+
+__all__ = [
+    "ROLLUPS",
+    "init_app",
+    "mark_dirty",
+    "mark_orders_dirty",
+    "refresh",
+    "refresh_all",
+    "run_refresh",
+    "tables",
+]
+
+_scheduler = None
+
+
+# Refresh every rollup on a pooled connection and drop cached responses
+# built from the old rows
+def run_refresh(app, full=False):
+    from backend.cache import cache
+    from backend.db_connection import db
+
+    conn = db.connect()
+    try:
+        results = refresh_all(conn, app.config.get("ROLLUP_LOOKBACK_DAYS", 7), full)
+    except Exception:
+        db.release(conn, discard=True)
+        raise
+    db.release(conn)
+    cache.invalidate(*tables())
+    return results
+
+
+# Daemon thread that refreshes the rollups every `minutes`
+def _start_scheduler(app, minutes):
+    global _scheduler
+    if _scheduler is not None:
+        return
+    stop = threading.Event()
+
+    def loop():
+        while not stop.wait(minutes * 60):
+            try:
+                results = run_refresh(app)
+                app.logger.info(
+                    "rollups: refreshed "
+                    + ", ".join(f"{name} from {r['since']} ({r['rows']} rows)" for name, r in results.items())
+                )
+            except Exception as e:
+                app.logger.error(f"rollups: refresh failed: {e}")
+
+    _scheduler = threading.Thread(target=loop, name="rollup-refresh", daemon=True)
+    _scheduler.stop = stop
+    _scheduler.start()
+
+
+def init_app(app):
+    @app.cli.command("rollups-refresh")
+    @click.option("--full", is_flag=True, help="Rebuild every day instead of the incremental window.")
+    def refresh_command(full):
+        """Refresh the daily order and inventory rollup tables."""
+        for name, result in run_refresh(app, full).items():
+            click.echo(
+                f"{name}: rebuilt from {result['since']}, {result['rows']} rows, "
+                f"high-water {result['highWater']}"
+            )
+
+    # Each refresh locks its watermark row, so overlapping schedulers
+    # (e.g. the debug reloader's watcher process) just take turns
+    minutes = app.config.get("ROLLUP_REFRESH_MINUTES") or 0
+    if minutes > 0:
+        _start_scheduler(app, minutes)
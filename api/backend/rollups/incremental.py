@@ -0,0 +1,178 @@
+#------------------------------------------------------------
+# Incremental refresh of the daily rollup tables
+#------------------------------------------------------------
+# Each rollup rebuilds a window of days from its source tables:
+#   orders     Orders               -> DailyOrderStatus   (day, status)
+#              Orders x OrderProduce -> DailyProduceOrders (day, produce, status)
+#   inventory  InventoryEntry       -> DailyFarmerInventory (day, farmer, produce)
+# keyed on Orders.orderDate and InventoryEntry.dateUpdate.
+#
+# RollupWatermark.highWater is the latest source day already folded in.
+# A refresh deletes and re-aggregates the days from
+#   min(highWater - lookback_days, dirtyFrom)
+# onwards, then moves highWater to the newest source day -- all in one
+# transaction, so readers see either the old or the new window.  The
+# lookback picks up late rows and status changes on recent orders; a
+# write to an older day calls mark_dirty()/mark_orders_dirty() in its own
+# transaction, which pulls dirtyFrom back to that day.  Changes made
+# outside the API are only seen within the lookback, or by a full
+# rebuild (full=True).  Inventory rows without a dateUpdate are skipped.
+from datetime import timedelta
+
+from backend.conditional import bump
+from backend.migrations.explain_check import route_query
+
+
+class Rollup:
+    """One watermark and the rollup tables rebuilt from its source."""
+
+    def __init__(self, name, source_max, tables):
+        self.name = name
+        self.source_max = source_max
+        self.tables = tables      # [(table, INSERT ... SELECT from the window start)]
+
+
+ROLLUPS = {
+    "orders": Rollup(
+        "orders",
+        "SELECT MAX(orderDate) AS high FROM Orders",
+        [
+            (
+                "DailyOrderStatus",
+                """
+                INSERT INTO DailyOrderStatus (`day`, `status`, orders, quantity)
+                SELECT orderDate, status, COUNT(*), COALESCE(SUM(quantityOrdered), 0)
+                FROM Orders
+                WHERE orderDate >= %s
+                GROUP BY orderDate, status
+                """,
+            ),
+            (
+                "DailyProduceOrders",
+                """
+                INSERT INTO DailyProduceOrders (`day`, produceID, `status`, orders, quantity)
+                SELECT o.orderDate, op.produceID, o.status, COUNT(*), COALESCE(SUM(op.quantityOrdered), 0)
+                FROM OrderProduce op
+                JOIN Orders o ON o.orderID = op.orderID
+                WHERE o.orderDate >= %s
+                GROUP BY o.orderDate, op.produceID, o.status
+                """,
+            ),
+        ],
+    ),
+    "inventory": Rollup(
+        "inventory",
+        "SELECT MAX(dateUpdate) AS high FROM InventoryEntry",
+        [
+            (
+                "DailyFarmerInventory",
+                """
+                INSERT INTO DailyFarmerInventory (`day`, farmerID, produceID, entries, quantity)
+                SELECT dateUpdate, farmerID, produceID, COUNT(*), COALESCE(SUM(quantity), 0)
+                FROM InventoryEntry
+                WHERE dateUpdate >= %s
+                GROUP BY dateUpdate, farmerID, produceID
+                """,
+            ),
+        ],
+    ),
+}
+
+# A refresh window must be a range on the source's date index; the
+# rollup table itself is only written
+for rollup in ROLLUPS.values():
+    for table, insert in rollup.tables:
+        route_query(f"rollups-refresh {table}", insert, ("2025-01-01",), scan_ok=(table,))
+
+# Before any real source day: a full rebuild starts here
+EPOCH = "1000-01-01"
+
+
+# Pull a rollup's dirty window back to `day`, in the caller's transaction
+def mark_dirty(cursor, rollup, day):
+    if day is None:
+        return
+    cursor.execute(
+        "UPDATE RollupWatermark SET dirtyFrom = LEAST(COALESCE(dirtyFrom, %s), %s) "
+        "WHERE rollupName = %s",
+        (day, day, rollup),
+    )
+
+
+# Same, for orders about to change: dirties back to their earliest orderDate
+def mark_orders_dirty(cursor, order_ids):
+    order_ids = list(order_ids)
+    if not order_ids:
+        return
+    marks = ", ".join("%s" for _ in order_ids)
+    cursor.execute(
+        f"""
+        UPDATE RollupWatermark w
+        JOIN (SELECT MIN(orderDate) AS d FROM Orders WHERE orderID IN ({marks})) o
+        SET w.dirtyFrom = LEAST(COALESCE(w.dirtyFrom, o.d), o.d)
+        WHERE w.rollupName = 'orders' AND o.d IS NOT NULL
+        """,
+        order_ids,
+    )
+
+
+# First day to rebuild, or EPOCH for a full rebuild
+def window_start(high_water, dirty_from, lookback_days, full=False):
+    if full or high_water is None:
+        return EPOCH
+    start = high_water - timedelta(days=lookback_days)
+    if dirty_from is not None and dirty_from < start:
+        start = dirty_from
+    return start
+
+
+# Rebuild one rollup's window; returns {"since", "highWater", "rows"}
+def refresh(conn, name, lookback_days=7, full=False):
+    rollup = ROLLUPS[name]
+    cursor = conn.cursor()
+    try:
+        # Locks the watermark: concurrent refreshes queue here, and a
+        # write's mark_dirty waits until this window is committed
+        cursor.execute(
+            "SELECT highWater, dirtyFrom FROM RollupWatermark WHERE rollupName = %s FOR UPDATE",
+            (name,),
+        )
+        mark = cursor.fetchone() or {"highWater": None, "dirtyFrom": None}
+        since = window_start(mark["highWater"], mark["dirtyFrom"], lookback_days, full)
+
+        rows = 0
+        for table, insert in rollup.tables:
+            cursor.execute(f"DELETE FROM {table} WHERE `day` >= %s", (since,))
+            cursor.execute(insert, (since,))
+            rows += cursor.rowcount
+
+        cursor.execute(rollup.source_max)
+        high = cursor.fetchone()["high"]
+        cursor.execute(
+            """
+            INSERT INTO RollupWatermark (rollupName, highWater, dirtyFrom, refreshedAt, rowsWritten)
+            VALUES (%s, %s, NULL, UTC_TIMESTAMP(), %s)
+            ON DUPLICATE KEY UPDATE highWater = VALUES(highWater), dirtyFrom = NULL,
+                refreshedAt = VALUES(refreshedAt), rowsWritten = VALUES(rowsWritten)
+            """,
+            (name, high, rows),
+        )
+        bump(cursor, *[table for table, _ in rollup.tables])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    return {"since": str(since), "highWater": str(high) if high else None, "rows": rows}
+
+
+# Refresh every rollup; returns {name: result}
+def refresh_all(conn, lookback_days=7, full=False):
+    return {name: refresh(conn, name, lookback_days, full) for name in ROLLUPS}
+
+
+# Tables each rollup writes, for cache invalidation
+def tables(name=None):
+    names = [name] if name else list(ROLLUPS)
+    return [table for n in names for table, _ in ROLLUPS[n].tables]
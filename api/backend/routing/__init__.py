@@ -0,0 +1,22 @@
+#------------------------------------------------------------
+# Route planning: geocoding, distance matrices and stop ordering
+#------------------------------------------------------------
+from backend.routing.dispatch import dispatch_day, plan_dispatch
+from backend.routing.eta import TrafficModel, attach_etas
+from backend.routing.geocode import DEFAULT_DEPOT, Geocoder
+from backend.routing.optimizer import plan_route, solve
+
+# Shared geocode cache and traffic lookup for the whole API process
+geocoder = Geocoder()
+traffic = TrafficModel()
+
+
+# Point the shared geocoder at the configured depot
+def init_app(app):
+    depot = (
+        app.config.get("DEPOT_LAT", DEFAULT_DEPOT[0]),
+        app.config.get("DEPOT_LNG", DEFAULT_DEPOT[1]),
+    )
+    if depot != geocoder.depot:
+        geocoder.set_depot(depot)
+    traffic.refresh_interval = app.config.get("TRAFFIC_REFRESH_SECONDS", traffic.refresh_interval)
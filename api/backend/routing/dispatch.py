@@ -0,0 +1,229 @@
+#------------------------------------------------------------
+# Fleet-wide dispatch: assign a day's orders across drivers
+#------------------------------------------------------------
+# A capacitated VRP heuristic with time windows, built to handle
+# thousands of orders in seconds:
+#   1. sweep: sort stops by bearing from the depot and cut the circle
+#      into one sector per driver.  Sector sizes follow each driver's
+#      shift length and are capped by vehicle load.
+#   2. route each sector with the single-driver optimizer (optimizer.solve)
+#   3. any stop that pushes a route past the driver's availability
+#      window is moved to the driver with the cheapest feasible
+#      insertion, or reported as unassigned.
+import time
+from datetime import timedelta
+
+import numpy as np
+
+from backend.conditional import bump
+from backend.migrations.explain_check import route_query
+from backend.routing.optimizer import EARTH_RADIUS_KM, solve
+
+
+# Length of an availability window in minutes.  TIME columns arrive as
+# timedelta; an end before the start means the shift runs past midnight.
+def shift_minutes(start, end):
+    def to_minutes(value):
+        if isinstance(value, timedelta):
+            return value.total_seconds() / 60
+        hours, minutes, *seconds = str(value).split(":")
+        return int(hours) * 60 + int(minutes) + (int(seconds[0]) if seconds else 0) / 60
+
+    minutes = to_minutes(end) - to_minutes(start)
+    return minutes if minutes > 0 else minutes + 24 * 60
+
+
+# Elementwise great-circle distance (km) between two arrays of points
+def _haversine(a, b):
+    a = np.radians(np.asarray(a, dtype=float).reshape(-1, 2))
+    b = np.radians(np.asarray(b, dtype=float).reshape(-1, 2))
+    h = (
+        np.sin((b[:, 0] - a[:, 0]) / 2) ** 2
+        + np.cos(a[:, 0]) * np.cos(b[:, 0]) * np.sin((b[:, 1] - a[:, 1]) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(h, 0.0, 1.0)))
+
+
+def _route_minutes(depot, points, route, base_speed_kmh, service_minutes):
+    if not route:
+        return 0.0
+    path = [depot] + [points[i] for i in route]
+    km = float(_haversine(path[:-1], path[1:]).sum())
+    return km / base_speed_kmh * 60 + service_minutes * len(route)
+
+
+# Sort stop indices by bearing from the depot, starting just after the
+# widest empty gap so no sector straddles a dense cluster.
+def _sweep_order(depot, points):
+    pts = np.asarray(points, dtype=float)
+    dy = pts[:, 0] - depot[0]
+    dx = (pts[:, 1] - depot[1]) * np.cos(np.radians(depot[0]))
+    angles = np.arctan2(dy, dx)
+    order = np.argsort(angles)
+    if len(order) > 1:
+        sorted_angles = angles[order]
+        gaps = np.diff(np.append(sorted_angles, sorted_angles[0] + 2 * np.pi))
+        order = np.roll(order, -(int(np.argmax(gaps)) + 1))
+    return order.tolist()
+
+
+# orders:  dicts with orderID, deliveryAddress, quantityOrdered
+# drivers: dicts with DriverID, availStartTime, availEndTime
+def plan_dispatch(orders, drivers, geocoder, depot=None, base_speed_kmh=30.0,
+                  service_minutes=5.0, vehicle_capacity=None, max_passes=10):
+    started = time.perf_counter()
+    depot = depot or geocoder.depot
+    points = geocoder.locate_many([o.get("deliveryAddress") for o in orders])
+    loads = [o.get("quantityOrdered") or 0 for o in orders]
+
+    shifts = [shift_minutes(d["availStartTime"], d["availEndTime"]) for d in drivers]
+    capacity = vehicle_capacity if vehicle_capacity else float("inf")
+
+    routes = [[] for _ in drivers]
+    route_load = [0] * len(drivers)
+    overflow = []
+
+    # 1. sweep into sectors sized by share of total shift time
+    if drivers:
+        total_shift = sum(shifts)
+        targets = np.round(np.cumsum(shifts) / total_shift * len(orders)).astype(int)
+        driver = 0
+        for position, stop in enumerate(_sweep_order(depot, points) if orders else []):
+            while driver < len(drivers) - 1 and position >= targets[driver]:
+                driver += 1
+            if route_load[driver] + loads[stop] <= capacity:
+                routes[driver].append(stop)
+                route_load[driver] += loads[stop]
+            else:
+                overflow.append(stop)
+    else:
+        overflow = list(range(len(orders)))
+
+    # 2. route each sector, then trim stops that run past the shift end
+    minutes = []
+    for d, route in enumerate(routes):
+        if route:
+            order = solve(depot, [points[i] for i in route], max_passes=max_passes)
+            route = [route[i] for i in order]
+        used = _route_minutes(depot, points, route, base_speed_kmh, service_minutes)
+        while route and used > shifts[d]:
+            stop = route.pop()
+            route_load[d] -= loads[stop]
+            overflow.append(stop)
+            used = _route_minutes(depot, points, route, base_speed_kmh, service_minutes)
+        routes[d] = route
+        minutes.append(used)
+
+    # 3. cheapest feasible insertion for the overflow
+    unassigned = []
+    for stop in overflow:
+        best = None
+        for d, route in enumerate(routes):
+            if route_load[d] + loads[stop] > capacity:
+                continue
+            path = [depot] + [points[i] for i in route]
+            to_new = _haversine(path, [points[stop]] * len(path))
+            legs = _haversine(path[:-1], path[1:])
+            # Inserting after path[k]; the last slot appends with no next leg
+            extra = to_new.copy()
+            extra[:-1] += to_new[1:] - legs
+            k = int(np.argmin(extra))
+            added = extra[k] / base_speed_kmh * 60 + service_minutes
+            if minutes[d] + added <= shifts[d] and (best is None or added < best[0]):
+                best = (added, d, k)
+        if best is None:
+            unassigned.append(stop)
+            continue
+        added, d, k = best
+        routes[d].insert(k, stop)
+        route_load[d] += loads[stop]
+        minutes[d] += added
+
+    return {
+        "routes": [
+            {
+                "DriverID": drivers[d]["DriverID"],
+                "orderIDs": [orders[i]["orderID"] for i in route],
+                "stops": len(route),
+                "load": route_load[d],
+                "routeMinutes": round(minutes[d], 1),
+                "shiftMinutes": round(shifts[d], 1),
+            }
+            for d, route in enumerate(routes)
+        ],
+        "unassigned": [orders[i]["orderID"] for i in unassigned],
+        "solveMs": round((time.perf_counter() - started) * 1000, 2),
+    }
+
+
+WRITE_BATCH_SIZE = 500
+
+
+# One UPDATE per batch: SET DriverID = CASE orderID WHEN .. THEN .. END
+def _write_assignments(cursor, assignments):
+    cases = " ".join(["WHEN %s THEN %s"] * len(assignments))
+    placeholders = ", ".join(["%s"] * len(assignments))
+    params = [value for driverID, orderID in assignments for value in (orderID, driverID)]
+    params += [orderID for _, orderID in assignments]
+    cursor.execute(
+        f"UPDATE Orders SET DriverID = CASE orderID {cases} END WHERE orderID IN ({placeholders})",
+        params,
+    )
+
+
+# The day's open orders and available drivers; both must seek on the day
+DAY_ORDERS_SQL = route_query(
+    "POST /a/dispatch",
+    """
+    SELECT orderID, deliveryAddress, quantityOrdered, DriverID
+    FROM Orders
+    WHERE scheduledTime = %s AND status IN ('pending', 'confirmed')
+    ORDER BY orderID
+    """,
+    ("2025-03-01",),
+)
+
+DAY_DRIVERS_SQL = route_query(
+    "POST /a/dispatch",
+    """
+    SELECT DriverID, availStartTime, availEndTime
+    FROM DriverAvailability
+    WHERE `date` = %s AND isAvailable = TRUE
+    ORDER BY DriverID
+    """,
+    ("2025-03-01",),
+)
+
+
+# Load the day's pending/confirmed orders and available drivers, plan,
+# and write every assignment in one transaction.  Orders that fit no
+# driver keep whatever DriverID they had and are listed as unassigned.
+def dispatch_day(conn, day, geocoder, dry_run=False, **options):
+    cursor = conn.cursor()
+    cursor.execute(DAY_ORDERS_SQL, (day,))
+    orders = cursor.fetchall()
+    cursor.execute(DAY_DRIVERS_SQL, (day,))
+    drivers = cursor.fetchall()
+
+    plan = plan_dispatch(orders, drivers, geocoder, **options)
+
+    assignments = [
+        (route["DriverID"], orderID)
+        for route in plan["routes"]
+        for orderID in route["orderIDs"]
+    ]
+    if not dry_run and assignments:
+        try:
+            for i in range(0, len(assignments), WRITE_BATCH_SIZE):
+                _write_assignments(cursor, assignments[i:i + WRITE_BATCH_SIZE])
+            bump(cursor, "Orders")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    cursor.close()
+
+    plan["date"] = str(day)
+    plan["assigned"] = len(assignments)
+    plan["dryRun"] = dry_run
+    return plan
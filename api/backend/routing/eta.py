@@ -0,0 +1,126 @@
+#------------------------------------------------------------
+# Traffic-aware ETAs from the Traffic table
+#------------------------------------------------------------
+# Historical Traffic rows (trafficLevels + timestamp + driverID) are
+# folded into a time-of-day lookup of travel-time multipliers, per
+# driver and fleet-wide.  The lookup lives in memory.  refresh() only
+# reads rows with a locationID above the last one it has seen, so
+# recomputing ETAs on every page refresh never rescans the whole table.
+# Traffic rows are assumed to be inserted with increasing locationID.
+import threading
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# Travel time multiplier for each reported traffic level
+TRAFFIC_MULTIPLIERS = {
+    "low": 1.0,
+    "moderate": 1.3,
+    "high": 1.7,
+    "severe": 2.5,
+}
+
+
+class TrafficModel:
+    """Mean travel-time multiplier per time-of-day bucket."""
+
+    def __init__(self, bucket_minutes=60, min_samples=3, refresh_interval=60):
+        self.bucket_minutes = bucket_minutes
+        self.buckets = (24 * 60) // bucket_minutes
+        self.min_samples = min_samples
+        self.refresh_interval = refresh_interval
+
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._fleet_sum = np.zeros(self.buckets)
+        self._fleet_count = np.zeros(self.buckets)
+        self._driver_sum = {}
+        self._driver_count = {}
+        self.high_water = 0          # last Traffic.locationID folded in
+        self._last_refresh = 0.0
+
+    def bucket(self, moment):
+        return (moment.hour * 60 + moment.minute) // self.bucket_minutes
+
+    # Fold new Traffic rows into the lookup
+    def add_rows(self, rows):
+        with self._lock:
+            for row in rows:
+                level = TRAFFIC_MULTIPLIERS.get(str(row["trafficLevels"]).strip().lower())
+                if level is None or row["timestamp"] is None:
+                    continue
+                b = self.bucket(row["timestamp"])
+                self._fleet_sum[b] += level
+                self._fleet_count[b] += 1
+                driver = row["driverID"]
+                if driver not in self._driver_sum:
+                    self._driver_sum[driver] = np.zeros(self.buckets)
+                    self._driver_count[driver] = np.zeros(self.buckets)
+                self._driver_sum[driver][b] += level
+                self._driver_count[driver][b] += 1
+                self.high_water = max(self.high_water, row["locationID"])
+
+    # Read only the Traffic rows added since the last refresh.
+    # Concurrent callers skip instead of folding the same rows in twice.
+    def refresh(self, conn):
+        if not self._refresh_lock.acquire(blocking=False):
+            return 0
+        try:
+            return self._refresh(conn)
+        finally:
+            self._refresh_lock.release()
+
+    def _refresh(self, conn):
+        cursor = conn.cursor()
+        cursor.execute(
+            """
+            SELECT locationID, timestamp, trafficLevels, driverID
+            FROM Traffic
+            WHERE locationID > %s
+            ORDER BY locationID
+            """,
+            (self.high_water,),
+        )
+        rows = cursor.fetchall()
+        cursor.close()
+        self.add_rows(rows)
+        self._last_refresh = time.monotonic()
+        return len(rows)
+
+    def refresh_if_stale(self, conn):
+        if time.monotonic() - self._last_refresh >= self.refresh_interval:
+            return self.refresh(conn)
+        return 0
+
+    # Per-driver multiplier when there is enough history, else fleet-wide
+    def multiplier(self, driverID, moment):
+        b = self.bucket(moment)
+        with self._lock:
+            counts = self._driver_count.get(driverID)
+            if counts is not None and counts[b] >= self.min_samples:
+                return float(self._driver_sum[driverID][b] / counts[b])
+            if self._fleet_count[b] > 0:
+                return float(self._fleet_sum[b] / self._fleet_count[b])
+        return 1.0
+
+
+# Walk the planned stops from `departure`, adding an ETA to each one.
+# Each leg's free-flow time is scaled by the traffic multiplier for the
+# time of day the leg starts.
+def attach_etas(stops, model, driverID, departure=None,
+                base_speed_kmh=30.0, service_minutes=5.0):
+    clock = departure or datetime.now()
+    started = clock
+    for stop in stops:
+        factor = model.multiplier(driverID, clock)
+        leg_minutes = stop["legDistanceKm"] / base_speed_kmh * 60 * factor
+        clock += timedelta(minutes=leg_minutes)
+
+        stop["trafficMultiplier"] = round(factor, 2)
+        stop["legMinutes"] = round(leg_minutes, 1)
+        stop["eta"] = clock.strftime("%Y-%m-%d %H:%M:%S")
+        stop["etaMinutes"] = round((clock - started).total_seconds() / 60, 1)
+
+        clock += timedelta(minutes=service_minutes)
+    return stops
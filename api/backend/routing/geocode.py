@@ -0,0 +1,83 @@
+#------------------------------------------------------------
+# Address -> (lat, lng) lookup with an in-memory cache
+#------------------------------------------------------------
+# Orders only store a free-text deliveryAddress, and the stack has no
+# geocoding service.  The Geocoder takes a pluggable `provider` callable
+# and caches its answers, so each distinct address is resolved once per
+# process.  Without a provider it falls back to approximate_location(),
+# which places every address at a stable point inside the service area
+# around the depot.  That gives the optimizer consistent geometry until
+# a real provider is configured.
+import hashlib
+import math
+import threading
+from collections import OrderedDict
+
+# Northeastern University, Boston: the default depot
+DEFAULT_DEPOT = (42.3398, -71.0892)
+DEFAULT_SERVICE_RADIUS_KM = 15.0
+
+
+def normalize_address(address):
+    return " ".join((address or "").lower().replace(",", " ").split())
+
+
+# Deterministic stand-in for a geocoder: hash the address to a point
+# uniformly spread over a disc around the depot.
+def approximate_location(address, depot=DEFAULT_DEPOT, radius_km=DEFAULT_SERVICE_RADIUS_KM):
+    digest = hashlib.sha1(normalize_address(address).encode("utf-8")).digest()
+    u = int.from_bytes(digest[:4], "big") / 0xFFFFFFFF
+    v = int.from_bytes(digest[4:8], "big") / 0xFFFFFFFF
+
+    distance_km = radius_km * math.sqrt(u)
+    bearing = 2 * math.pi * v
+
+    lat = depot[0] + (distance_km * math.cos(bearing)) / 111.32
+    lng = depot[1] + (distance_km * math.sin(bearing)) / (111.32 * math.cos(math.radians(depot[0])))
+    return (round(lat, 6), round(lng, 6))
+
+
+class Geocoder:
+    """Thread-safe LRU cache in front of a geocoding provider."""
+
+    def __init__(self, provider=None, depot=DEFAULT_DEPOT, max_entries=50000):
+        self.depot = depot
+        self._custom_provider = provider is not None
+        self.provider = provider or (lambda address: approximate_location(address, depot))
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    # Move the depot; cached approximate locations depend on it
+    def set_depot(self, depot):
+        with self._lock:
+            self.depot = depot
+            if not self._custom_provider:
+                self.provider = lambda address: approximate_location(address, depot)
+                self._cache.clear()
+
+    def locate(self, address):
+        key = normalize_address(address)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return self._cache[key]
+            self.misses += 1
+
+        point = self.provider(address)
+
+        with self._lock:
+            self._cache[key] = point
+            if len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return point
+
+    def locate_many(self, addresses):
+        return [self.locate(address) for address in addresses]
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._cache), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,181 @@
+#------------------------------------------------------------
+# Delivery route optimizer
+#------------------------------------------------------------
+# Orders a driver's stops to keep total driving distance low:
+#   1. geocode each delivery address (cached, see geocode.py)
+#   2. build a haversine distance matrix with numpy
+#   3. seed a tour with nearest-neighbour
+#   4. improve it with 2-opt and Or-opt moves until no move helps
+#
+# Time windows come from Orders.scheduledTime, which is a DATE.  Stops
+# are therefore grouped by scheduled day and the groups are visited
+# earliest first, so no stop is served after one with a later deadline.
+# Within each group the route is optimised freely, starting from where
+# the previous group ended.  Routes are open paths: the driver does not
+# have to return to the depot.
+import time
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+EPSILON = 1e-9
+
+
+# Pairwise great-circle distances (km) between (lat, lng) points
+def distance_matrix(points):
+    pts = np.radians(np.asarray(points, dtype=float).reshape(-1, 2))
+    lat = pts[:, 0][:, None]
+    lng = pts[:, 1][:, None]
+    a = (
+        np.sin((lat - lat.T) / 2) ** 2
+        + np.cos(lat) * np.cos(lat.T) * np.sin((lng - lng.T) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+# Greedy tour: always drive to the closest unvisited node
+def nearest_neighbour(dist, start, nodes):
+    nodes = np.asarray(nodes, dtype=int)
+    visited = np.zeros(len(nodes), dtype=bool)
+    route = [start]
+    current = start
+    for _ in range(len(nodes)):
+        candidates = np.where(visited, np.inf, dist[current, nodes])
+        k = int(np.argmin(candidates))
+        visited[k] = True
+        current = int(nodes[k])
+        route.append(current)
+    return route
+
+
+# 2-opt: reverse route[i..j] whenever that shortens the path.
+# route[0] and route[-1] stay fixed.  Each pass tries every i against
+# all j at once with numpy.
+def two_opt(route, dist, max_passes=50):
+    route = np.asarray(route, dtype=int)
+    n = len(route)
+    for _ in range(max_passes):
+        improved = False
+        for i in range(1, n - 2):
+            a, b = route[i - 1], route[i]
+            c = route[i + 1:n - 1]
+            d = route[i + 2:n]
+            delta = dist[a, c] + dist[b, d] - dist[a, b] - dist[c, d]
+            k = int(np.argmin(delta))
+            if delta[k] < -EPSILON:
+                j = i + 1 + k
+                route[i:j + 1] = route[i:j + 1][::-1].copy()
+                improved = True
+        if not improved:
+            break
+    return route.tolist()
+
+
+# Or-opt: move chains of 1..max_segment stops (optionally reversed) to
+# the cheapest other position on the route.  Ends stay fixed.
+def or_opt(route, dist, max_segment=3, max_passes=50):
+    route = list(route)
+    for _ in range(max_passes):
+        improved = False
+        for seg_len in range(1, max_segment + 1):
+            i = 1
+            while i + seg_len < len(route):
+                prev, first = route[i - 1], route[i]
+                last, nxt = route[i + seg_len - 1], route[i + seg_len]
+                removal_gain = dist[prev, first] + dist[last, nxt] - dist[prev, nxt]
+
+                rest = route[:i] + route[i + seg_len:]
+                p = np.asarray(rest[:-1])
+                q = np.asarray(rest[1:])
+                forward = dist[p, first] + dist[last, q] - dist[p, q]
+                backward = dist[p, last] + dist[first, q] - dist[p, q]
+
+                k_fwd = int(np.argmin(forward))
+                k_bwd = int(np.argmin(backward))
+                if forward[k_fwd] <= backward[k_bwd]:
+                    k, cost, segment = k_fwd, forward[k_fwd], route[i:i + seg_len]
+                else:
+                    k, cost, segment = k_bwd, backward[k_bwd], route[i:i + seg_len][::-1]
+
+                if cost < removal_gain - EPSILON:
+                    route = rest[:k + 1] + segment + rest[k + 1:]
+                    improved = True
+                else:
+                    i += 1
+        if not improved:
+            break
+    return route
+
+
+def path_length(route, dist):
+    route = np.asarray(route, dtype=int)
+    return float(dist[route[:-1], route[1:]].sum()) if len(route) > 1 else 0.0
+
+
+# Order stops given a start point and one (lat, lng) per stop.
+# `windows` is an optional list of sortable deadlines, one per stop
+# (None = no deadline, visited last).  Returns stop indices in visit order.
+def solve(start_point, stop_points, windows=None, max_passes=50):
+    n = len(stop_points)
+    if n == 0:
+        return []
+
+    # Node 0 is the start, 1..n are stops, n+1 is a free "end anywhere"
+    # node at zero distance from everything, which turns the fixed-end
+    # improvement moves into open-path moves.
+    dist = np.zeros((n + 2, n + 2))
+    dist[:n + 1, :n + 1] = distance_matrix([start_point] + list(stop_points))
+    end = n + 1
+
+    groups = {}
+    for stop_index in range(n):
+        window = windows[stop_index] if windows else None
+        groups.setdefault(window, []).append(stop_index + 1)
+    ordered_windows = sorted(groups, key=lambda w: (w is None, w if w is not None else 0))
+
+    order = []
+    current = 0
+    for window in ordered_windows:
+        route = nearest_neighbour(dist, current, groups[window]) + [end]
+        route = two_opt(route, dist, max_passes=max_passes)
+        route = or_opt(route, dist, max_passes=max_passes)
+        route = two_opt(route, dist, max_passes=max_passes)
+        order.extend(route[1:-1])
+        current = route[-2]
+
+    return [node - 1 for node in order]
+
+
+# Plan a driver's route over order rows (dicts with deliveryAddress and
+# scheduledTime).  Returns the rows in visit order, annotated with
+# sequence, coordinates and leg / cumulative distances.
+def plan_route(stops, geocoder, depot=None, max_passes=50):
+    started = time.perf_counter()
+    depot = depot or geocoder.depot
+
+    points = geocoder.locate_many([stop.get("deliveryAddress") for stop in stops])
+    windows = [stop.get("scheduledTime") for stop in stops]
+    order = solve(depot, points, windows, max_passes=max_passes)
+
+    planned = []
+    total_km = 0.0
+    previous = depot
+    for sequence, stop_index in enumerate(order, start=1):
+        point = points[stop_index]
+        leg_km = float(distance_matrix([previous, point])[0, 1])
+        total_km += leg_km
+        planned.append({
+            **stops[stop_index],
+            "sequence": sequence,
+            "lat": point[0],
+            "lng": point[1],
+            "legDistanceKm": round(leg_km, 3),
+            "cumulativeDistanceKm": round(total_km, 3),
+        })
+        previous = point
+
+    return {
+        "stops": planned,
+        "totalDistanceKm": round(total_km, 3),
+        "solveMs": round((time.perf_counter() - started) * 1000, 2),
+    }
@@ -0,0 +1,29 @@
+#------------------------------------------------------------
+# Server-side search over recipes, produce and ingredients
+#------------------------------------------------------------
+# An in-memory inverted index (index.py) behind GET /search
+# (search_routes.py).  It is built on the first search and kept current
+# incrementally: write routes call refresh() after they commit, e.g.
+#   search.refresh(cursor, "Recipe", [recipeID])
+from flask import current_app
+
+from backend.search.index import DOC_TYPES, DocType, SearchIndex, tokenize
+from backend.search.search_routes import search_index, search_routes
+
+__all__ = [
+    "DOC_TYPES",
+    "DocType",
+    "SearchIndex",
+    "refresh",
+    "search_index",
+    "search_routes",
+    "tokenize",
+]
+
+
+# Re-index rows of `table` after a committed write; never fails the write
+def refresh(cursor, table, ids=()):
+    try:
+        search_index.refresh(cursor, table, ids)
+    except Exception as e:
+        current_app.logger.warning(f"search: refresh of {table} {list(ids)} failed: {e}")
@@ -0,0 +1,362 @@
+#------------------------------------------------------------
+# In-memory inverted index over recipes, produce and ingredients
+#------------------------------------------------------------
+# Each row becomes a document; its text fields are tokenized into
+#   postings   term -> {doc: weight}   (weight = sum of field weights)
+#   terms      sorted vocabulary, so a prefix is one bisect range
+#   variants   term with one letter deleted -> terms, so a typo is found
+#              by looking up the query's own one-letter deletions
+#              (symmetric delete) and checking edit distance <= 1
+# A query token matches a term exactly, as a prefix ("chick" ->
+# "chicken"), or with one typo ("chiken" -> "chicken"); each kind counts
+# for less than the one before.  Every token must match (AND).  A
+# document's text score is then boosted by its popularity, so equally
+# relevant recipes come back most popular first.
+#
+# The index follows the tables with TableVersion (migration 0004):
+#   - write routes call refresh(cursor, "Recipe", [recipeID]) after they
+#     commit, which re-reads just those rows
+#   - sync() compares the tables' versions before every search and
+#     rebuilds a type whose table was changed some other way (another
+#     worker, a batch job, a SQL console)
+import bisect
+import heapq
+import re
+import threading
+import time
+from collections import defaultdict
+
+from backend.conditional import table_versions
+from backend.migrations.explain_check import route_query
+
+PREFIX_FACTOR = 0.7
+TYPO_FACTOR = 0.5
+MAX_EXPANSIONS = 50       # prefix / typo terms tried per query token
+POPULARITY_BOOST = 0.5    # most popular document scores up to 1.5x
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    return _TOKEN.findall(str(text or "").lower())
+
+
+def _deletions(term):
+    return {term[:i] + term[i + 1:] for i in range(len(term))}
+
+
+# Optimal string alignment distance, stopping early once it exceeds 1
+def _within_one_edit(a, b):
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) == len(b):
+        rest = a[i + 1:] == b[i + 1:]
+        swapped = i + 1 < len(a) and a[i] == b[i + 1] and a[i + 1] == b[i] and a[i + 2:] == b[i + 2:]
+        return rest or swapped
+    return a[i:] == b[i + 1:]
+
+
+class DocType:
+    """How one table is indexed: text fields, facets and ranking column."""
+
+    def __init__(self, table, key, columns, fields, facets=(), popularity=None, display=()):
+        self.table = table
+        self.key = key
+        self.columns = columns
+        self.fields = fields
+        self.facets = facets
+        self.popularity = popularity
+        self.display = display
+
+    def select(self, where=""):
+        return f"SELECT {', '.join(self.columns)} FROM {self.table} {where}"
+
+    def select_ids(self, count):
+        return self.select(f"WHERE {self.key} IN ({', '.join('%s' for _ in range(count))})")
+
+
+DOC_TYPES = {
+    "recipe": DocType(
+        "Recipe",
+        "recipeID",
+        ["recipeID", "name", "description", "nutritionInfo", "cuisineType",
+         "suitibleFor", "isActive", "popularityScore"],
+        {"name": 3.0, "cuisineType": 2.0, "description": 1.0, "nutritionInfo": 1.0},
+        facets=("cuisineType", "suitibleFor", "isActive"),
+        popularity="popularityScore",
+        display=("recipeID", "name", "description", "cuisineType", "suitibleFor",
+                 "isActive", "popularityScore"),
+    ),
+    "produce": DocType(
+        "Produce",
+        "produceID",
+        ["produceID", "name", "unit"],
+        {"name": 3.0, "unit": 1.0},
+        facets=("unit",),
+        display=("produceID", "name", "unit"),
+    ),
+    "ingredient": DocType(
+        "Ingredient",
+        "ingredientID",
+        ["ingredientID", "name", "portionSize", "recipeID"],
+        {"name": 3.0, "portionSize": 1.0},
+        facets=("portionSize",),
+        display=("ingredientID", "name", "portionSize", "recipeID"),
+    ),
+}
+
+# A rebuild reads each table whole; a refresh re-reads rows by key
+for doc_type in DOC_TYPES.values():
+    route_query("GET /search", doc_type.select(), scan_ok=(doc_type.table,))
+    route_query(f"search refresh {doc_type.table}", doc_type.select_ids(1), (1,))
+
+
+# BOOLEAN columns come back as 0 / 1
+def _facet_value(value):
+    if isinstance(value, (bool, int)) and value in (0, 1):
+        return "true" if value else "false"
+    return str(value)
+
+
+class SearchIndex:
+    """Inverted index with prefix and one-typo matching, and facets."""
+
+    def __init__(self, doc_types=DOC_TYPES):
+        self.doc_types = doc_types
+        self.docs = {}                       # (type, id) -> document
+        self.postings = defaultdict(dict)    # term -> {(type, id): weight}
+        self.terms = []                      # sorted keys of postings
+        self.variants = defaultdict(set)     # one-letter deletion -> terms
+        self.versions = {}                   # table -> TableVersion indexed
+        self._top_popularity = {}            # type -> highest popularity seen
+        self._lock = threading.RLock()
+
+    # ---------------- maintenance ----------------
+    def _add_term(self, term, doc_key, weight):
+        if term not in self.postings:
+            bisect.insort(self.terms, term)
+            if len(term) >= 3:
+                for variant in _deletions(term):
+                    self.variants[variant].add(term)
+        posting = self.postings[term]
+        posting[doc_key] = posting.get(doc_key, 0.0) + weight
+
+    def _drop_term(self, term, doc_key):
+        posting = self.postings.get(term)
+        if posting is None:
+            return
+        posting.pop(doc_key, None)
+        if not posting:
+            del self.postings[term]
+            del self.terms[bisect.bisect_left(self.terms, term)]
+            if len(term) >= 3:
+                for variant in _deletions(term):
+                    self.variants[variant].discard(term)
+                    if not self.variants[variant]:
+                        del self.variants[variant]
+
+    def remove(self, type_name, doc_id):
+        with self._lock:
+            doc = self.docs.pop((type_name, doc_id), None)
+            if doc is not None:
+                for term in doc["terms"]:
+                    self._drop_term(term, (type_name, doc_id))
+
+    def put(self, type_name, row):
+        doc_type = self.doc_types[type_name]
+        doc_id = row[doc_type.key]
+        terms = defaultdict(float)
+        for field, weight in doc_type.fields.items():
+            for term in tokenize(row.get(field)):
+                terms[term] += weight
+        doc = {
+            "type": type_name,
+            "id": doc_id,
+            "terms": dict(terms),
+            "display": {f: row.get(f) for f in doc_type.display},
+            "facets": {f: _facet_value(row.get(f)) for f in doc_type.facets if row.get(f) is not None},
+            "popularity": float(row.get(doc_type.popularity) or 0) if doc_type.popularity else 0.0,
+            "sortName": str(row.get("name") or "").lower(),
+        }
+        doc["facet_keys"] = {f: v.lower() for f, v in doc["facets"].items()}
+        with self._lock:
+            if doc["popularity"] > self._top_popularity.get(type_name, 0.0):
+                self._top_popularity[type_name] = doc["popularity"]
+            self.remove(type_name, doc_id)
+            self.docs[(type_name, doc_id)] = doc
+            for term, weight in doc["terms"].items():
+                self._add_term(term, (type_name, doc_id), weight)
+
+    # Replace every document of a type with `rows`
+    def _replace_type(self, type_name, rows, version):
+        with self._lock:
+            for doc_key in [k for k in self.docs if k[0] == type_name]:
+                self.remove(*doc_key)
+            self._top_popularity.pop(type_name, None)
+            for row in rows:
+                self.put(type_name, row)
+            self.versions[self.doc_types[type_name].table] = version
+
+    def _read_versions(self, cursor, tables):
+        try:
+            versions = table_versions(cursor, tables)
+        except Exception:
+            # TableVersion not migrated yet: build once, never track
+            return {t: None for t in tables}
+        return {t: versions.get(t, (0, None))[0] for t in tables}
+
+    # Rebuild any type whose table changed since it was indexed
+    def sync(self, cursor):
+        tables = sorted({t.table for t in self.doc_types.values()})
+        current = self._read_versions(cursor, tables)
+        for type_name, doc_type in self.doc_types.items():
+            table = doc_type.table
+            if table in self.versions and (current[table] is None or self.versions[table] == current[table]):
+                continue
+            cursor.execute(doc_type.select())
+            self._replace_type(type_name, cursor.fetchall(), current[table])
+
+    # Re-read the given rows after a committed write.  When that write's
+    # bump is the only change since the last sync, the index is current
+    # again without a rebuild; `ids` may be empty for writes that change
+    # no indexed column (e.g. stock levels).
+    def refresh(self, cursor, table, ids=()):
+        types = [name for name, t in self.doc_types.items() if t.table == table]
+        if not types or table not in self.versions:
+            return
+        ids = sorted(set(ids))
+        fetched = {}
+        for type_name in types:
+            doc_type = self.doc_types[type_name]
+            if ids:
+                cursor.execute(doc_type.select_ids(len(ids)), ids)
+                fetched[type_name] = cursor.fetchall()
+        version = self._read_versions(cursor, [table])[table]
+
+        with self._lock:
+            for type_name, rows in fetched.items():
+                key = self.doc_types[type_name].key
+                found = {row[key] for row in rows}
+                for row in rows:
+                    self.put(type_name, row)
+                for doc_id in ids:
+                    if doc_id not in found:
+                        self.remove(type_name, doc_id)
+            known = self.versions.get(table)
+            if known is not None and version == known + 1:
+                self.versions[table] = version
+
+    # ---------------- queries ----------------
+    # {(type, id): score} for documents matching one query token
+    def _match_token(self, token):
+        matches = {}
+
+        def take(term, factor):
+            for doc_key, weight in self.postings[term].items():
+                score = weight * factor
+                if score > matches.get(doc_key, 0.0):
+                    matches[doc_key] = score
+
+        if token in self.postings:
+            take(token, 1.0)
+        if len(token) >= 2:
+            start = bisect.bisect_left(self.terms, token)
+            for term in self.terms[start:start + MAX_EXPANSIONS + 1]:
+                if not term.startswith(token):
+                    break
+                if term != token:
+                    take(term, PREFIX_FACTOR)
+        if len(token) >= 4:
+            candidates = set(self.variants.get(token, ()))
+            for variant in _deletions(token):
+                if variant in self.postings:
+                    candidates.add(variant)
+                candidates |= self.variants.get(variant, set())
+            candidates.discard(token)
+            for term in sorted(candidates)[:MAX_EXPANSIONS]:
+                if _within_one_edit(token, term):
+                    take(term, TYPO_FACTOR)
+        return matches
+
+    # `types` limits the search to some document types (default: all)
+    def search(self, query="", types=None, filters=None, limit=20, offset=0):
+        started = time.perf_counter()
+        types = set(types or self.doc_types)
+        filters = {f: str(v).lower() for f, v in (filters or {}).items()}
+        tokens = tokenize(query)
+
+        with self._lock:
+            if tokens:
+                scores = None
+                for token in dict.fromkeys(tokens):
+                    matches = self._match_token(token)
+                    if scores is None:
+                        scores = matches
+                    else:
+                        scores = {k: s + matches[k] for k, s in scores.items() if k in matches}
+                    if not scores:
+                        break
+            else:
+                scores = {k: 1.0 for k in self.docs}
+
+            facet_fields = sorted({
+                f for name, t in self.doc_types.items()
+                if name in types for f in t.facets
+            })
+            # One pass over the matches.  A document failing no filter is
+            # a hit and counts toward every facet; one failing a single
+            # filter still counts toward that facet, so its other values
+            # stay selectable.
+            counts = {f: defaultdict(int) for f in facet_fields}
+            type_counts = defaultdict(int)
+            hits = []
+            for doc_key, score in scores.items():
+                if doc_key[0] not in types:
+                    continue
+                doc = self.docs[doc_key]
+                keys = doc["facet_keys"]
+                failed = [f for f, v in filters.items() if keys.get(f) != v]
+                if not failed:
+                    top = self._top_popularity.get(doc["type"], 0.0)
+                    if top > 0:
+                        score *= 1 + POPULARITY_BOOST * doc["popularity"] / top
+                    hits.append((-score, doc["sortName"], doc["type"], doc["id"], doc))
+                    type_counts[doc["type"]] += 1
+                    for f, value in doc["facets"].items():
+                        if f in counts:
+                            counts[f][value] += 1
+                elif len(failed) == 1 and failed[0] in counts and failed[0] in doc["facets"]:
+                    counts[failed[0]][doc["facets"][failed[0]]] += 1
+
+        facets = {
+            f: dict(sorted(c.items(), key=lambda kv: (-kv[1], kv[0])))
+            for f, c in counts.items()
+        }
+        if len(types) > 1:
+            facets["type"] = dict(type_counts)
+
+        page = heapq.nsmallest(offset + limit, hits)[offset:]
+        return {
+            "query": query,
+            "types": sorted(types),
+            "total": len(hits),
+            "results": [
+                dict(doc["display"], type=doc["type"], score=round(-neg_score, 3))
+                for neg_score, _, _, _, doc in page
+            ],
+            "facets": facets,
+            "tookMs": round((time.perf_counter() - started) * 1000, 2),
+        }
+
+    def stats(self):
+        with self._lock:
+            return {
+                "documents": len(self.docs),
+                "terms": len(self.terms),
+                "versions": dict(self.versions),
+            }
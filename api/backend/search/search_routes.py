@@ -0,0 +1,48 @@
+#------------------------------------------------------------
+# GET /search: full-text search with facets
+#------------------------------------------------------------
+# GET /search?q=chiken%20curry&type=recipe&cuisineType=asian&limit=10
+#   q        words to match (prefixes and single typos allowed); empty
+#            lists everything, most popular first
+#   type     recipe, produce and/or ingredient, comma-separated
+#            (default: all three)
+#   <facet>  exact-match filters: cuisineType, suitibleFor, isActive
+#            (recipes), unit (produce), portionSize (ingredients)
+#   limit / offset   page through the ranked results (limit <= 100)
+# The response carries the total, one page of results and, per facet,
+# the count of matches for each value.
+from flask import Blueprint, jsonify, request
+
+from backend.db_connection import db
+from backend.search.index import DOC_TYPES, SearchIndex
+
+search_routes = Blueprint("search_routes", __name__)
+
+# Shared by every request in this process
+search_index = SearchIndex()
+
+MAX_LIMIT = 100
+
+
+@search_routes.route("/", methods=["GET"], strict_slashes=False)
+def search():
+    try:
+        types = [t.strip() for t in request.args.get("type", "").split(",") if t.strip()] or list(DOC_TYPES)
+        unknown = [t for t in types if t not in DOC_TYPES]
+        if unknown:
+            return jsonify({"error": f"type must be one of {', '.join(DOC_TYPES)}"}), 400
+        limit = max(1, min(request.args.get("limit", 20, type=int), MAX_LIMIT))
+        offset = max(0, request.args.get("offset", 0, type=int))
+        facets = {f for name in types for f in DOC_TYPES[name].facets}
+        filters = {f: v for f, v in request.args.items() if f in facets and v != ""}
+
+        cursor = db.get_db().cursor()
+        search_index.sync(cursor)
+        cursor.close()
+
+        result = search_index.search(request.args.get("q", ""), types, filters, limit, offset)
+        result.update(limit=limit, offset=offset)
+        return jsonify(result), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
@@ -0,0 +1,105 @@
+#------------------------------------------------------------
+# Streaming JSON responses for large result sets
+#------------------------------------------------------------
+# A normal route does fetchall(), copies the rows into a second list
+# and jsonify()s it, so the whole result exists three times in memory.
+# stream_query() instead runs the query on an unbuffered server-side
+# cursor (SSDictCursor) and writes the response a batch of rows at a
+# time, so an export of every inventory entry or order uses the same
+# memory as an export of ten.
+#
+# Rows are encoded by the app's JSON provider (json_provider.py), so
+# an export formats values exactly like the paginated list routes.
+#
+# Two body formats:
+#   json    (default)  one JSON array, written incrementally
+#   ndjson             one JSON object per line; pick it with
+#                      ?format=ndjson or Accept: application/x-ndjson
+#
+# The query runs on its own pooled connection, not the request's
+# db.get_db() one: the response body is generated after the view
+# returns, and an unbuffered cursor keeps the connection busy until the
+# last row has been read.
+from flask import Response, current_app, request
+from pymysql import cursors
+
+from backend.db_connection import db
+from backend.json_provider import dumps_bytes
+
+STREAM_BATCH_ROWS = 1000
+
+NDJSON = "application/x-ndjson"
+
+
+def wants_ndjson():
+    if request.args.get("format"):
+        return request.args["format"] == "ndjson"
+    best = request.accept_mimetypes.best_match(["application/json", NDJSON])
+    return best == NDJSON
+
+
+def _json_chunks(cursor, batch):
+    yield b"["
+    first = True
+    while True:
+        rows = cursor.fetchmany(batch)
+        if not rows:
+            break
+        # Encode the batch as one list and drop its brackets
+        body = dumps_bytes(rows)[1:-1]
+        yield body if first else b"," + body
+        first = False
+    yield b"]\n"
+
+
+def _ndjson_chunks(cursor, batch):
+    while True:
+        rows = cursor.fetchmany(batch)
+        if not rows:
+            break
+        yield b"".join(dumps_bytes(row) + b"\n" for row in rows)
+
+
+# Run `sql` and stream the rows back as the response body.  The query is
+# executed before returning, so SQL and pool errors still reach the
+# route's own error handling; only errors mid-stream cut the body short.
+def stream_query(sql, params=(), ndjson=None, batch=None):
+    if ndjson is None:
+        ndjson = wants_ndjson()
+    batch = batch or current_app.config.get("STREAM_BATCH_ROWS", STREAM_BATCH_ROWS)
+
+    conn = db.connect()
+    try:
+        cursor = conn.cursor(cursors.SSDictCursor)
+        cursor.execute(sql, params)
+    except Exception:
+        db.release(conn, discard=True)
+        raise
+
+    chunks = _ndjson_chunks if ndjson else _json_chunks
+    released = []
+
+    def release(discard):
+        if released:
+            return
+        released.append(True)
+        try:
+            cursor.close()
+        except Exception:
+            discard = True
+        db.release(conn, discard=discard)
+
+    def generate():
+        finished = False
+        try:
+            yield from chunks(cursor, batch)
+            finished = True
+        finally:
+            # A client that disconnects part-way leaves unread rows on the
+            # connection; it cannot be reused, so drop it from the pool
+            release(discard=not finished)
+
+    response = Response(generate(), mimetype=NDJSON if ndjson else "application/json")
+    # Covers a body that is never iterated at all (e.g. HEAD)
+    response.call_on_close(lambda: release(discard=True))
+    return response
@@ -0,0 +1,359 @@
+#------------------------------------------------------------
+# Weekly subscription orders from meal plans
+#------------------------------------------------------------
+# Turns every meal plan that is active in a given week into orders:
+#   mealPlanRecipe slots (plan, weekday, recipe)
+#     x RecipeProduce (recipe, produce, amountNeeded)
+#     -> produce quantities per customer and delivery date
+# Each slot is delivered on the latest delivery weekday on or before it
+# (DELIVERY_WEEKDAYS, Monday and Thursday by default), so a customer gets
+# at most one order per delivery date, holding every produce line and
+# recipe that delivery covers.
+#
+# Customers are processed in chunks (keyset on customerID), so memory is
+# bounded by the chunk size, not the number of subscribers.  Each chunk is
+# one transaction through orders.create_orders(): stock is reserved and
+# the chunk's orders are written together.  When produce runs short, the
+# orders that would overdraw it are dropped (first come, first served by
+# customerID) and reported as skipped, and the rest of the chunk is
+# retried; any other failure rolls back just that chunk, is reported, and
+# the run carries on.
+# SubscriptionOrder remembers which (customer, delivery date) already has
+# an order, so re-running a week after restocking only fills the gaps.
+#
+# Run it with:
+#   flask --app backend_app subscriptions-run [--week 2025-03-03] [--dry-run]
+# or POST /a/subscriptions/run.
+from collections import defaultdict
+from datetime import date, timedelta
+
+import click
+import pandas as pd
+
+from backend.conditional import bump
+from backend.orders import OrderError, StockError, create_orders
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+DELIVERY_WEEKDAYS = ("monday", "thursday")
+CHUNK_SIZE = 1000
+SAMPLE_SIZE = 20          # skipped deliveries listed in a run's summary
+
+
+def week_start(day=None):
+    day = day or date.today()
+    return day - timedelta(days=day.weekday())
+
+
+# Delivery weekday index for each meal weekday index
+def delivery_map(delivery_weekdays=DELIVERY_WEEKDAYS):
+    drops = sorted(WEEKDAYS.index(d.lower()) for d in delivery_weekdays)
+    # Meals before the week's first drop come with the first drop
+    return {day: max([d for d in drops if d <= day] or [drops[0]]) for day in range(7)}
+
+
+def _frame(cursor, sql, params, columns):
+    cursor.execute(sql, params)
+    return pd.DataFrame(cursor.fetchall(), columns=columns)
+
+
+# Next chunk of customers with a plan overlapping the week
+def active_customers(cursor, start, end, after, limit):
+    cursor.execute(
+        """
+        SELECT DISTINCT customerID
+        FROM mealPlan
+        WHERE customerID > %s
+          AND startDate <= %s
+          AND (endDate IS NULL OR endDate >= %s)
+        ORDER BY customerID
+        LIMIT %s
+        """,
+        (after, end, start, limit),
+    )
+    return [row["customerID"] for row in cursor.fetchall()]
+
+
+def recipe_produce(cursor):
+    return _frame(
+        cursor,
+        "SELECT recipeID, produceID, amountNeeded FROM RecipeProduce",
+        (),
+        ["recipeID", "produceID", "amountNeeded"],
+    )
+
+
+# Rows of (customer, delivery date, produce, quantity) and of
+# (customer, delivery date, recipe) for one chunk of customers
+def expand_chunk(cursor, customers, start, recipes_produce, drops):
+    end = start + timedelta(days=6)
+    marks = ", ".join("%s" for _ in customers)
+    slots = _frame(
+        cursor,
+        f"""
+        SELECT mp.customerID, mp.startDate, mp.endDate, mpr.day AS weekday, mpr.recipeID
+        FROM mealPlan mp
+        JOIN mealPlanRecipe mpr ON mpr.mealPlanID = mp.mealPlanId
+        WHERE mp.customerID IN ({marks})
+          AND mp.startDate <= %s
+          AND (mp.endDate IS NULL OR mp.endDate >= %s)
+        """,
+        list(customers) + [end, start],
+        ["customerID", "startDate", "endDate", "weekday", "recipeID"],
+    )
+    keys = ["customerID", "deliveryDate"]
+    if slots.empty:
+        return pd.DataFrame(columns=keys + ["produceID", "quantity"]), pd.DataFrame(columns=keys + ["recipeID"])
+
+    # Date each slot in this week and keep those inside its plan
+    weekday = slots["weekday"].str.lower().map({d: i for i, d in enumerate(WEEKDAYS)})
+    slots = slots[weekday.notna()].assign(weekday=weekday.dropna().astype(int))
+    week = pd.Timestamp(start)
+    day = week + pd.to_timedelta(slots["weekday"], unit="D")
+    plan_start = pd.to_datetime(slots["startDate"])
+    plan_end = pd.to_datetime(slots["endDate"]).fillna(pd.Timestamp.max)
+    slots = slots[(day >= plan_start) & (day <= plan_end)]
+    slots = slots.assign(deliveryDate=week + pd.to_timedelta(slots["weekday"].map(drops), unit="D"))
+
+    recipes = slots[keys + ["recipeID"]].drop_duplicates().sort_values(keys + ["recipeID"])
+    lines = (
+        slots.merge(recipes_produce, on="recipeID")
+        .groupby(keys + ["produceID"], as_index=False)["amountNeeded"]
+        .sum()
+        .rename(columns={"amountNeeded": "quantity"})
+    )
+    return lines, recipes
+
+
+# Latest delivery address on file per customer (Customer has no address)
+def delivery_addresses(cursor, customers):
+    marks = ", ".join("%s" for _ in customers)
+    cursor.execute(
+        f"""
+        SELECT o.customerID, o.deliveryAddress
+        FROM Orders o
+        JOIN (
+            SELECT customerID, MAX(orderID) AS orderID
+            FROM Orders
+            WHERE customerID IN ({marks})
+            GROUP BY customerID
+        ) latest ON latest.orderID = o.orderID
+        """,
+        list(customers),
+    )
+    return {row["customerID"]: row["deliveryAddress"] for row in cursor.fetchall()}
+
+
+def already_ordered(cursor, customers, start):
+    marks = ", ".join("%s" for _ in customers)
+    cursor.execute(
+        f"""
+        SELECT customerID, deliveryDate FROM SubscriptionOrder
+        WHERE customerID IN ({marks}) AND deliveryDate BETWEEN %s AND %s
+        """,
+        list(customers) + [start, start + timedelta(days=6)],
+    )
+    return {(row["customerID"], row["deliveryDate"]) for row in cursor.fetchall()}
+
+
+# Build orders.create_orders() input for one chunk.  The frames are read
+# column-wise once; a per-group pandas loop costs more than the SQL.
+def chunk_orders(lines, recipes, addresses, done):
+    produce = defaultdict(dict)
+    for customer_id, delivery, produce_id, quantity in zip(
+        lines["customerID"].tolist(),
+        pd.to_datetime(lines["deliveryDate"]).dt.date.tolist(),
+        lines["produceID"].tolist(),
+        lines["quantity"].tolist(),
+    ):
+        produce[(int(customer_id), delivery)][int(produce_id)] = int(quantity)
+    covered = defaultdict(list)
+    for customer_id, delivery, recipe_id in zip(
+        recipes["customerID"].tolist(),
+        pd.to_datetime(recipes["deliveryDate"]).dt.date.tolist(),
+        recipes["recipeID"].tolist(),
+    ):
+        covered[(int(customer_id), delivery)].append(int(recipe_id))
+
+    orders = []
+    keys = []
+    skipped = []
+    for customer_id, delivery in sorted(produce):
+        if (customer_id, delivery) in done:
+            continue
+        if customer_id not in addresses:
+            skipped.append({"customerID": customer_id, "deliveryDate": str(delivery), "reason": "no delivery address"})
+            continue
+        orders.append({
+            "customerID": customer_id,
+            "deliveryAddress": addresses[customer_id],
+            "scheduledTime": delivery,
+            "produce": produce[(customer_id, delivery)],
+            "ingredients": {},
+            "recipes": covered[(customer_id, delivery)],
+        })
+        keys.append((customer_id, delivery))
+    return orders, keys, skipped
+
+
+# Drop the orders that would overdraw the short items in a StockError.
+# Orders are served in (customerID, delivery date) order while the stock
+# locked by create_orders() lasts; returns (orders, keys, skipped).
+def fit_stock(orders, keys, short):
+    remaining = {}
+    for error in short:
+        for column in ("produceID", "ingredientID"):
+            if column in error:
+                remaining[(column, error[column])] = error["available"]
+
+    kept, kept_keys, skipped = [], [], []
+    for order, key in zip(orders, keys):
+        needs = {}
+        for column, field in (("produceID", "produce"), ("ingredientID", "ingredients")):
+            for item_id, qty in order[field].items():
+                if (column, item_id) in remaining:
+                    needs[(column, item_id)] = qty
+        lacking = [item for item, qty in needs.items() if remaining[item] < qty]
+        if lacking:
+            column, item_id = lacking[0]
+            skipped.append({
+                "customerID": key[0],
+                "deliveryDate": str(key[1]),
+                "reason": f"not enough stock for {column} {item_id}",
+            })
+            continue
+        for item, qty in needs.items():
+            remaining[item] -= qty
+        kept.append(order)
+        kept_keys.append(key)
+    return kept, kept_keys, skipped
+
+
+# Write one chunk's orders; returns (order IDs, skipped).  A StockError is
+# raised before anything is written and the stock rows stay locked, so the
+# trimmed chunk is retried in the same transaction.
+def write_chunk(cursor, orders, keys, attempts=3):
+    skipped = []
+    for attempt in range(attempts):
+        if not orders:
+            return [], skipped
+        try:
+            order_ids = create_orders(cursor, orders)
+        except StockError as e:
+            if attempt == attempts - 1:
+                raise
+            orders, keys, dropped = fit_stock(orders, keys, e.errors)
+            skipped += dropped
+            continue
+        cursor.executemany(
+            "INSERT INTO SubscriptionOrder (customerID, deliveryDate, orderID) VALUES (%s, %s, %s)",
+            [(c, d, o) for (c, d), o in zip(keys, order_ids)],
+        )
+        return order_ids, skipped
+
+
+# Generate the week's subscription orders; returns a summary of the run
+def run(conn, start=None, chunk_size=CHUNK_SIZE, delivery_weekdays=DELIVERY_WEEKDAYS,
+        dry_run=False, log=None):
+    start = week_start(start)
+    end = start + timedelta(days=6)
+    drops = delivery_map(delivery_weekdays)
+    summary = {
+        "weekStart": str(start),
+        "customers": 0,
+        "ordersCreated": 0,
+        "chunksFailed": 0,
+        "skipped": 0,
+        "skippedSample": [],
+        "errors": [],
+        "dryRun": dry_run,
+    }
+
+    cursor = conn.cursor()
+    try:
+        recipes_produce = recipe_produce(cursor)
+        after = 0
+        while True:
+            customers = active_customers(cursor, start, end, after, chunk_size)
+            if not customers:
+                break
+            after = customers[-1]
+            summary["customers"] += len(customers)
+
+            lines, recipes = expand_chunk(cursor, customers, start, recipes_produce, drops)
+            if lines.empty:
+                continue
+            orders, keys, skipped = chunk_orders(
+                lines,
+                recipes,
+                delivery_addresses(cursor, customers),
+                already_ordered(cursor, customers, start),
+            )
+            summary["skipped"] += len(skipped)
+            summary["skippedSample"] = (summary["skippedSample"] + skipped)[:SAMPLE_SIZE]
+            if not orders:
+                continue
+            if dry_run:
+                summary["ordersCreated"] += len(orders)
+                continue
+
+            try:
+                order_ids, short = write_chunk(cursor, orders, keys)
+                if order_ids:
+                    bump(cursor, "Orders", "OrderProduce", "OrderRecipe", "Produce", "SubscriptionOrder")
+                    conn.commit()
+                else:
+                    conn.rollback()
+                summary["ordersCreated"] += len(order_ids)
+                summary["skipped"] += len(short)
+                summary["skippedSample"] = (summary["skippedSample"] + short)[:SAMPLE_SIZE]
+            except OrderError as e:
+                conn.rollback()
+                summary["chunksFailed"] += 1
+                summary["errors"].append({"customers": [customers[0], customers[-1]], "errors": e.errors})
+            except Exception as e:
+                # e.g. an orderID taken by a concurrent POST /c/orders
+                conn.rollback()
+                summary["chunksFailed"] += 1
+                summary["errors"].append({"customers": [customers[0], customers[-1]], "errors": [{"error": str(e)}]})
+            if log:
+                log(f"customers up to {after}: {summary['ordersCreated']} orders so far")
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    return summary
+
+
+def init_app(app):
+    from backend.cache import cache
+    from backend.db_connection import db
+
+    @app.cli.command("subscriptions-run")
+    @click.option("--week", default=None, help="Any date in the week to order for (default: this week).")
+    @click.option("--chunk", default=None, type=int, help="Customers per transaction.")
+    @click.option("--dry-run", is_flag=True, help="Count the orders without writing them.")
+    def run_command(week, chunk, dry_run):
+        """Create this week's orders from every active meal plan."""
+        conn = db.connect()
+        try:
+            summary = run(
+                conn,
+                date.fromisoformat(week) if week else None,
+                chunk or app.config.get("SUBSCRIPTION_CHUNK_SIZE", CHUNK_SIZE),
+                app.config.get("SUBSCRIPTION_DELIVERY_DAYS", DELIVERY_WEEKDAYS),
+                dry_run,
+                log=click.echo,
+            )
+        except Exception:
+            db.release(conn, discard=True)
+            raise
+        finally:
+            # Chunks committed before a failure still changed stock
+            cache.invalidate("Produce")
+        db.release(conn)
+        click.echo(
+            f"week of {summary['weekStart']}: {summary['ordersCreated']} orders for "
+            f"{summary['customers']} customers, {summary['skipped']} skipped, "
+            f"{summary['chunksFailed']} chunks failed"
+        )
@@ -0,0 +1,74 @@
+#------------------------------------------------------------
+# Benchmark: fleet dispatch on synthetic fleets
+#------------------------------------------------------------
+# Run from the api/ folder:
+#   python -m benchmarks.bench_dispatch
+# Orders and DriverAvailability rows are generated in the shape of the
+# seed schema (database-files/ngo_data.sql).  The values match what
+# PyMySQL returns: TIME columns as timedelta, quantityOrdered 1-8, street
+# addresses.  No database is needed.
+import random
+import time
+from datetime import date, timedelta
+
+from backend.routing.dispatch import plan_dispatch
+from backend.routing.geocode import Geocoder
+
+FLEETS = [(500, 10), (1000, 20), (2000, 40), (5000, 80), (10000, 150)]
+STREETS = ["Main St", "Oak Ave", "Pine Rd", "Elm St", "Maple Dr", "Cedar Ln", "Birch Way", "Walnut Ct"]
+DAY = date(2025, 3, 1)
+
+
+def synthetic_orders(n, rng):
+    return [
+        {
+            "orderID": i + 1,
+            "status": rng.choice(["pending", "confirmed"]),
+            "orderDate": DAY - timedelta(days=rng.randint(1, 30)),
+            "scheduledTime": DAY,
+            "deliveryAddress": f"{rng.randint(1, 999)} {rng.choice(STREETS)} #{i}",
+            "quantityOrdered": rng.randint(1, 8),
+            "DriverID": None,
+        }
+        for i in range(n)
+    ]
+
+
+def synthetic_drivers(n, rng):
+    drivers = []
+    for i in range(n):
+        start = timedelta(hours=rng.randint(6, 10))
+        drivers.append({
+            "DriverID": i + 1,
+            "availStartTime": start,
+            "availEndTime": start + timedelta(hours=rng.choice([6, 8, 10])),
+            "date": DAY,
+            "isAvailable": 1,
+        })
+    return drivers
+
+
+def main():
+    rng = random.Random(7)
+    print(f"{'orders':>7} {'drivers':>8} {'solve s':>8} {'assigned':>9} {'unassigned':>11} "
+          f"{'stops/driver min-max':>21} {'max shift use':>14}")
+    for n_orders, n_drivers in FLEETS:
+        orders = synthetic_orders(n_orders, rng)
+        drivers = synthetic_drivers(n_drivers, rng)
+
+        started = time.perf_counter()
+        plan = plan_dispatch(orders, drivers, Geocoder(), vehicle_capacity=400)
+        elapsed = time.perf_counter() - started
+
+        assigned = [oid for route in plan["routes"] for oid in route["orderIDs"]]
+        assert len(assigned) == len(set(assigned)), "order assigned twice"
+        assert len(assigned) + len(plan["unassigned"]) == n_orders
+
+        stops = [route["stops"] for route in plan["routes"]]
+        use = max(route["routeMinutes"] / route["shiftMinutes"] for route in plan["routes"])
+        print(f"{n_orders:>7} {n_drivers:>8} {elapsed:>8.2f} {len(assigned):>9} "
+              f"{len(plan['unassigned']):>11} {min(stops):>10}-{max(stops):<10} {use:>14.0%}")
+
+
+if __name__ == "__main__":
+    main()
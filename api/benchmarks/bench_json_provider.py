@@ -0,0 +1,107 @@
+#------------------------------------------------------------
+# Benchmark: encoding 100k database rows as a JSON response
+#------------------------------------------------------------
+# Run from the api/ folder:
+#   python -m benchmarks.bench_json_provider
+# No database is needed.  Synthetic rows shaped like DriverAvailability
+# and Orders rows (DATE, TIME -> timedelta, DECIMAL from an aggregate)
+# are turned into a jsonify() response three ways:
+#   hand copy + flask:  what driver_routes used to do -- copy each row
+#                       into a new dict with str()'d dates, then Flask's
+#                       default provider
+#   provider (json):    RowJSONProvider on the stdlib fallback
+#   provider (orjson):  RowJSONProvider with orjson, if installed
+import datetime
+import decimal
+import statistics
+import time
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from backend import json_provider
+from backend.json_provider import RowJSONProvider
+
+ROW_COUNT = 100_000
+RUNS = 5
+
+
+def synthetic_rows(n):
+    start = datetime.date(2025, 1, 1)
+    return [
+        {
+            "availibilityID": i,
+            "availStartTime": datetime.timedelta(hours=8 + i % 4),
+            "availEndTime": datetime.timedelta(hours=16 + i % 4, minutes=30),
+            "date": start + datetime.timedelta(days=i % 365),
+            "isAvailable": True,
+            "DriverID": i % 50,
+            "deliveryAddress": f"{i} Huntington Ave, Boston MA",
+            "totalQuantity": decimal.Decimal(i % 97) / 4,
+        }
+        for i in range(n)
+    ]
+
+
+def hand_copy(rows):
+    result = []
+    for row in rows:
+        result.append({
+            'availibilityID': row['availibilityID'],
+            'availStartTime': str(row['availStartTime']) if row['availStartTime'] else None,
+            'availEndTime': str(row['availEndTime']) if row['availEndTime'] else None,
+            'date': str(row['date']) if row['date'] else None,
+            'isAvailable': bool(row['isAvailable']),
+            'DriverID': row['DriverID'],
+            'deliveryAddress': row['deliveryAddress'],
+            'totalQuantity': str(row['totalQuantity']),
+        })
+    return result
+
+
+def time_response(app, make_body):
+    timings = []
+    size = 0
+    with app.app_context():
+        for _ in range(RUNS):
+            started = time.perf_counter()
+            response = app.json.response(make_body())
+            size = len(response.get_data())
+            timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), size
+
+
+def main():
+    rows = synthetic_rows(ROW_COUNT)
+
+    cases = []
+
+    app = Flask(__name__)
+    app.json = DefaultJSONProvider(app)
+    cases.append(("hand copy + flask", app, lambda: hand_copy(rows)))
+
+    class StdlibProvider(RowJSONProvider):
+        def response(self, *args, **kwargs):
+            obj = self._prepare_response_obj(args, kwargs)
+            return self._app.response_class(json_provider.dumps_stdlib(obj) + b"\n", mimetype=self.mimetype)
+
+    app = Flask(__name__)
+    app.json = StdlibProvider(app)
+    cases.append(("provider (json)", app, lambda: rows))
+
+    if json_provider.orjson is not None:
+        app = Flask(__name__)
+        json_provider.init_app(app)
+        cases.append(("provider (orjson)", app, lambda: rows))
+    else:
+        print("orjson is not installed; skipping the orjson case")
+
+    print(f"{ROW_COUNT} rows, median of {RUNS} runs")
+    print(f"{'encoder':<20} {'ms':>9} {'MB':>7}")
+    for name, app, make_body in cases:
+        ms, size = time_response(app, make_body)
+        print(f"{name:<20} {ms:>9.1f} {size / 1e6:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#------------------------------------------------------------
+# Benchmark: model registry cold start vs warm hits
+#------------------------------------------------------------
+# Run from the api/ folder:
+#   python -m benchmarks.bench_model_registry
+# No database is needed.  A synthetic demand model is published to a
+# temporary registry, then we time:
+#   cold:   loading the current version (checksum + mmap) and building
+#           the model, as create_app() does once at startup
+#   first:  the first predict_one() after a load (fills the day cache)
+#   warm:   predict_one() on the cached model, as get_demand does
+#   reload: re-reading the artifact on every request, which the cache avoids
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from backend.ml_models import MODEL_NAME, DemandForecaster, ModelCache, ModelRegistry
+
+PRODUCE_COUNTS = [100, 10_000, 200_000]
+WARM_LOOKUPS = 10_000
+RELOADS = 20
+
+
+def synthetic_model(n, rng):
+    seasonal = rng.uniform(0.6, 1.4, size=(n, 12))
+    return DemandForecaster(np.arange(1, n + 1), rng.gamma(2.0, 20.0, size=n), seasonal)
+
+
+def main():
+    rng = np.random.default_rng(7)
+    print(f"{'produce':>8} {'cold ms':>9} {'first ms':>9} {'warm us (median)':>17} {'reload ms':>10}")
+    for n in PRODUCE_COUNTS:
+        with tempfile.TemporaryDirectory() as root:
+            registry = ModelRegistry(root)
+            arrays, meta = synthetic_model(n, rng).to_artifact()
+            registry.publish(MODEL_NAME, arrays, meta)
+
+            cache = ModelCache(registry, {MODEL_NAME: DemandForecaster.from_artifact})
+            started = time.perf_counter()
+            cache.refresh()
+            cold_ms = (time.perf_counter() - started) * 1000
+
+            _, model = cache.get(MODEL_NAME)
+            ids = rng.integers(1, n + 1, size=WARM_LOOKUPS)
+            started = time.perf_counter()
+            model.predict_one(int(ids[0]))
+            first_ms = (time.perf_counter() - started) * 1000
+
+            warm = []
+            for pid in ids:
+                started = time.perf_counter()
+                cache.get(MODEL_NAME)[1].predict_one(int(pid))
+                warm.append((time.perf_counter() - started) * 1e6)
+
+            reloads = []
+            for pid in ids[:RELOADS]:
+                started = time.perf_counter()
+                manifest, loaded = registry.load(MODEL_NAME)
+                DemandForecaster.from_artifact(manifest, loaded).predict_one(int(pid))
+                reloads.append((time.perf_counter() - started) * 1000)
+
+        print(f"{n:>8} {cold_ms:>9.2f} {first_ms:>9.2f} {statistics.median(warm):>17.2f} "
+              f"{statistics.median(reloads):>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
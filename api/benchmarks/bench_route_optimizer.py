@@ -0,0 +1,55 @@
+#------------------------------------------------------------
+# Benchmark: route optimizer solve time for 10 to 500 stops
+#------------------------------------------------------------
+# Run from the api/ folder:
+#   python -m benchmarks.bench_route_optimizer
+# No database is needed; stops are synthetic addresses spread over the
+# service area, with scheduled days drawn from a three-day window.
+import random
+import statistics
+import time
+from datetime import date, timedelta
+
+from backend.routing.geocode import Geocoder
+from backend.routing.optimizer import plan_route
+
+STOP_COUNTS = [10, 25, 50, 100, 200, 300, 500]
+REPEATS = 3
+STREETS = ["Main St", "Oak Ave", "Pine Rd", "Elm St", "Maple Dr", "Cedar Ln", "Birch Way", "Walnut Ct"]
+
+
+def synthetic_stops(n, rng):
+    today = date(2025, 3, 1)
+    return [
+        {
+            "orderID": i + 1,
+            "deliveryAddress": f"{rng.randint(1, 999)} {rng.choice(STREETS)} #{i}",
+            "scheduledTime": today + timedelta(days=rng.randint(0, 2)),
+        }
+        for i in range(n)
+    ]
+
+
+def main():
+    rng = random.Random(42)
+    print(f"{'stops':>6} {'solve ms (median)':>18} {'NN km':>10} {'optimized km':>13} {'saving':>7}")
+    for n in STOP_COUNTS:
+        stops = synthetic_stops(n, rng)
+        geocoder = Geocoder()
+
+        timings = []
+        for _ in range(REPEATS):
+            started = time.perf_counter()
+            plan = plan_route(stops, geocoder)
+            timings.append((time.perf_counter() - started) * 1000)
+
+        # Same time windows, nearest-neighbour seed only, as a reference length
+        nn_km = plan_route(stops, geocoder, max_passes=0)["totalDistanceKm"]
+
+        saving = 1 - plan["totalDistanceKm"] / nn_km if nn_km else 0.0
+        print(f"{n:>6} {statistics.median(timings):>18.1f} {nn_km:>10.1f} "
+              f"{plan['totalDistanceKm']:>13.1f} {saving:>7.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -115,7 +115,8 @@ with col1:
         st.session_state.update({
             "authenticated": True,
             "role": "customer",
-            "first_name": "Daniel"
+            "first_name": "Daniel",
+            "customer_id": 5  # Daniel Thurgood
         })
         st.switch_page("pages/00_Customer_Home.py")
 
@@ -125,7 +126,8 @@ with col2:
         st.session_state.update({
             "authenticated": True,
             "role": "farmer",
-            "first_name": "Maria"
+            "first_name": "Maria",
+            "farmer_id": 1
         })
         st.switch_page("pages/10_Farmer_Home.py")
 
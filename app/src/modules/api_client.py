@@ -0,0 +1,206 @@
+# api_client.py
+#
+# One HTTP client for every page's calls to the API.
+#   - a shared requests.Session: connections to web-api are kept alive
+#     and pooled instead of opened per call
+#   - default timeouts (connect, read), so a stuck API cannot hang a page
+#   - retries with exponential backoff on connection errors and on
+#     502/503/504 for idempotent methods (never for POST)
+#   - GET responses are kept per URL with their ETag / Last-Modified and
+#     revalidated: an unchanged resource comes back as a bodiless 304 and
+#     the stored response is returned (see the API's conditional GET)
+#   - get_all() follows a paginated list's X-Next-Cursor to the end, for
+#     callers that need every row rather than the first page
+#   - get_many() fetches several URLs at once on a thread pool
+#   - every call's method, path, status and latency is traced
+#
+# Paths are relative to API_URL, e.g. api_client.get("/f/recipe").
+# Calls return requests.Response objects and raise requests exceptions,
+# so page code keeps its existing status checks and error handling.
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+API_URL = os.getenv("API_URL", "http://web-api:4000")
+
+TIMEOUT = (3.05, 15)       # seconds: connect, read
+RETRIES = 3
+BACKOFF = 0.3              # sleeps 0.3s, 0.6s, 1.2s between retries
+POOL_SIZE = 16
+FAN_OUT_WORKERS = 8
+PAGE_SIZE = 1000           # rows per page for get_all(); the API's maximum
+CACHE_ENTRIES = 256
+TRACE_SIZE = 200
+
+logger = logging.getLogger(__name__)
+
+
+class ApiClient:
+    def __init__(self, base_url=API_URL, timeout=TIMEOUT, retries=RETRIES, backoff=BACKOFF,
+                 pool_size=POOL_SIZE, cache_entries=CACHE_ENTRIES):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.cache_entries = cache_entries
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset(["GET", "HEAD", "OPTIONS", "PUT", "DELETE"]),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._cache = OrderedDict()   # full URL -> 200 response
+        self._cache_lock = threading.Lock()
+        self._traces = deque(maxlen=TRACE_SIZE)
+        self._pool = None
+
+    def url(self, path):
+        if path.startswith(("http://", "https://")):
+            return path
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    # ---------------- tracing ----------------
+    def _trace(self, method, url, status, started, source):
+        ms = (time.perf_counter() - started) * 1000
+        path = url[len(self.base_url):] if url.startswith(self.base_url) else url
+        self._traces.append({
+            "method": method,
+            "path": path,
+            "status": status,
+            "ms": round(ms, 1),
+            "source": source,
+            "at": time.time(),
+        })
+        logger.debug(f"{method} {path} -> {status} in {ms:.1f}ms ({source})")
+
+    # Most recent calls, newest last
+    def traces(self, limit=None):
+        items = list(self._traces)
+        return items[-limit:] if limit else items
+
+    # ---------------- requests ----------------
+    def request(self, method, path, **kwargs):
+        url = self.url(path)
+        kwargs.setdefault("timeout", self.timeout)
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except requests.exceptions.RequestException:
+            self._trace(method, url, None, started, "error")
+            raise
+        self._trace(method, url, response.status_code, started, "network")
+        return response
+
+    def _cache_key(self, url, params):
+        return requests.Request("GET", url, params=params).prepare().url
+
+    # GET with revalidation; a 304 comes back as the stored 200 response
+    def get(self, path, params=None, **kwargs):
+        url = self.url(path)
+        key = self._cache_key(url, params)
+        with self._cache_lock:
+            cached = self._cache.get(key)
+
+        headers = dict(kwargs.pop("headers", None) or {})
+        if cached is not None:
+            if cached.headers.get("ETag"):
+                headers["If-None-Match"] = cached.headers["ETag"]
+            if cached.headers.get("Last-Modified"):
+                headers["If-Modified-Since"] = cached.headers["Last-Modified"]
+
+        kwargs.setdefault("timeout", self.timeout)
+        started = time.perf_counter()
+        try:
+            response = self.session.get(url, params=params, headers=headers, **kwargs)
+        except requests.exceptions.RequestException:
+            self._trace("GET", key, None, started, "error")
+            raise
+
+        if response.status_code == 304 and cached is not None:
+            with self._cache_lock:
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+            self._trace("GET", key, 304, started, "revalidated")
+            return cached
+
+        self._trace("GET", key, response.status_code, started, "network")
+        if response.status_code == 200 and (
+            response.headers.get("ETag") or response.headers.get("Last-Modified")
+        ):
+            with self._cache_lock:
+                self._cache[key] = response
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.cache_entries:
+                    self._cache.popitem(last=False)
+        return response
+
+    # Every row of a paginated list endpoint.  List routes stop at a page
+    # (500 rows by default) and put the next page's cursor in X-Next-Cursor;
+    # this follows it.  Raises requests.HTTPError on a failed page.
+    def get_all(self, path, params=None, **kwargs):
+        params = dict(params or {})
+        params.setdefault("limit", PAGE_SIZE)
+        rows = []
+        while True:
+            response = self.get(path, params=params, **kwargs)
+            response.raise_for_status()
+            rows += response.json()
+            next_cursor = response.headers.get("X-Next-Cursor")
+            if not next_cursor:
+                return rows
+            params["after"] = next_cursor
+
+    def post(self, path, **kwargs):
+        return self.request("POST", path, **kwargs)
+
+    def put(self, path, **kwargs):
+        return self.request("PUT", path, **kwargs)
+
+    def delete(self, path, **kwargs):
+        return self.request("DELETE", path, **kwargs)
+
+    # ---------------- fan-out ----------------
+    def _executor(self):
+        if self._pool is None:
+            with self._cache_lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(FAN_OUT_WORKERS, thread_name_prefix="api-client")
+        return self._pool
+
+    # GET several resources at once.  `calls` is a list of paths or
+    # (path, params) pairs; the result is in the same order, holding a
+    # Response or the exception that call raised.
+    def get_many(self, calls):
+        calls = [(c, None) if isinstance(c, str) else c for c in calls]
+        futures = [self._executor().submit(self.get, path, params) for path, params in calls]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(e)
+        return results
+
+
+# Shared by every page and session in this Streamlit process
+client = ApiClient()
+
+get = client.get
+get_all = client.get_all
+post = client.post
+put = client.put
+delete = client.delete
+get_many = client.get_many
+traces = client.traces
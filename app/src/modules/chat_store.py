@@ -0,0 +1,229 @@
+# Append-only chat storage
+#
+# Replaces rewriting all of datasets/messages.json on every message.
+# Layout under datasets/chat_store/:
+#   segment-000001.log     messages, one JSON line each, append-only
+#   index/<conversation>.idx
+#                          one fixed-size (segment, offset, length)
+#                          record per message in that conversation
+#   LOCK                   flock()ed: shared to read, exclusive to write
+#
+# Sending a message appends one line to the active segment and one
+# record to the conversation's index, so it costs the same however much
+# history exists.  Reading a conversation reads its index and seeks
+# straight to its messages.  Resolving (clearing) a conversation empties
+# its index; the old lines become garbage that compact() rewrites away
+# once there are more than COMPACT_AFTER_SEGMENTS segment files and
+# most of their bytes are garbage.
+
+import base64
+import json
+import os
+import struct
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows; the app runs in Linux containers
+    fcntl = None
+
+MODULES_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# datasets folder is outside app/, at the same level as app/
+PROJECT_ROOT = os.path.abspath(os.path.join(MODULES_DIR, "..", ".."))
+DATASETS_DIR = os.path.join(PROJECT_ROOT, "datasets")
+STORE_DIR = os.path.join(DATASETS_DIR, "chat_store")
+LEGACY_FILE = os.path.join(DATASETS_DIR, "messages.json")
+
+SEGMENT_BYTES = 4 * 1024 * 1024
+COMPACT_AFTER_SEGMENTS = 8
+INDEX_RECORD = struct.Struct("<IQI")  # segment number, byte offset, length
+
+
+def _encode_name(kind, name):
+    token = base64.urlsafe_b64encode(name.encode("utf-8")).decode("ascii").rstrip("=")
+    return f"{kind}__{token}.idx"
+
+
+def _decode_name(filename):
+    kind, _, token = filename[:-len(".idx")].partition("__")
+    name = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode("utf-8")
+    return kind, name
+
+
+class ChatStore:
+    def __init__(self, root=STORE_DIR, legacy_file=LEGACY_FILE):
+        self.root = root
+        self.index_dir = os.path.join(root, "index")
+        os.makedirs(self.index_dir, exist_ok=True)
+        self._lock_path = os.path.join(root, "LOCK")
+        self._migrate(legacy_file)
+
+    # ---------------- locking ----------------
+    @contextmanager
+    def _locked(self, exclusive):
+        with open(self._lock_path, "a") as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    # ---------------- segments ----------------
+    def _segment_path(self, number):
+        return os.path.join(self.root, f"segment-{number:06d}.log")
+
+    def _segments(self):
+        return sorted(
+            int(f[len("segment-"):-len(".log")])
+            for f in os.listdir(self.root)
+            if f.startswith("segment-") and f.endswith(".log")
+        )
+
+    def _active_segment(self):
+        segments = self._segments()
+        if not segments:
+            return 1
+        last = segments[-1]
+        if os.path.getsize(self._segment_path(last)) >= SEGMENT_BYTES:
+            return last + 1
+        return last
+
+    def _index_path(self, kind, name):
+        return os.path.join(self.index_dir, _encode_name(kind, name))
+
+    # ---------------- writes ----------------
+    def _append_locked(self, kind, name, entry):
+        line = (json.dumps(entry, separators=(",", ":")) + "\n").encode("utf-8")
+        segment = self._active_segment()
+        with open(self._segment_path(segment), "ab") as f:
+            offset = f.tell()
+            f.write(line)
+        with open(self._index_path(kind, name), "ab") as f:
+            f.write(INDEX_RECORD.pack(segment, offset, len(line)))
+        return offset == 0  # started a new segment
+
+    # Add one message to a conversation ("customers" or "drivers")
+    def append(self, kind, name, entry):
+        with self._locked(exclusive=True):
+            # Only check for garbage when a segment fills up, so a normal
+            # send never scans the indexes
+            rotated = self._append_locked(kind, name, entry)
+            if rotated and len(self._segments()) > COMPACT_AFTER_SEGMENTS and self._mostly_garbage():
+                self._compact_locked()
+
+    # Resolve a conversation: it stays listed, with no messages
+    def clear(self, kind, name):
+        with self._locked(exclusive=True):
+            with open(self._index_path(kind, name), "wb"):
+                pass
+
+    # ---------------- reads ----------------
+    def _read_index(self, path):
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return []
+        usable = len(data) - len(data) % INDEX_RECORD.size  # ignore a torn last record
+        return [INDEX_RECORD.unpack_from(data, i) for i in range(0, usable, INDEX_RECORD.size)]
+
+    def _read_records(self, records):
+        messages = []
+        handles = {}
+        try:
+            for segment, offset, length in records:
+                if segment not in handles:
+                    handles[segment] = open(self._segment_path(segment), "rb")
+                f = handles[segment]
+                f.seek(offset)
+                messages.append(json.loads(f.read(length)))
+        finally:
+            for f in handles.values():
+                f.close()
+        return messages
+
+    # Messages in one conversation, oldest first
+    def read(self, kind, name):
+        with self._locked(exclusive=False):
+            return self._read_records(self._read_index(self._index_path(kind, name)))
+
+    # Names of every conversation of this kind
+    def conversations(self, kind):
+        names = []
+        for filename in os.listdir(self.index_dir):
+            if filename.endswith(".idx"):
+                file_kind, name = _decode_name(filename)
+                if file_kind == kind:
+                    names.append(name)
+        return sorted(names)
+
+    # ---------------- compaction ----------------
+    # True when less than half of the segment bytes are still referenced
+    def _mostly_garbage(self):
+        total = sum(os.path.getsize(self._segment_path(n)) for n in self._segments())
+        live = 0
+        for filename in os.listdir(self.index_dir):
+            if filename.endswith(".idx"):
+                live += sum(r[2] for r in self._read_index(os.path.join(self.index_dir, filename)))
+        return live * 2 < total
+
+    # Copy every live message into a fresh segment, point the indexes at
+    # it, then delete the old segments.  Indexes are swapped one at a
+    # time with os.replace and the old segments are only removed at the
+    # end, so a crash part-way leaves every index valid.
+    def _compact_locked(self):
+        old_segments = self._segments()
+        target = (old_segments[-1] if old_segments else 0) + 1
+        handles = {}
+        with open(self._segment_path(target), "ab") as out:
+            for filename in os.listdir(self.index_dir):
+                if not filename.endswith(".idx"):
+                    continue
+                path = os.path.join(self.index_dir, filename)
+                new_records = []
+                for segment, offset, length in self._read_index(path):
+                    if segment not in handles:
+                        handles[segment] = open(self._segment_path(segment), "rb")
+                    handles[segment].seek(offset)
+                    line = handles[segment].read(length)
+                    new_records.append(INDEX_RECORD.pack(target, out.tell(), len(line)))
+                    out.write(line)
+                out.flush()
+                os.fsync(out.fileno())
+                tmp = path + ".tmp"
+                with open(tmp, "wb") as f:
+                    f.write(b"".join(new_records))
+                os.replace(tmp, path)
+        for f in handles.values():
+            f.close()
+        for segment in old_segments:
+            os.remove(self._segment_path(segment))
+
+    def compact(self):
+        with self._locked(exclusive=True):
+            self._compact_locked()
+
+    # ---------------- one-time import of messages.json ----------------
+    def _migrate(self, legacy_file):
+        if not legacy_file or not os.path.exists(legacy_file):
+            return
+        with self._locked(exclusive=True):
+            if not os.path.exists(legacy_file):  # another process got here first
+                return
+            try:
+                with open(legacy_file) as f:
+                    data = json.load(f)
+            except json.JSONDecodeError:
+                data = {}
+            for kind in ("customers", "drivers"):
+                for name, history in (data.get(kind) or {}).items():
+                    # older driver chats were nested per order
+                    if isinstance(history, dict):
+                        history = [m for thread in history.values() for m in thread]
+                    open(self._index_path(kind, name), "ab").close()
+                    for entry in history:
+                        self._append_locked(kind, name, entry)
+            os.replace(legacy_file, legacy_file + ".migrated")
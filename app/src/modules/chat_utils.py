@@ -1,26 +1,34 @@
-import os
-import json
+from datetime import datetime
 
-MODULES_DIR = os.path.dirname(os.path.abspath(__file__))
+from modules.chat_store import ChatStore
 
-# datasets folder is outside app/, at the same level as app/
-PROJECT_ROOT = os.path.abspath(os.path.join(MODULES_DIR, "..", ".."))
-DATASETS_DIR = os.path.join(PROJECT_ROOT, "datasets")
-CHAT_FILE = os.path.join(DATASETS_DIR, "messages.json")
+# One store per Streamlit process; it is safe to share between sessions
+# and between processes (writes take a file lock).
+_store = None
 
-def load_chats():
-    if not os.path.exists(CHAT_FILE):
-        return {"customers": {}}
-    try:
-        with open(CHAT_FILE, "r") as f:
-            return json.load(f)
-    except json.JSONDecodeError:
-        return {"customers": {}}
 
-def save_chats(data):
-    # ensure datasets folder exists (optional if it always exists)
-    os.makedirs(DATASETS_DIR, exist_ok=True)
-    with open(CHAT_FILE, "w") as f:
-        json.dump(data, f, indent=4)
+def get_store():
+    global _store
+    if _store is None:
+        _store = ChatStore()
+    return _store
 
 
+def load_conversation(kind, name):
+    return get_store().read(kind, name)
+
+
+def list_conversations(kind):
+    return get_store().conversations(kind)
+
+
+def send_message(kind, name, sender, message):
+    get_store().append(kind, name, {
+        "from": sender,
+        "message": message,
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    })
+
+
+def resolve_conversation(kind, name):
+    get_store().clear(kind, name)
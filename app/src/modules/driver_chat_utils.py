@@ -1,13 +1,75 @@
 # driver_chat_utils.py
-import json
+#
+# Driver <-> admin chat, stored in the DeliveryMessage table via the API.
+# Each Streamlit session keeps the messages it has already fetched and
+# polls with ?since_id=<last messageID>, so a rerun only transfers rows
+# that are new since the previous one.
+import requests
+import streamlit as st
 
-def load_chats(filename="driver_messages.json"):
+from modules import api_client
+
+TIMEOUT = 5
+
+
+def _cache(driver_id):
+    return st.session_state.setdefault(
+        f"driver_chat_{driver_id}", {"messages": [], "last_id": 0}
+    )
+
+
+def _reset(driver_id):
+    st.session_state[f"driver_chat_{driver_id}"] = {"messages": [], "last_id": 0}
+
+
+# All messages in a driver's thread, fetching only the new ones
+def load_messages(driver_id):
+    cache = _cache(driver_id)
+    try:
+        response = api_client.get(
+            f"/d/driver/{driver_id}/deliverymessage",
+            params={"since_id": cache["last_id"]},
+            timeout=TIMEOUT,
+        )
+    except requests.exceptions.RequestException:
+        return cache["messages"]
+    if response.status_code != 200:
+        return cache["messages"]
+
+    # The thread was cleared (or trimmed) since our last poll: start over
+    first_id = int(response.headers.get("X-First-Message-ID", 0))
+    if cache["messages"] and (first_id == 0 or first_id > cache["messages"][0]["messageID"]):
+        _reset(driver_id)
+        return load_messages(driver_id)
+
+    new_messages = response.json()
+    if new_messages:
+        cache["messages"].extend(new_messages)
+        cache["last_id"] = new_messages[-1]["messageID"]
+    return cache["messages"]
+
+
+def send_message(driver_id, content, sender="driver"):
+    response = api_client.post(
+        f"/d/driver/{driver_id}/deliverymessage",
+        json={"content": content, "sender": sender},
+        timeout=TIMEOUT,
+    )
+    return response.status_code == 201
+
+
+def clear_chat(driver_id):
+    response = api_client.delete(f"/d/driver/{driver_id}/deliverymessage", timeout=TIMEOUT)
+    _reset(driver_id)
+    return response.status_code == 200
+
+
+# Drivers with at least one message, newest activity first
+def list_threads():
     try:
-        with open(filename, "r") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return {"messages": []}  # default structure
-
-def save_chats(chats, filename="driver_messages.json"):
-    with open(filename, "w") as f:
-        json.dump(chats, f, indent=4)
+        response = api_client.get("/a/driver-messages", timeout=TIMEOUT)
+        if response.status_code == 200:
+            return response.json()
+    except requests.exceptions.RequestException:
+        pass
+    return []
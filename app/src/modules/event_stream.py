@@ -0,0 +1,67 @@
+# event_stream.py
+#
+# Client for the API's Server-Sent Events streams (/events/...).
+# A Streamlit script cannot keep a connection open between reruns, so
+# each rerun asks for the events published since the id it saw last
+# (?timeout=0 returns them and closes).  The cursor lives in
+# st.session_state under `state_key`.
+import json
+
+import requests
+import streamlit as st
+
+from modules import api_client
+
+API_BASE = "/events"
+
+
+# Split an SSE body into [{"id", "event", "data"}]
+def parse_sse(lines):
+    events = []
+    current = {}
+    data = []
+    for line in lines:
+        if not line:
+            if data or current:
+                current["data"] = json.loads("\n".join(data)) if data else None
+                events.append(current)
+            current, data = {}, []
+        elif line.startswith(":"):
+            continue
+        else:
+            field, _, value = line.partition(":")
+            value = value[1:] if value.startswith(" ") else value
+            if field == "data":
+                data.append(value)
+            elif field in ("id", "event"):
+                current[field] = value
+    return events
+
+
+# Events for `path` (e.g. "/driver/6") since this session last asked.
+# The first call only establishes the cursor and returns a "ready"
+# event; a "reset" event means the client must refetch its full data.
+def poll_events(path, state_key, wait=0, timeout=5):
+    headers = {}
+    last_id = st.session_state.get(state_key)
+    if last_id:
+        headers["Last-Event-ID"] = last_id
+    try:
+        response = api_client.client.request(
+            "GET",
+            f"{API_BASE}{path}",
+            params={"timeout": wait},
+            headers=headers,
+            stream=True,
+            timeout=timeout + wait,
+        )
+        if response.status_code != 200:
+            return [{"event": "reset", "data": None}]
+        events = parse_sse(response.iter_lines(decode_unicode=True))
+    except requests.exceptions.RequestException:
+        return []
+
+    for event in events:
+        if event.get("id"):
+            st.session_state[state_key] = event["id"]
+    return events
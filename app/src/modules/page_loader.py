@@ -0,0 +1,137 @@
+# page_loader.py
+#
+# Loads everything a page needs from the API before it renders.
+# A page declares each piece of data as a named step:
+#   - a path (or (path, params)) for data that depends on nothing else
+#   - a function of earlier results, listed in `after`, for data whose
+#     URL needs something fetched first (e.g. the recipes of a menu)
+# run() starts every step whose inputs are ready on api_client's thread
+# pool at once, and starts each dependent step as soon as its last input
+# arrives, so a page waits for its slowest chain of calls rather than
+# the sum of all of them.
+#
+#   loader = PageLoader("recipe_creator")
+#   loader.add("recipes", "/a/recipes", default=[])
+#   loader.add("menus", "/a/weekly_menu/", default=[])
+#   loader.add("menu_recipes", lambda menus: f"/a/weeklymenu/{menus[0]['menuID']}/recipes",
+#              after=["menus"], default=[])
+#   data = loader.run()          # {"recipes": [...], "menus": [...], ...}
+#
+# A step added with all_pages=True reads every page of a paginated list
+# (api_client.get_all) instead of just the first.
+# A step that fails (exception or non-200) gets its default, and its
+# error is kept in loader.errors; steps that depend on it are skipped.
+# A dependent step's function may return None to skip itself.
+# Each run's time-to-data is logged and kept for timings().
+import logging
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, wait
+
+from modules import api_client
+
+TIMINGS_SIZE = 100
+
+logger = logging.getLogger(__name__)
+_timings = deque(maxlen=TIMINGS_SIZE)
+
+
+class Step:
+    def __init__(self, key, source, after, default, parse, all_pages):
+        self.key = key
+        self.source = source
+        self.after = list(after)
+        self.default = default
+        self.parse = parse
+        self.all_pages = all_pages
+        self.ms = None
+        self.status = None
+
+
+class PageLoader:
+    def __init__(self, page, client=None):
+        self.page = page
+        self.client = client or api_client.client
+        self.steps = {}
+        self.errors = {}
+        self.elapsed_ms = None
+
+    # Declare one piece of page data.  `source` is a path, a (path, params)
+    # pair, or (with `after`) a function of the listed results returning either
+    def add(self, key, source, after=(), default=None, parse=None, all_pages=False):
+        for name in after:
+            if name not in self.steps:
+                raise ValueError(f"step '{key}' depends on unknown step '{name}'")
+        self.steps[key] = Step(key, source, after, default, parse, all_pages)
+        return self
+
+    def _call(self, step, results):
+        source = step.source
+        if callable(source):
+            source = source(*[results[name] for name in step.after])
+            if source is None:
+                return None
+        path, params = (source, None) if isinstance(source, str) else source
+
+        started = time.perf_counter()
+        try:
+            if step.all_pages:
+                body = self.client.get_all(path, params=params)
+                step.status = 200
+            else:
+                response = self.client.get(path, params=params)
+                step.status = response.status_code
+                if response.status_code != 200:
+                    raise RuntimeError(f"GET {path} returned {response.status_code}")
+                body = response.json()
+        finally:
+            step.ms = round((time.perf_counter() - started) * 1000, 1)
+        return step.parse(body) if step.parse else body
+
+    # Fetch every step, running independent ones concurrently
+    def run(self):
+        started = time.perf_counter()
+        results = {}
+        pending = dict(self.steps)
+        running = {}
+        executor = self.client._executor()
+
+        while pending or running:
+            for key, step in list(pending.items()):
+                if any(name in self.errors for name in step.after):
+                    self.errors[key] = "skipped: an input failed"
+                    results[key] = step.default
+                    del pending[key]
+                elif all(name in results for name in step.after):
+                    running[executor.submit(self._call, step, results)] = step
+                    del pending[key]
+
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                step = running.pop(future)
+                try:
+                    value = future.result()
+                    results[step.key] = step.default if value is None else value
+                except Exception as e:
+                    self.errors[step.key] = str(e)
+                    results[step.key] = step.default
+                    logger.warning(f"{self.page}: {step.key} failed: {e}")
+
+        self.elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+        _timings.append({
+            "page": self.page,
+            "ms": self.elapsed_ms,
+            "steps": {key: step.ms for key, step in self.steps.items()},
+            "errors": dict(self.errors),
+            "at": time.time(),
+        })
+        logger.debug(f"{self.page} loaded {len(results)} steps in {self.elapsed_ms}ms")
+        return results
+
+
+# Most recent page loads, newest last
+def timings(page=None, limit=None):
+    items = [t for t in _timings if page is None or t["page"] == page]
+    return items[-limit:] if limit else items
@@ -2,6 +2,7 @@ import logging
 logger = logging.getLogger(__name__)
 
 import streamlit as st
+from modules import api_client
 from modules.nav import SideBarLinks
 
 # ---- Page Config ----
@@ -58,6 +59,25 @@ st.markdown(f"""
 </div>
 """, unsafe_allow_html=True)
 
+# ---- At a Glance ----
+# One request: /c/summary aggregates orders, meal plans and notifications
+customer_id = st.session_state.get("customer_id", 1)
+try:
+    response = api_client.get("/c/summary", params={"customerID": customer_id})
+    summary = response.json() if response.status_code == 200 else None
+except Exception as e:
+    logger.warning(f"Could not load customer summary: {e}")
+    summary = None
+
+if summary:
+    open_orders = sum(n for status, n in summary["ordersByStatus"].items()
+                      if status not in ("delivered", "cancelled"))
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric("Open Orders", open_orders)
+    m2.metric("Next Delivery", summary["nextDelivery"] or "None scheduled")
+    m3.metric("Planned Meals", summary["plannedMeals"])
+    m4.metric(f"Notifications ({summary['days']} days)", summary["recentNotifications"])
+
 # ---- Action Cards ----
 col1, col2, col3 = st.columns(3)
 
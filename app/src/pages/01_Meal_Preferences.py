@@ -6,7 +6,7 @@ import streamlit as st
 from streamlit_extras.app_logo import add_logo
 from modules.nav import SideBarLinks
 from datetime import date
-import requests
+from modules import api_client
 
 st.set_page_config(layout="wide")
 SideBarLinks()
@@ -14,7 +14,7 @@ SideBarLinks()
 if "customer_id" not in st.session_state:
     st.session_state["customer_id"] = 1
 
-API_URL = "http://web-api:4000/c"
+API_URL = "/c"
 
 # -------- GET CUSTOMER ID --------
 customer_id = st.session_state.get("customer_id")
@@ -192,7 +192,7 @@ with st.container():
         }
 
         try:
-            response = requests.put(
+            response = api_client.put(
                 f"{API_URL}/customer/{customer_id}",
                 json=payload
             )
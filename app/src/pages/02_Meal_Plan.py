@@ -5,8 +5,8 @@ import streamlit as st
 from streamlit_extras.app_logo import add_logo
 import pandas as pd
 from modules.nav import SideBarLinks
-from datetime import date
-import requests
+from datetime import date, timedelta
+from modules import api_client
 
 st.set_page_config(layout='wide')
 
@@ -72,17 +72,23 @@ st.markdown("""
 # Header
 st.markdown("<div class='meal-header'>MEALS</div>", unsafe_allow_html=True)
 
-# -------------- GET RECIPES FROM API ----------------
+customer_id = st.session_state.get("customer_id", 1)
 
-API_URL = "http://web-api:4000"
+# -------------- GET RECIPES FROM API ----------------
+# Recipes picked for this customer's dietary preferences and goals;
+# the plain recipe list if recommendations are unavailable
 
 try:
-    recipe_response = requests.get(f"{API_URL}/f/recipe")
+    recipe_response = api_client.get(f"/c/customers/{customer_id}/recommendations", params={"limit": 5})
     recipe_response.raise_for_status()
-    recipe_data = recipe_response.json()
+    recipe_data = recipe_response.json()["recipes"]
 except Exception as e:
-    st.error(f"Could not load recipe list: {e}")
-    recipe_data = []
+    logger.warning(f"Could not load recommendations: {e}")
+    try:
+        recipe_data = api_client.get_all("/f/recipe")
+    except Exception as e:
+        st.error(f"Could not load recipe list: {e}")
+        recipe_data = []
 
 # Format recipes into simplified objects expected by UI
 formatted_recipes = []
@@ -91,22 +97,82 @@ for r in recipe_data:
         "id": r.get("recipeID"),
         "name": r.get("name"),
         "emoji": "🥗",    # default emoji placeholder
-        "short": r.get("description")[:50] + "...",
+        "short": (r.get("description") or "")[:50] + "...",
         "desc": r.get("description"),
         "ingredients": r.get("nutritionInfo", "N/A")
     })
 
 # ------------------ Meal Plan State ------------------
-if "meal_plan" not in st.session_state:
-    st.session_state.meal_plan = {
-        day: {meal: {"recipe": None, "date": None}
-        for meal in ["Breakfast", "Lunch", "Dinner"]}
-        for day in ["Monday","Tuesday","Wednesday","Thursday","Friday","Saturday","Sunday"]
-    }
+# The week is loaded from the API in one request and edited locally;
+# "Save week" sends every slot back in one PUT, which only writes the
+# slots that changed.
+
+WEEK_DAYS = ["Monday","Tuesday","Wednesday","Thursday","Friday","Saturday","Sunday"]
+MEALS = ["Breakfast","Lunch","Dinner"]
+
+week_of = st.date_input("Week of", value=date.today(), format="MM/DD/YYYY")
+week_start = week_of - timedelta(days=week_of.weekday())
+
+def empty_week():
+    return {day: {meal: {"recipe": None, "recipeID": None, "date": None} for meal in MEALS} for day in WEEK_DAYS}
+
+def load_week(start):
+    plan = empty_week()
+    try:
+        response = api_client.get(f"/c/customers/{customer_id}/mealplan", params={"week": start.isoformat()})
+        response.raise_for_status()
+        for slot in response.json().get("slots", []):
+            day = slot["day"].capitalize()
+            meal = slot["mealType"].capitalize()
+            if day in plan and meal in plan[day]:
+                plan[day][meal] = {
+                    "recipe": slot.get("name"),
+                    "recipeID": slot["recipeID"],
+                    "date": date.fromisoformat(slot["date"]) if slot.get("date") else None,
+                }
+    except Exception as e:
+        st.error(f"Could not load meal plan: {e}")
+    return plan
+
+def plan_slots(plan):
+    return [
+        {"day": day, "mealType": meal, "recipeID": plan[day][meal]["recipeID"]}
+        for day in WEEK_DAYS for meal in MEALS
+        if plan[day][meal]["recipeID"] is not None
+    ]
+
+if st.session_state.get("meal_plan_week") != week_start:
+    st.session_state.meal_plan = load_week(week_start)
+    st.session_state.meal_plan_saved = plan_slots(st.session_state.meal_plan)
+    st.session_state.meal_plan_week = week_start
 
 if "selected_recipe" not in st.session_state:
     st.session_state.selected_recipe = None
 
+unsaved = plan_slots(st.session_state.meal_plan) != st.session_state.meal_plan_saved
+save_col, reload_col, _ = st.columns([1, 1, 5])
+if save_col.button("Save week", type="primary", disabled=not unsaved):
+    try:
+        response = api_client.put(
+            f"/c/customers/{customer_id}/mealplan",
+            json={"weekStart": week_start.isoformat(), "slots": plan_slots(st.session_state.meal_plan)},
+        )
+        response.raise_for_status()
+        result = response.json()
+        st.session_state.meal_plan_saved = plan_slots(st.session_state.meal_plan)
+        st.success(
+            f"Meal plan saved: {result['inserted']} added, {result['updated']} changed, "
+            f"{result['deleted']} removed."
+        )
+        unsaved = False
+    except Exception as e:
+        st.error(f"Could not save meal plan: {e}")
+if reload_col.button("Discard changes", disabled=not unsaved):
+    st.session_state.meal_plan_week = None
+    st.rerun()
+if unsaved:
+    st.caption("You have unsaved changes.")
+
 # ------------------ Render Week Grid ------------------
 
 week_days = list(st.session_state.meal_plan.keys())
@@ -125,7 +191,7 @@ for i, day in enumerate(week_days):
 
             # Remove button
             if st.button("✖", key=f"remove-{day}-{meal}"):
-                st.session_state.meal_plan[day][meal] = {"recipe": None, "date": None}
+                st.session_state.meal_plan[day][meal] = {"recipe": None, "recipeID": None, "date": None}
                 st.rerun()
 
             st.markdown(f"<div class='meal-name'>{meal}</div>", unsafe_allow_html=True)
@@ -141,7 +207,7 @@ st.divider()
 
 # ------------------ Available Recipes ------------------
 
-st.subheader("Available Recipes")
+st.subheader("Recommended Recipes")
 
 recipe_cols = st.columns(5)
 
@@ -165,7 +231,7 @@ for idx, col in enumerate(recipe_cols):
         """, unsafe_allow_html=True)
 
         if st.button("SELECT", key=f"select-recipe-{idx}"):
-            st.session_state.selected_recipe = r["name"]
+            st.session_state.selected_recipe = r
             st.success(f"Selected: {r['name']}")
 
 st.divider()
@@ -180,13 +246,13 @@ if not selected_recipe:
     st.info("Select a recipe above to assign it to a meal.")
 else:
     day = st.selectbox("Day", week_days)
-    meal = st.selectbox("Meal", ["Breakfast","Lunch","Dinner"])
-    chosen_date = st.date_input("Date", value=date.today(), format="MM/DD/YYYY")
+    meal = st.selectbox("Meal", MEALS)
 
     if st.button("Assign Recipe"):
         st.session_state.meal_plan[day][meal] = {
-            "recipe": selected_recipe,
-            "date": chosen_date
+            "recipe": selected_recipe["name"],
+            "recipeID": selected_recipe["id"],
+            "date": week_start + timedelta(days=WEEK_DAYS.index(day)),
         }
-        st.success(f"Assigned '{selected_recipe}' to {meal} on {day}!")
+        st.success(f"Assigned '{selected_recipe['name']}' to {meal} on {day}!")
         st.rerun()
@@ -1,6 +1,6 @@
 import streamlit as st
 from modules.nav import SideBarLinks
-from modules.chat_utils import load_chats, save_chats
+from modules.chat_utils import load_conversation, send_message
 
 st.set_page_config(layout="wide")
 SideBarLinks()
@@ -9,17 +9,8 @@ customer = st.session_state["first_name"]
 
 st.title("💬 Chat with Support")
 
-# Load chat data
-chats = load_chats()
-
-# Ensure customer exists
-if "customers" not in chats:
-    chats["customers"] = {}
-
-if customer not in chats["customers"]:
-    chats["customers"][customer] = []
-
-customer_chat = chats["customers"][customer]
+# Load only this customer's conversation
+customer_chat = load_conversation("customers", customer)
 
 # ---------------------------------------------------
 # 1. RESOLVED MESSAGE (shown ONLY if admin cleared chat)
@@ -54,11 +45,7 @@ msg = st.text_input("Enter your message:", key="msg_input")
 
 if st.button("Send"):
     if msg.strip():
-        customer_chat.append({
-            "from": "customer",
-            "message": msg.strip()
-        })
-        save_chats(chats)
+        send_message("customers", customer, "customer", msg.strip())
         st.session_state["refresh"] = not st.session_state.get("refresh", False)
     else:
         st.warning("Message cannot be empty.")
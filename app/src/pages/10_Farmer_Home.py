@@ -2,6 +2,7 @@ import logging
 logger = logging.getLogger(__name__)
 
 import streamlit as st
+from modules import api_client
 from modules.nav import SideBarLinks
 
 st.set_page_config(layout='wide')
@@ -57,6 +58,28 @@ st.markdown(f"""
 </div>
 """, unsafe_allow_html=True)
 
+# ---- At a Glance ----
+# One request: /f/summary aggregates stock, orders and notifications
+farmer_id = st.session_state.get("farmer_id", 1)
+try:
+    response = api_client.get("/f/summary", params={"farmerID": farmer_id})
+    summary = response.json() if response.status_code == 200 else None
+except Exception as e:
+    logger.warning(f"Could not load farmer summary: {e}")
+    summary = None
+
+if summary:
+    open_orders = sum(n for status, n in summary["ordersByStatus"].items()
+                      if status not in ("delivered", "cancelled"))
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric("Inventory on Hand", summary["inventoryQuantity"])
+    m2.metric("Low-Stock Produce", summary["lowStockCount"])
+    m3.metric("Open Orders", open_orders)
+    m4.metric(f"Notifications ({summary['days']} days)", summary["recentNotifications"])
+    if summary["lowStock"]:
+        st.caption("Running low: " + ", ".join(
+            f"{p['name']} ({p['quantityAvailable']})" for p in summary["lowStock"]))
+
 # ---- Action Cards ----
 col1, col2, col3 = st.columns(3)
 
@@ -1,5 +1,6 @@
-import streamlit as st
 import requests
+import streamlit as st
+from modules import api_client
 from streamlit_extras.app_logo import add_logo
 from modules.nav import SideBarLinks
 import datetime
@@ -7,20 +8,20 @@ import datetime
 # Initialize sidebar
 SideBarLinks()
 
-API_URL = "http://web-api:4000"
-
 def get_next_inventory_id():
     try:
-        response = requests.get(f"{API_URL}/f/inventory")
+        # Only the highest inventoryID is needed, not the whole table
+        response = api_client.get(
+            "/f/inventory",
+            params={"fields": "inventoryID", "order": "desc", "limit": 1},
+        )
         if response.status_code == 200:
             entries = response.json()
 
             if len(entries) == 0:
                 return 1  # start at 1 if empty table
 
-            # Find max ID
-            max_id = max(item["inventoryID"] for item in entries)
-            return max_id + 1
+            return entries[0]["inventoryID"] + 1
         else:
             st.error("Could not fetch inventory list")
             return 1
@@ -45,14 +46,12 @@ with col1:
 with col2:
     if search:
         try:
-            response = requests.get(f"{API_URL}/a/farmers")
-
-            if response.status_code != 200:
+            try:
+                farmers = api_client.get_all("/a/farmers")
+            except requests.exceptions.HTTPError:
                 st.error("Could not fetch farmer list.")
                 st.stop()
 
-            farmers = response.json()
-
             farmer = next((f for f in farmers if f["farmerID"] == int(farmerID)), None)
 
             if not farmer:
@@ -69,17 +68,22 @@ with col2:
             st.error(f"Error connecting to API: {str(e)}")
 
 
-if search: 
+# Keep the section below open while the produce key is searched
+if search:
+    st.session_state.produce_key_farmer = int(farmerID)
+
+if search or st.session_state.get("produce_key_farmer") == int(farmerID):
     st.markdown("<hr>", unsafe_allow_html=True)
     st.subheader("Produce Key:")
 
     with st.popover("Open Produce Key"):
-        st.write("All produce and their IDs:")
+        produce_query = st.text_input("Find produce", placeholder="Produce name...")
         try:
-            resp = requests.get(f"{API_URL}/f/produce")
+            resp = api_client.get("/search", params={"q": produce_query, "type": "produce", "limit": 25})
             if resp.status_code == 200:
-                produce_list = resp.json()
-                table_data = [{"Produce": p["name"], "ID": p["produceID"]} for p in produce_list]
+                found = resp.json()
+                table_data = [{"Produce": p["name"], "ID": p["produceID"]} for p in found["results"]]
+                st.write(f"{found['total']} produce found" + (", showing the first 25:" if found["total"] > 25 else ":"))
                 st.table(table_data)
             else:
                 st.error("Could not load produce list.")
@@ -107,7 +111,7 @@ if search:
         }
 
         try:
-            r = requests.post(f"{API_URL}/f/farmers/{farmerID_input}/inventory", json=payload)
+            r = api_client.post(f"/f/farmers/{farmerID_input}/inventory", json=payload)
             if r.status_code == 201:
                 st.success("Produce added successfully!")
                 st.session_state.inventoryID += 1
@@ -128,7 +132,7 @@ if search:
 
     if delete_submit:
         try:
-            r = requests.delete(f"{API_URL}/f/farmers/{farmerID}/inventory/{delete_inventoryID}")
+            r = api_client.delete(f"/f/farmers/{farmerID}/inventory/{delete_inventoryID}")
             if r.status_code == 200:
                 st.success("Inventory deleted.")
                 st.rerun()
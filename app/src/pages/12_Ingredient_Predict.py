@@ -1,5 +1,5 @@
 import streamlit as st
-import requests
+from modules.page_loader import PageLoader
 from streamlit_extras.app_logo import add_logo
 from modules.nav import SideBarLinks
 import pandas as pd
@@ -12,27 +12,22 @@ SideBarLinks()
 st.title("Ingredient Directory")
 st.subheader("Most Popular Recipes:")
 
-# API endpoint
-API_URL = "http://web-api:4000"
+# Everything this page shows, fetched at once: the three calls are
+# independent, so the page waits for the slowest one, not their sum
+loader = PageLoader("ingredient_predict")
+loader.add("recipes", ("/f/recipe", {"limit": 6}), default=[])
+loader.add("ingredients", ("/f/ingredient", {"limit": 6}), default=[])
+loader.add("demand", "/f/demand/produce")
+data = loader.run()
 
 # gets the most popular recipe 
-response = requests.get(f"{API_URL}/f/recipe")
-response_ing = requests.get(f"{API_URL}/f/ingredient")
-
-
-if response.status_code == 200:
-    all_recipes = response.json()
-    recipes = all_recipes[:6]
-else:
+if "recipes" in loader.errors:
     st.error("Could not load recipes")
-    recipes = []
+recipes = data["recipes"][:6]
 
-if response.status_code == 200:
-    all_ingredients = response_ing.json()
-    ingredients = all_ingredients[:6]
-else:
-    st.error("Could not load recipes")
-    ingredients = []
+if "ingredients" in loader.errors:
+    st.error("Could not load ingredients")
+ingredients = data["ingredients"][:6]
 
 
 row1 = st.columns(3)
@@ -57,40 +52,28 @@ for row, col in enumerate(all_cols):
 
 st.title("Ingredient Popularity Predictions")
 
-try:
-    produce_response = requests.get(f"{API_URL}/f/produce")
-    produce_response.raise_for_status()
-    produce_list = produce_response.json()
-    produce_list = produce_list[:12]
-except Exception as e:
-    st.error(f"Could not load produce list: {e}")
+# One round trip: every produce item with its current stock and forecast
+if "demand" in loader.errors:
+    st.error(f"Could not load produce demand: {loader.errors['demand']}")
     st.stop()
+demand_rows = data["demand"]
 
 ingredient_names = []
 current_values = []
 predicted_values = []
-
-for item in produce_list:
-    produceID = item["produceID"]
-    name = item["name"]
-    quantity = item["quantityAvailable"]
-
-    ingredient_names.append(name)
-    current_values.append(quantity)
-
-    # --- Correct URL ---
-    demand_url = f"{API_URL}//f/demand/produce/{produceID}"
-    demand_response = requests.get(demand_url)
-
-    # Append predicted value
-    try:
-        if demand_response.status_code == 200:
-            data = demand_response.json()
-            predicted_values.append(data.get("predictedDemand"))
-        else:
-            predicted_values.append(None)
-    except:
-        predicted_values.append(None)
+seen_produce = set()
+
+for row in demand_rows:
+    # Rows are ordered by produceID then forcastID; keep the first forecast
+    if row["produceID"] in seen_produce:
+        continue
+    if len(seen_produce) == 12:
+        break
+    seen_produce.add(row["produceID"])
+
+    ingredient_names.append(row["name"])
+    current_values.append(row["quantityAvailable"])
+    predicted_values.append(row.get("predictedDemand"))
 
 df = pd.DataFrame({
     "Ingredient": ingredient_names,
@@ -1,15 +1,13 @@
 import logging
 logger = logging.getLogger(__name__)
 import streamlit as st
-import requests
+from modules import api_client
 from streamlit_extras.app_logo import add_logo
 from modules.nav import SideBarLinks
 import pandas as pd 
 
 SideBarLinks()
 
-API_URL = "http://web-api:4000"
-
 st.write("# Accessing Farmer Inventory 📋")
 
 with st.form('farmer_id'): 
@@ -20,7 +18,7 @@ with st.form('farmer_id'):
 
 if submit:
     try:
-        response = requests.get(f"{API_URL}/f/farmers/{int(farmerID)}/inventory")
+        response = api_client.get(f"/f/farmers/{int(farmerID)}/inventory")
 
         if response.status_code == 200:
             inventory = response.json()
@@ -28,10 +26,10 @@ if submit:
             # Convert list → DataFrame
             df = pd.DataFrame(inventory)
 
-            # Convert date column
+            # Convert date column (the API sends "YYYY-MM-DD")
             df['dateUpdate'] = pd.to_datetime(
                 df['dateUpdate'],
-                format="%a, %d %b %Y %H:%M:%S GMT",
+                format="%Y-%m-%d",
                 errors="coerce"
             ).dt.date
 
@@ -45,4 +43,42 @@ if submit:
             st.error(f"Error: {response.json().get('error')}")
 
     except Exception as e:
-        st.error(f"Error connecting to API: {str(e)}")
\ No newline at end of file
+        st.error(f"Error connecting to API: {str(e)}")
+
+st.write("# Find Produce & Ingredients 🔎")
+
+# Matched and ranked on the server (/search); partial names and typos
+# still find an item
+search_col, kind_col = st.columns([3, 2])
+item_query = search_col.text_input("Search by name", placeholder="e.g. basil, tomato...")
+item_kind = kind_col.radio("Show", ["All", "Produce", "Ingredients"], horizontal=True)
+
+if item_query:
+    item_types = {"All": "produce,ingredient", "Produce": "produce", "Ingredients": "ingredient"}[item_kind]
+    try:
+        response = api_client.get("/search", params={"q": item_query, "type": item_types, "limit": 50})
+
+        if response.status_code == 200:
+            found = response.json()
+            counts = found["facets"].get("type", {})
+            if counts:
+                st.caption(", ".join(f"{n} {kind}" for kind, n in counts.items()))
+
+            if found["results"]:
+                st.table(pd.DataFrame([
+                    {
+                        "Type": item["type"].title(),
+                        "ID": item.get("produceID") or item.get("ingredientID"),
+                        "Name": item["name"],
+                        "Unit / Portion": item.get("unit") or item.get("portionSize"),
+                    }
+                    for item in found["results"]
+                ]))
+            else:
+                st.info("No produce or ingredients match that search.")
+
+        else:
+            st.error(f"Error: {response.json().get('error')}")
+
+    except Exception as e:
+        st.error(f"Error connecting to API: {str(e)}")
@@ -2,6 +2,7 @@ import logging
 logger = logging.getLogger(__name__)
 
 import streamlit as st
+from modules import api_client
 from modules.nav import SideBarLinks
 
 st.set_page_config(layout='wide')
@@ -55,6 +56,22 @@ st.markdown(f"""
 </div>
 """, unsafe_allow_html=True)
 
+# One request: /d/summary aggregates today's deliveries, messages and shifts
+try:
+    response = api_client.get("/d/summary", params={"driverID": st.session_state.get("driver_id")})
+    summary = response.json() if response.status_code == 200 else None
+except Exception as e:
+    logger.warning(f"Could not load driver summary: {e}")
+    summary = None
+
+if summary:
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric("Deliveries Today", summary["deliveriesToday"],
+              f"{summary['deliveredToday']} delivered", delta_color="off")
+    m2.metric("Open Orders", summary["openOrders"])
+    m3.metric("Upcoming Shifts", summary["upcomingShifts"])
+    m4.metric(f"Messages ({summary['days']} days)", summary["recentMessages"])
+
 col1, col2, col3 = st.columns(3)
 
 with col1:
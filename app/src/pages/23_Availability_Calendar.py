@@ -1,5 +1,6 @@
 import streamlit as st
 import requests
+from modules import api_client
 from datetime import datetime, timedelta
 from modules.nav import SideBarLinks
 
@@ -57,12 +58,12 @@ if not driver_id:
     st.stop()
 
 # API URL
-API_BASE = f"http://web-api:4000/d/driver/{driver_id}/driveravailability"
+API_BASE = f"/d/driver/{driver_id}/driveravailability"
 
-@st.cache_data(ttl=60)
+# Revalidated on every rerun (ETag), so edits show up immediately
 def fetch_availability(driver_id):
     try:
-        response = requests.get(f"http://web-api:4000/d/driver/{driver_id}/driveravailability") #existing
+        response = api_client.get(f"/d/driver/{driver_id}/driveravailability") #existing
         if response.status_code == 200:
             return response.json()
         return []
@@ -154,14 +155,13 @@ with col_btn2:
             }
             
             try:
-                response = requests.put(
+                response = api_client.put(
                     f"{API_BASE}/{availability_id}",
                     json=update_data
                 )
                 
                 if response.status_code == 200:
                     st.success("Availability updated successfully!")
-                    st.cache_data.clear()
                     st.rerun()
                 else:
                     st.error(f"Failed to update: {response.json().get('error', 'Unknown error')}")
@@ -178,15 +178,13 @@ with col_btn2:
             }
             
             try:
-                response = requests.post(API_BASE, json=new_data)
+                response = api_client.post(API_BASE, json=new_data)
                 
                 if response.status_code == 201:
                     st.success("Availability added successfully!")
-                    st.cache_data.clear()
                     st.rerun()
                 elif response.status_code == 409:
                     st.warning("This date already has availability. Refreshing...")
-                    st.cache_data.clear()
                     st.rerun()
                 else:
                     st.error(f"Failed to add: {response.json().get('error', 'Unknown error')}")
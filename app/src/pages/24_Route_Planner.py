@@ -1,5 +1,5 @@
 import streamlit as st
-import requests
+from modules import api_client
 from datetime import datetime
 from modules.nav import SideBarLinks
 
@@ -123,13 +123,12 @@ if not driver_id:
     st.stop()
 
 # API Base URL
-API_BASE = f"http://web-api:4000/d/driver/{driver_id}"
+API_BASE = f"/d/driver/{driver_id}"
 
 # ---- Fetch orders ----
-@st.cache_data(ttl=30)
 def fetch_orders(driver_id):
     try:
-        response = requests.get(f"http://web-api:4000/d/driver/{driver_id}/order")
+        response = api_client.get(f"/d/driver/{driver_id}/order")
         if response.status_code == 200:
             return response.json()
         return []
@@ -137,7 +136,29 @@ def fetch_orders(driver_id):
         st.error(f"Error fetching orders: {e}")
         return []
 
+# ---- Fetch optimized stop order ----
+@st.cache_data(ttl=300)
+def fetch_route(driver_id):
+    try:
+        response = api_client.get(f"/d/driver/{driver_id}/route")
+        if response.status_code == 200:
+            return response.json()
+        return {}
+    except Exception as e:
+        st.error(f"Error fetching route: {e}")
+        return {}
+
+# ---- Keep orders current ----
+# Orders are refetched on every rerun: /d/driver/<id>/order answers a
+# revalidation with a bodiless 304 until Orders changes, so this is cheap
+# and also picks up stops assigned by dispatch or new orders.  The route
+# is re-planned whenever the driver's orders or their statuses change.
+orders_key = f"route_planner_orders_{driver_id}"
 orders = fetch_orders(driver_id)
+signature = [(o.get("orderID"), o.get("status")) for o in orders]
+if st.session_state.get(orders_key) != signature:
+    st.session_state[orders_key] = signature
+    fetch_route.clear()
 
 # Calculate stats
 active_orders = [o for o in orders if o.get('status') in ['out_for_delivery', 'confirmed', 'preparing']]
@@ -179,6 +200,40 @@ with stat_cols[3]:
 
 st.markdown("<br>", unsafe_allow_html=True)
 
+st.subheader("Optimized Route")
+
+route = fetch_route(driver_id)
+route_stops = route.get("stops", [])
+
+if route_stops:
+    st.caption(
+        f"{len(route_stops)} stops · {route.get('totalDistanceKm', 0)} km total · "
+        f"planned in {route.get('solveMs', 0)} ms"
+    )
+    st.dataframe(
+        [
+            {
+                "Stop": stop["sequence"],
+                "Order": f"#{stop['orderID']}",
+                "Address": stop["deliveryAddress"],
+                "Scheduled": stop["scheduledTime"],
+                "Status": stop["status"].replace("_", " "),
+                "Leg (km)": stop["legDistanceKm"],
+                "Total (km)": stop["cumulativeDistanceKm"],
+                "ETA": stop.get("eta", "")[11:16],
+                "Traffic x": stop.get("trafficMultiplier"),
+            }
+            for stop in route_stops
+        ],
+        hide_index=True,
+        use_container_width=True,
+    )
+    st.map([{"lat": stop["lat"], "lon": stop["lng"]} for stop in route_stops])
+else:
+    st.info("No open deliveries to route.")
+
+st.markdown("<br>", unsafe_allow_html=True)
+
 st.subheader("Order Management")
 
 filter_tab = st.radio(
@@ -239,13 +294,12 @@ if display_orders:
                 with btn_cols[0]:
                     if status != 'out_for_delivery' and st.button("Start", key=f"start_{order_id}", use_container_width=True):
                         try:
-                            response = requests.put(
+                            response = api_client.put(
                                 f"{API_BASE}/order/{order_id}",
                                 json={"status": "out_for_delivery"}
                             )
                             if response.status_code == 200:
                                 st.success("Started delivery!")
-                                st.cache_data.clear()
                                 st.rerun()
                             else:
                                 st.error("Failed to update")
@@ -255,13 +309,12 @@ if display_orders:
                 with btn_cols[1]:
                     if status == 'out_for_delivery' and st.button("Deliver", key=f"deliver_{order_id}", use_container_width=True):
                         try:
-                            response = requests.put(
+                            response = api_client.put(
                                 f"{API_BASE}/order/{order_id}",
                                 json={"status": "delivered"}
                             )
                             if response.status_code == 200:
                                 st.success("Marked as delivered!")
-                                st.cache_data.clear()
                                 st.rerun()
                             else:
                                 st.error("Failed to update")
@@ -281,8 +334,8 @@ if display_orders:
                             if st.button("Submit Issue", key=f"submit_issue_{order_id}"):
                                 if issue_desc:
                                     try:
-                                        response = requests.post(
-                                            f"http://web-api:4000/d/driver/{order_id}/order/deliveryIssue",
+                                        response = api_client.post(
+                                            f"/d/driver/{order_id}/order/deliveryIssue",
                                             json={
                                                 "issueID": int(datetime.now().timestamp()),
                                                 "timestamp": datetime.now().strftime('%Y-%m-%d'),
@@ -315,5 +368,5 @@ with col_back:
         st.switch_page("pages/22_Driver_Home.py")
 with col_refresh:
     if st.button("🔄 Refresh Orders"):
-        st.cache_data.clear()
+        fetch_route.clear()
         st.rerun()
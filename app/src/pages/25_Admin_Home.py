@@ -2,8 +2,8 @@ import logging
 logger = logging.getLogger(__name__)
 
 import streamlit as st
+from modules import api_client
 from modules.nav import SideBarLinks
-import requests
 
 st.set_page_config(layout='wide')
 
@@ -54,6 +54,28 @@ st.markdown(f"""
 </div>
 """, unsafe_allow_html=True)
 
+# ---- At a Glance ----
+# One request: /a/summary aggregates orders, stock, recipes and messages
+try:
+    response = api_client.get("/a/summary")
+    summary = response.json() if response.status_code == 200 else None
+except Exception as e:
+    logger.warning(f"Could not load admin summary: {e}")
+    summary = None
+
+if summary:
+    m1, m2, m3, m4, m5 = st.columns(5)
+    m1.metric("Deliveries Today", summary["deliveriesToday"],
+              f"{summary['deliveredToday']} delivered", delta_color="off")
+    m2.metric("Unassigned Orders", summary["unassignedOrders"])
+    m3.metric("Low-Stock Produce", summary["lowStockCount"])
+    m4.metric("Active Recipes", summary["activeRecipes"])
+    m5.metric(f"Messages ({summary['days']} days)",
+              summary["recentCustomerMessages"] + summary["recentDriverMessages"])
+    if summary["ordersByStatus"]:
+        st.caption("Orders by status: " + ", ".join(
+            f"{status.replace('_', ' ')} {n}" for status, n in summary["ordersByStatus"].items()))
+
 # ---- Action Cards ----
 col1, col2, col3 = st.columns(3)
 
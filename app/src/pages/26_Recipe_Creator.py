@@ -1,5 +1,6 @@
 import streamlit as st
-import requests
+from modules import api_client
+from modules.page_loader import PageLoader
 from datetime import datetime
 from modules.nav import SideBarLinks
 
@@ -93,42 +94,61 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
-API_BASE = "http://web-api:4000/a"
+API_BASE = "/a"
 
-@st.cache_data(ttl=30)
-def fetch_recipes():
-    try:
-        response = requests.get(f"{API_BASE}/recipes")
-        if response.status_code == 200:
-            return response.json()
-        return []
-    except Exception as e:
-        st.error(f"Error fetching recipes: {e}")
-        return []
+# Every rerun revalidates these with the API (ETag), so changes show up
+# straight away and unchanged lists come back as a bodiless 304.
+# Recipes and menus are fetched together; the selected week's recipes
+# start as soon as the menus arrive, still alongside the recipe list.
 
-@st.cache_data(ttl=30)
-def fetch_weekly_menus():
-    try:
-        response = requests.get(f"{API_BASE}/weekly_menu/")
-        if response.status_code == 200:
-            return response.json()
-        return []
-    except Exception as e:
-        st.error(f"Error fetching menus: {e}")
-        return []
+def week_options_for(menus):
+    return {f"Week {m.get('weekNumber', m.get('menuID', 0))}": m.get('menuID', m.get('weekNumber', 0)) for m in menus}
+
+def default_week_index(week_options):
+    current_week = datetime.now().isocalendar()[1]
+    return min(current_week - 1, len(week_options) - 1) if current_week <= len(week_options) else 0
+
+# Menu ID the week selectbox will show on this run, given its current label
+def selected_menu_id_for(menus, label):
+    week_options = week_options_for(menus)
+    if not week_options:
+        return None
+    if label not in week_options:
+        label = list(week_options.keys())[default_week_index(week_options)]
+    return week_options[label]
+
+# Read here, on the script thread: the loader's steps run on the
+# api_client pool, where st.session_state is not this session's
+menu_week = st.session_state.get("menu_week")
+
+def menu_recipes_path(menus):
+    menu_id = selected_menu_id_for(menus, menu_week)
+    if menu_id is None:
+        return None
+    return f"{API_BASE}/weeklymenu/{menu_id}/recipes"
 
-@st.cache_data(ttl=30)
 def fetch_menu_recipes(menu_id):
     try:
-        response = requests.get(f"{API_BASE}/weeklymenu/{menu_id}/recipes")
+        response = api_client.get(f"{API_BASE}/weeklymenu/{menu_id}/recipes")
         if response.status_code == 200:
             return response.json()
         return []
     except Exception as e:
         return []
 
-recipes = fetch_recipes()
-menus = fetch_weekly_menus()
+loader = PageLoader("recipe_creator")
+loader.add("recipes", f"{API_BASE}/recipes", default=[], all_pages=True)
+loader.add("menus", f"{API_BASE}/weekly_menu/", default=[])
+loader.add("menu_recipes", menu_recipes_path, after=["menus"], default=[])
+page_data = loader.run()
+
+if "recipes" in loader.errors:
+    st.error(f"Error fetching recipes: {loader.errors['recipes']}")
+if "menus" in loader.errors:
+    st.error(f"Error fetching menus: {loader.errors['menus']}")
+
+recipes = page_data["recipes"]
+menus = page_data["menus"]
 
 active_recipes = [r for r in recipes if r.get('isActive')]
 inactive_recipes = [r for r in recipes if not r.get('isActive')]
@@ -181,22 +201,33 @@ with tab_recipes:
         cuisine_types = list(set([r.get('cuisineType', '') for r in recipes if r.get('cuisineType')]))
         filter_cuisine = st.selectbox("Filter by Cuisine", ["All"] + cuisine_types)
     with filter_cols[2]:
-        search_term = st.text_input("Search recipes", placeholder="Recipe name...")
+        search_term = st.text_input("Search recipes", placeholder="Name, cuisine, ingredients...")
 
-    # Apply filters
+    # Matching, filtering and ranking happen on the server (/search), so
+    # partial words and typos still find a recipe, best matches first
     filtered_recipes = recipes
-    if filter_status == "Active":
-        filtered_recipes = [r for r in filtered_recipes if r.get('isActive')]
-    elif filter_status == "Inactive":
-        filtered_recipes = [r for r in filtered_recipes if not r.get('isActive')]
-    
-    if filter_cuisine != "All":
-        filtered_recipes = [r for r in filtered_recipes if r.get('cuisineType') == filter_cuisine]
-    
-    if search_term:
-        filtered_recipes = [r for r in filtered_recipes if search_term.lower() in r.get('name', '').lower()]
-
-    st.markdown(f"**Showing {len(filtered_recipes)} recipes**")
+    total_found = len(recipes)
+    if search_term or filter_status != "All" or filter_cuisine != "All":
+        params = {"q": search_term, "type": "recipe", "limit": 100}
+        if filter_status != "All":
+            params["isActive"] = "true" if filter_status == "Active" else "false"
+        if filter_cuisine != "All":
+            params["cuisineType"] = filter_cuisine
+        try:
+            response = api_client.get("/search", params=params)
+            response.raise_for_status()
+            found = response.json()
+            filtered_recipes = found["results"]
+            total_found = found["total"]
+        except Exception as e:
+            st.error(f"Search failed: {e}")
+            filtered_recipes = []
+            total_found = 0
+
+    if total_found > len(filtered_recipes):
+        st.markdown(f"**Showing the best {len(filtered_recipes)} of {total_found} recipes**")
+    else:
+        st.markdown(f"**Showing {len(filtered_recipes)} recipes**")
     
     if filtered_recipes:
         for recipe in filtered_recipes:
@@ -245,11 +276,10 @@ with tab_recipes:
                     with confirm_cols[0]:
                         if st.button("Yes, Delete", key=f"confirm_yes_{recipe_id}"):
                             try:
-                                response = requests.delete(f"{API_BASE}/recipe/{recipe_id}")
+                                response = api_client.delete(f"{API_BASE}/recipe/{recipe_id}")
                                 if response.status_code == 200:
                                     st.success("Recipe deleted!")
                                     st.session_state[f'confirm_delete_{recipe_id}'] = False
-                                    st.cache_data.clear()
                                     st.rerun()
                                 else:
                                     st.error("Failed to delete")
@@ -292,7 +322,7 @@ with tab_create:
                     max_id = max([r.get('recipeID', 0) for r in recipes]) if recipes else 0
                     new_id = max_id + 1
                     
-                    response = requests.post(
+                    response = api_client.post(
                         f"{API_BASE}/recipe/",
                         json={
                             "recipeID": new_id,
@@ -308,7 +338,6 @@ with tab_create:
                     
                     if response.status_code == 201:
                         st.success(f"Recipe '{new_name}' created successfully!")
-                        st.cache_data.clear()
                         st.rerun()
                     else:
                         st.error(f"Failed to create recipe: {response.text}")
@@ -320,18 +349,22 @@ with tab_menus:
     st.subheader("Weekly Menu Management")
     st.markdown("Design weekly menus using seasonal ingredients to promote freshness and variety.")
     
-    current_week = datetime.now().isocalendar()[1]
-    week_options = {f"Week {m.get('weekNumber', m.get('menuID', 0))}": m.get('menuID', m.get('weekNumber', 0)) for m in menus}
+    week_options = week_options_for(menus)
     
     if week_options:
         selected_week_label = st.selectbox(
             "Select Week to Manage",
             list(week_options.keys()),
-            index=min(current_week - 1, len(week_options) - 1) if current_week <= len(week_options) else 0
+            index=default_week_index(week_options),
+            key="menu_week"
         )
         selected_menu_id = week_options[selected_week_label]
         
-        menu_recipes = fetch_menu_recipes(selected_menu_id)
+        # Prefetched with the rest of the page unless the pick changed since
+        if selected_menu_id == selected_menu_id_for(menus, menu_week):
+            menu_recipes = page_data["menu_recipes"]
+        else:
+            menu_recipes = fetch_menu_recipes(selected_menu_id)
         
         st.markdown(f"### {selected_week_label} Menu")
         st.markdown(f"**{len(menu_recipes)} recipes** in this menu")
@@ -356,12 +389,11 @@ with tab_menus:
                 with col2:
                     if st.button("Remove", key=f"remove_{selected_menu_id}_{mr.get('recipeID')}"):
                         try:
-                            response = requests.delete(
+                            response = api_client.delete(
                                 f"{API_BASE}/weeklymenu/{selected_menu_id}/recipe/{mr.get('recipeID')}"
                             )
                             if response.status_code == 200:
                                 st.success("Recipe removed from menu!")
-                                st.cache_data.clear()
                                 st.rerun()
                             else:
                                 st.error("Failed to remove")
@@ -397,12 +429,11 @@ with tab_menus:
                 
                 if st.button("➕ Add to Menu", use_container_width=True):
                     try:
-                        response = requests.post(
+                        response = api_client.post(
                             f"{API_BASE}/weeklymenu/{selected_menu_id}/recipe/{selected_recipe_id}"
                         )
                         if response.status_code == 201:
                             st.success("Recipe added to menu!")
-                            st.cache_data.clear()
                             st.rerun()
                         else:
                             st.error(f"Failed to add: {response.text}")
@@ -422,6 +453,5 @@ with col_back:
         st.switch_page("pages/25_Admin_Home.py")
 with col_refresh:
     if st.button("Refresh Data"):
-        st.cache_data.clear()
         st.rerun()
 
@@ -1,9 +1,9 @@
 import streamlit as st
-import requests
+from modules import api_client
 from modules.nav import SideBarLinks
 from datetime import datetime
 
-API_BASE = "http://web-api:4000/a"
+API_BASE = "/a"
 
 st.set_page_config(layout="wide", page_title="Customer Accounts")
 SideBarLinks()
@@ -109,11 +109,7 @@ st.markdown("""
 def load_customers():
     """Fetch all customers from API"""
     try:
-        r = requests.get(f"{API_BASE}/admin/customers")
-        if r.status_code == 200:
-            return r.json()
-        else:
-            return []
+        return api_client.get_all(f"{API_BASE}/admin/customers")
     except Exception as e:
         st.error(f"Error loading customers: {e}")
         return []
@@ -122,11 +118,7 @@ def load_customers():
 def load_customer_messages(customer_id):
     """Fetch messages for a specific customer"""
     try:
-        r = requests.get(f"{API_BASE}/customer/{customer_id}/customermessages")
-        if r.status_code == 200:
-            return r.json()
-        else:
-            return []
+        return api_client.get_all(f"{API_BASE}/customer/{customer_id}/customermessages")
     except Exception:
         return []
 
@@ -140,7 +132,7 @@ def send_message(customer_id, content):
             "content": content,
             "timestamp": datetime.now().strftime("%Y-%m-%d")
         }
-        r = requests.post(f"{API_BASE}/customer/{customer_id}/customermessages", json=payload)
+        r = api_client.post(f"{API_BASE}/customer/{customer_id}/customermessages", json=payload)
         return r.status_code == 201
     except Exception:
         return False
@@ -149,7 +141,7 @@ def send_message(customer_id, content):
 def delete_customer(customer_id):
     """Delete a customer account"""
     try:
-        r = requests.delete(f"{API_BASE}/customers/{customer_id}")
+        r = api_client.delete(f"{API_BASE}/customers/{customer_id}")
         return r.status_code == 200
     except Exception:
         return False
@@ -1,7 +1,6 @@
 import streamlit as st
 from modules.nav import SideBarLinks
-from modules.driver_chat_utils import load_chats, save_chats
-from datetime import datetime
+from modules.driver_chat_utils import clear_chat, load_messages, send_message
 
 st.set_page_config(layout="wide")
 SideBarLinks()
@@ -12,19 +11,20 @@ st.title("🚚 Driver Chat with Admin")
 if "refresh" not in st.session_state:
     st.session_state["refresh"] = False
 
-# Load driver chat data
-driver_chats = load_chats("driver_messages.json")
-if "messages" not in driver_chats:
-    driver_chats["messages"] = []
+driver_id = st.session_state.get("driver_id")
+if not driver_id:
+    st.error("No driver ID found. Please log in again.")
+    st.stop()
 
-messages = driver_chats["messages"]
+# Load driver chat data (only messages newer than the last poll are fetched)
+messages = load_messages(driver_id)
 
 # ------------------ Show previous messages ------------------
 st.subheader("💌 Previous Messages")
 if messages:
     for entry in messages:
-        speaker = entry.get("from", "")
-        content = entry.get("message", "")
+        speaker = entry.get("sender", "")
+        content = entry.get("content", "")
         timestamp = entry.get("timestamp", "")
         if speaker == "admin":
             st.markdown(f"<div style='color: #1e88e5'><b>Admin:</b> {content} <i>({timestamp})</i></div>", unsafe_allow_html=True)
@@ -51,25 +51,17 @@ quick_messages = [
 for idx, qmsg in enumerate(quick_messages):
     with quick_cols[idx]:
         if st.button(qmsg, key=f"quick_{idx}", use_container_width=True):
-            messages.append({
-                "from": "driver",
-                "message": qmsg,
-                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            })
-            save_chats(driver_chats, "driver_messages.json")
+            send_message(driver_id, qmsg)
             st.session_state["refresh"] = not st.session_state["refresh"]
             st.experimental_rerun() if hasattr(st, "experimental_rerun") else st.stop()
 
 # Send message button
 if st.button("Send Message"):
     if msg.strip():
-        messages.append({
-            "from": "driver",
-            "message": msg.strip(),
-            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        })
-        save_chats(driver_chats, "driver_messages.json")
-        st.success("Message sent!")
+        if send_message(driver_id, msg.strip()):
+            st.success("Message sent!")
+        else:
+            st.error("Message could not be sent.")
         st.session_state["refresh"] = not st.session_state["refresh"]
         st.stop()
     else:
@@ -78,8 +70,7 @@ if st.button("Send Message"):
 # ------------------ Clear chat button ------------------
 st.write("---")
 if st.button("🗑️ Clear Chat"):
-    driver_chats["messages"] = []
-    save_chats(driver_chats, "driver_messages.json")
+    clear_chat(driver_id)
     st.success("Chat cleared!")
     st.session_state["refresh"] = not st.session_state["refresh"]
     st.stop()